@@ -32,6 +32,48 @@ async function apiRequest<T>(
   }
 }
 
+// Read an NDJSON response body, passing each line to onEvent as it arrives
+async function readNdjson<T>(response: Response, onEvent: (event: T) => void): Promise<void> {
+  if (!response.ok || !response.body) {
+    throw new Error(`HTTP error! status: ${response.status}`);
+  }
+  
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  while (true) {
+    const { done, value } = await reader.read();
+    buffer += decoder.decode(value, { stream: !done });
+    const lines = buffer.split('\n');
+    buffer = lines.pop() ?? '';
+    for (const line of lines) {
+      if (line.trim()) {
+        onEvent(JSON.parse(line) as T);
+      }
+    }
+    if (done) {
+      break;
+    }
+  }
+}
+
+// Expand a columnar query response into the row objects the UI renders
+export function columnarToRows(response: QueryResponse): Record<string, any>[] {
+  if (response.result_format !== 'columnar' || !response.column_data) {
+    return response.results;
+  }
+  const columnData = response.column_data;
+  const rows: Record<string, any>[] = new Array(response.row_count);
+  for (let i = 0; i < response.row_count; i++) {
+    const row: Record<string, any> = {};
+    response.columns.forEach((column, c) => {
+      row[column] = columnData[c][i];
+    });
+    rows[i] = row;
+  }
+  return rows;
+}
+
 // API methods
 export const api = {
   // Upload file
@@ -56,6 +98,53 @@ export const api = {
     });
   },
   
+  // Process query with columnar results: one array per column instead of one object per row
+  async processQueryColumnar(request: QueryRequest): Promise<QueryResponse> {
+    return apiRequest<QueryResponse>('/query', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Accept': 'application/vnd.nlsql.columnar+json, application/json'
+      },
+      body: JSON.stringify({ ...request, result_format: 'columnar' })
+    });
+  },
+  
+  // Process query and receive result batches as they are read from the database
+  async streamQuery(request: QueryRequest, onEvent: (event: QueryStreamEvent) => void): Promise<void> {
+    const response = await fetch(`${API_BASE_URL}/query/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(request)
+    });
+    await readNdjson<QueryStreamEvent>(response, onEvent);
+  },
+  
+  // Process several queries at once; each result arrives as soon as it is ready
+  async streamQueryBatch(request: QueryBatchRequest, onEvent: (event: QueryBatchEvent) => void): Promise<void> {
+    const response = await fetch(`${API_BASE_URL}/query/batch`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(request)
+    });
+    await readNdjson<QueryBatchEvent>(response, onEvent);
+  },
+  
+  // Process query one page at a time; pass next_cursor back for the next page
+  async processQueryPage(request: QueryPageRequest): Promise<QueryResponse> {
+    return apiRequest<QueryResponse>('/query/page', {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json'
+      },
+      body: JSON.stringify(request)
+    });
+  },
+  
   // Get database schema
   async getSchema(): Promise<DatabaseSchemaResponse> {
     return apiRequest<DatabaseSchemaResponse>('/schema');
@@ -77,32 +166,40 @@ export const api = {
     return apiRequest<HealthCheckResponse>('/health');
   },
   
+  // Runtime metrics
+  async getMetrics(): Promise<MetricsResponse> {
+    return apiRequest<MetricsResponse>('/metrics');
+  },
+  
+  // List indexes built automatically by the index advisor
+  async listIndexes(): Promise<IndexListResponse> {
+    return apiRequest<IndexListResponse>('/indexes');
+  },
+  
+  // Drop an automatically built index
+  async dropIndex(indexName: string): Promise<{ message: string }> {
+    return apiRequest<{ message: string }>(`/indexes/${encodeURIComponent(indexName)}`, {
+      method: 'DELETE'
+    });
+  },
+  
   // Generate random query
   async generateRandomQuery(): Promise<RandomQueryResponse> {
     return apiRequest<RandomQueryResponse>('/generate-random-query');
   },
 
-  // Export table as CSV
-  async exportTable(tableName: string): Promise<void> {
-    const url = `${API_BASE_URL}/table/${tableName}/export`;
-    try {
-      const response = await fetch(url);
-      if (!response.ok) {
-        throw new Error(`HTTP error! status: ${response.status}`);
-      }
-      const blob = await response.blob();
-      const downloadUrl = window.URL.createObjectURL(blob);
-      const a = document.createElement('a');
-      a.href = downloadUrl;
-      a.download = `${tableName}.csv`;
-      document.body.appendChild(a);
-      a.click();
-      document.body.removeChild(a);
-      window.URL.revokeObjectURL(downloadUrl);
-    } catch (error) {
-      console.error('Export table failed:', error);
-      throw error;
+  // Export table as CSV, JSONL or Parquet; the browser streams the download straight to disk
+  exportTable(tableName: string, format: ExportFormat = 'csv', gzip: boolean = false): void {
+    const params = new URLSearchParams({ format });
+    if (gzip) {
+      params.set('gzip', 'true');
     }
+    const a = document.createElement('a');
+    a.href = `${API_BASE_URL}/table/${encodeURIComponent(tableName)}/export?${params}`;
+    a.download = `${tableName}.${format}${gzip ? '.gz' : ''}`;
+    document.body.appendChild(a);
+    a.click();
+    document.body.removeChild(a);
   },
 
   // Export query results as CSV
@@ -6,6 +6,7 @@ interface FileUploadResponse {
   table_schema: Record<string, string>;
   row_count: number;
   sample_data: Record<string, any>[];
+  rows_per_second?: number;
   error?: string;
 }
 
@@ -14,6 +15,7 @@ interface QueryRequest {
   query: string;
   llm_provider: "openai" | "anthropic";
   table_name?: string;
+  result_format?: "rows" | "columnar";
 }
 
 interface QueryResponse {
@@ -22,9 +24,43 @@ interface QueryResponse {
   columns: string[];
   row_count: number;
   execution_time_ms: number;
+  next_cursor?: string;
+  result_format: "rows" | "columnar";
+  column_data?: any[][] | null;
+  estimated_cost?: number | null;
+  row_limit?: number | null;
+  truncated?: boolean;
+  timed_out?: boolean;
   error?: string;
 }
 
+interface QueryPageRequest {
+  query?: string;
+  llm_provider?: "openai" | "anthropic";
+  cursor?: string;
+  page_size?: number;
+}
+
+// Lines of the NDJSON stream returned by /api/query/stream
+type QueryStreamEvent =
+  | { type: "meta"; sql: string; columns: string[] }
+  | { type: "rows"; rows: Record<string, any>[] }
+  | { type: "end"; row_count: number; execution_time_ms: number }
+  | { type: "error"; error: string; timed_out?: boolean };
+
+interface QueryBatchRequest {
+  queries: string[];
+  llm_provider?: "openai" | "anthropic";
+  result_format?: "rows" | "columnar";
+}
+
+// Lines of the NDJSON stream returned by /api/query/batch, one result per
+// query in completion order
+type QueryBatchEvent =
+  | ({ type: "result"; index: number; query: string } & QueryResponse)
+  | { type: "end"; query_count: number; error_count: number; execution_time_ms: number }
+  | { type: "error"; error: string };
+
 // Database Schema Types
 interface ColumnInfo {
   name: string;
@@ -50,6 +86,7 @@ interface DatabaseSchemaResponse {
 interface InsightsRequest {
   table_name: string;
   column_names?: string[];
+  approximate?: boolean;
 }
 
 interface ColumnInsight {
@@ -61,6 +98,12 @@ interface ColumnInsight {
   max_value?: any;
   avg_value?: number;
   most_common?: Record<string, any>[];
+  // Approximate mode only
+  approximate: boolean;
+  unique_values_error?: number;
+  most_common_error?: number;
+  quantiles?: Record<string, number>;
+  quantiles_rank_error?: number;
 }
 
 interface InsightsResponse {
@@ -86,8 +129,85 @@ interface HealthCheckResponse {
 }
 
 // Export Types
+type ExportFormat = "csv" | "jsonl" | "parquet";
+
 interface ExportResultsRequest {
   columns: string[];
   results: Record<string, unknown>[];
   filename?: string;
-}
\ No newline at end of file
+}
+
+// Metrics Types
+interface CacheStats {
+  hits: number;
+  misses: number;
+  hit_rate: number;
+  entries: number;
+  evictions: number;
+  expirations: number;
+  persistent_hits: number;
+  invalidations?: number;
+  size_bytes?: number | null;
+}
+
+interface IndexAdvisorStats {
+  tracked_columns: number;
+  indexes_built: number;
+  last_error?: string;
+}
+
+interface LatencyStats {
+  count: number;
+  mean_seconds?: number | null;
+  p50_seconds?: number | null;
+  p95_seconds?: number | null;
+  p99_seconds?: number | null;
+}
+
+interface HedgingStats {
+  enabled: boolean;
+  requests: number;
+  hedges_sent: number;
+  hedge_wins: number;
+}
+
+interface CoalescingStats {
+  calls: number;
+  shared: number;
+  in_flight: number;
+}
+
+interface AdmissionStats {
+  active: number;
+  queue_depth: number;
+  max_concurrency: number;
+  admitted: number;
+  rate_limited: number;
+  shed: number;
+  mean_wait_seconds?: number | null;
+  p95_wait_seconds?: number | null;
+}
+
+interface MetricsResponse {
+  sql_cache: CacheStats;
+  result_cache?: CacheStats;
+  index_advisor?: IndexAdvisorStats;
+  latency?: Record<string, LatencyStats>;
+  llm_hedging?: HedgingStats;
+  query_coalescing?: CoalescingStats;
+  llm_admission?: Record<string, AdmissionStats>;
+  uptime_seconds: number;
+}
+
+// Index Advisor Types
+interface IndexInfo {
+  name: string;
+  table_name: string;
+  columns: string[];
+  uses: number;
+}
+
+interface IndexListResponse {
+  indexes: IndexInfo[];
+  error?: string;
+}
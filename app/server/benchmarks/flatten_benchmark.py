@@ -0,0 +1,114 @@
+"""
+Micro-benchmark for the JSON flattening engine used by the upload paths.
+
+Compares core.json_flattener.flatten_json_object against the previous
+recursive implementation over synthetic nested documents.
+
+Usage:
+    cd app/server
+    uv run python benchmarks/flatten_benchmark.py
+"""
+
+import os
+import sys
+import timeit
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.constants import NESTED_DELIMITER, LIST_INDEX_DELIMITER  # noqa: E402
+from core.json_flattener import flatten_json_object  # noqa: E402
+
+
+def recursive_flatten_json_object(obj: Any, prefix: str = "") -> Dict[str, Any]:
+    """Previous recursive implementation, kept here as the baseline."""
+    result = {}
+
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            new_key = f"{prefix}{NESTED_DELIMITER}{key}" if prefix else key
+            result.update(recursive_flatten_json_object(value, new_key))
+    elif isinstance(obj, list):
+        for i, value in enumerate(obj):
+            new_key = f"{prefix}{LIST_INDEX_DELIMITER}{i}"
+            result.update(recursive_flatten_json_object(value, new_key))
+    else:
+        result[prefix] = obj
+
+    return result
+
+
+def make_flat(width: int) -> Dict[str, Any]:
+    return {f"field_{i}": i for i in range(width)}
+
+
+def make_deep(depth: int) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {"value": 1}
+    for i in range(depth):
+        doc = {f"level_{i}": doc, "id": i}
+    return doc
+
+
+def make_wide_nested(width: int, depth: int) -> Dict[str, Any]:
+    doc: Dict[str, Any] = make_flat(width)
+    for i in range(depth):
+        doc = {f"child_{j}": dict(doc) for j in range(2)} | {"name": f"node_{i}"}
+    return doc
+
+
+def make_event() -> Dict[str, Any]:
+    return {
+        "event_id": "evt_001",
+        "user": {
+            "id": 123,
+            "name": "Alice",
+            "profile": {
+                "email": "alice@test.com",
+                "preferences": {"theme": "dark", "notifications": True},
+            },
+        },
+        "actions": [
+            {"type": "click", "timestamp": "2024-01-01T10:00:00", "amount": 9.99},
+            {"type": "view", "timestamp": "2024-01-01T10:01:00", "amount": None},
+        ],
+        "tags": ["a", "b", "c"],
+        "metadata": {"source": "web", "device": "desktop"},
+    }
+
+
+DOCUMENTS = {
+    "event (typical JSONL record)": (make_event(), 20_000),
+    "flat, 200 fields": (make_flat(200), 2_000),
+    "deep, 200 levels": (make_deep(200), 500),
+    "wide nested, 20 fields x 6 levels": (make_wide_nested(20, 6), 200),
+}
+
+
+def main() -> None:
+    print(f"{'document':<36} {'leaves':>7} {'recursive':>12} {'iterative':>12} {'speedup':>8}")
+    for name, (doc, number) in DOCUMENTS.items():
+        expected = recursive_flatten_json_object(doc)
+        assert flatten_json_object(doc) == expected
+
+        recursive = min(timeit.repeat(lambda: recursive_flatten_json_object(doc), number=number, repeat=3))
+        iterative = min(timeit.repeat(lambda: flatten_json_object(doc), number=number, repeat=3))
+
+        print(
+            f"{name:<36} {len(expected):>7} "
+            f"{recursive / number * 1e6:>10.1f}us {iterative / number * 1e6:>10.1f}us "
+            f"{recursive / iterative:>7.1f}x"
+        )
+
+    # The recursive version cannot flatten documents deeper than the recursion limit
+    very_deep = make_deep(sys.getrecursionlimit() * 2)
+    print(f"\ndeep, {sys.getrecursionlimit() * 2} levels: iterative flattened "
+          f"{len(flatten_json_object(very_deep))} leaves", end="")
+    try:
+        recursive_flatten_json_object(very_deep)
+        print(", recursive succeeded")
+    except RecursionError:
+        print(", recursive hit RecursionError")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Benchmark for column insights on a wide table.
+
+Compares core.insights.generate_insights, which computes the counts of every
+requested column in one aggregate scan plus one top-5 query per column,
+against the previous implementation that ran up to four queries (COUNT
+DISTINCT, NULL count, MIN/MAX/AVG, GROUP BY top-5) per column. The
+approximate (sketch) mode is timed as well, and its distinct counts and top
+values are checked against the exact results.
+
+Usage:
+    cd app/server
+    uv run python benchmarks/insights_benchmark.py [rows] [columns]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import insights  # noqa: E402
+
+
+def per_column_insights(conn: sqlite3.Connection, table_name: str) -> list:
+    """Previous per-column implementation, kept here as the baseline."""
+    results = []
+    for _, col_name, col_type, *_ in conn.execute(f'PRAGMA table_info("{table_name}")').fetchall():
+        column = f'"{col_name}"'
+        unique_values = conn.execute(f'SELECT COUNT(DISTINCT {column}) FROM "{table_name}"').fetchone()[0]
+        null_count = conn.execute(f'SELECT COUNT(*) FROM "{table_name}" WHERE {column} IS NULL').fetchone()[0]
+        stats = None
+        if col_type in ['INTEGER', 'REAL', 'NUMERIC']:
+            stats = conn.execute(
+                f'SELECT MIN({column}), MAX({column}), AVG({column}) FROM "{table_name}" WHERE {column} IS NOT NULL'
+            ).fetchone()
+        most_common = conn.execute(
+            f'SELECT {column}, COUNT(*) AS count FROM "{table_name}" WHERE {column} IS NOT NULL '
+            f'GROUP BY {column} ORDER BY count DESC LIMIT 5'
+        ).fetchall()
+        results.append((col_name, unique_values, null_count, stats, most_common))
+    return results
+
+
+def build_table(path: str, rows: int, columns: int) -> None:
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    definitions = []
+    for i in range(columns):
+        definitions.append(f"c{i} {['INTEGER', 'REAL', 'TEXT', 'INTEGER'][i % 4]}")
+    conn.execute(f"CREATE TABLE wide ({', '.join(definitions)})")
+
+    def make_row():
+        row = []
+        for i in range(columns):
+            if rng.random() < 0.05:
+                row.append(None)
+            elif i % 4 == 0:
+                row.append(rng.randint(0, 1000))
+            elif i % 4 == 1:
+                row.append(round(rng.random() * 100, 2))
+            elif i % 4 == 2:
+                row.append(f"category_{int(rng.paretovariate(1.5))}")
+            else:
+                # High-cardinality, id-like column
+                row.append(rng.randrange(10 ** 12))
+        return row
+
+    placeholders = ", ".join("?" for _ in range(columns))
+    conn.executemany(f"INSERT INTO wide VALUES ({placeholders})", (make_row() for _ in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def main() -> None:
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        print(f"Building {rows:,} rows x {columns} columns...")
+        build_table(path, rows, columns)
+        conn = sqlite3.connect(path)
+
+        start = time.perf_counter()
+        per_column_insights(conn, "wide")
+        baseline = time.perf_counter() - start
+
+        @contextmanager
+        def get_connection(*args, **kwargs):
+            yield conn
+
+        with patch.object(insights, "get_connection", get_connection):
+            start = time.perf_counter()
+            exact = insights.generate_insights("wide")
+            aggregated = time.perf_counter() - start
+
+            start = time.perf_counter()
+            approximate = insights.generate_insights("wide", approximate=True)
+            sketched = time.perf_counter() - start
+
+            # Peak Python memory, measured in separate runs (tracemalloc slows them down)
+            peaks = {}
+            for approximate_mode in (False, True):
+                tracemalloc.start()
+                insights.generate_insights("wide", approximate=approximate_mode)
+                peaks[approximate_mode] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        conn.close()
+
+    distinct_errors = [
+        abs(a.unique_values - e.unique_values) / e.unique_values
+        for a, e in zip(approximate, exact) if e.unique_values
+    ]
+    reported = [(a, e) for a, e in zip(approximate, exact) if a.most_common]
+    top_matches = sum(a.most_common[0]['value'] == e.most_common[0]['value'] for a, e in reported)
+
+    print(f"per-column queries: {baseline:8.3f}s")
+    print(f"aggregate scan:     {aggregated:8.3f}s  ({baseline / aggregated:.1f}x faster)  peak {peaks[False] / 2**20:7.1f} MiB")
+    print(f"approximate:        {sketched:8.3f}s  ({baseline / sketched:.1f}x faster)  peak {peaks[True] / 2**20:7.1f} MiB")
+    print(f"  distinct count error: mean {sum(distinct_errors) / len(distinct_errors):.2%}, max {max(distinct_errors):.2%}")
+    print(f"  top value matches exact on {top_matches}/{len(reported)} columns with reported heavy hitters "
+          f"({columns - len(reported)} near-uniform columns report none)")
+
+
+if __name__ == "__main__":
+    main()
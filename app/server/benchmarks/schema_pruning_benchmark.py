@@ -0,0 +1,150 @@
+"""
+Benchmark for relevance-pruned schema prompts.
+
+Builds a synthetic database schema of a few hundred uploaded tables (the
+same business entities exported per region, with column statistics) and
+compares, for a set of questions with known answer tables:
+
+- the full schema description from format_schema_for_prompt()
+- the pruned description from format_schema_for_question(), which ranks
+  tables with core.schema_retrieval
+
+Reported per question: prompt size in characters and approximate tokens
+(4 characters per token), whether every table the answer needs was kept,
+and the time spent building the schema description. LLM latency itself
+cannot be measured offline; input processing time grows with the number of
+prompt tokens, so the token reduction is the expected latency gain.
+
+Usage:
+    cd app/server
+    uv run python benchmarks/schema_pruning_benchmark.py [regions]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import index_advisor  # noqa: E402
+from core.llm_processor import format_schema_for_prompt, format_schema_for_question  # noqa: E402
+from core.schema_retrieval import SCHEMA_PROMPT_MAX_TABLES  # noqa: E402
+
+ENTITIES = {
+    'customers': ['id', 'name', 'email', 'city', 'country', 'segment', 'signup_date'],
+    'orders': ['id', 'customer_id', 'order_date', 'status', 'total', 'currency', 'channel'],
+    'order_items': ['id', 'order_id', 'product_id', 'quantity', 'unit_price', 'discount'],
+    'products': ['id', 'sku', 'name', 'category', 'brand', 'list_price', 'supplier_id'],
+    'suppliers': ['id', 'name', 'contact_email', 'country', 'rating'],
+    'shipments': ['id', 'order_id', 'carrier', 'shipped_at', 'delivered_at', 'tracking_number'],
+    'payments': ['id', 'order_id', 'method', 'amount', 'paid_at', 'refunded'],
+    'invoices': ['id', 'customer_id', 'issued_at', 'due_date', 'amount', 'paid'],
+    'employees': ['id', 'first_name', 'last_name', 'department_id', 'hire_date', 'salary', 'title'],
+    'departments': ['id', 'name', 'manager_id', 'budget'],
+    'support_tickets': ['id', 'customer_id', 'opened_at', 'closed_at', 'priority', 'subject', 'agent_id'],
+    'marketing_campaigns': ['id', 'name', 'channel', 'start_date', 'end_date', 'spend', 'clicks', 'conversions'],
+    'web_sessions': ['id', 'visitor_id', 'started_at', 'duration_seconds', 'landing_page', 'device', 'referrer'],
+    'inventory_levels': ['id', 'product_id', 'warehouse_id', 'on_hand', 'reserved', 'counted_at'],
+    'warehouses': ['id', 'name', 'city', 'capacity'],
+    'returns': ['id', 'order_id', 'reason', 'returned_at', 'refund_amount'],
+    'reviews': ['id', 'product_id', 'customer_id', 'rating', 'review_text', 'created_at'],
+    'subscriptions': ['id', 'customer_id', 'plan', 'started_at', 'cancelled_at', 'monthly_fee'],
+    'expenses': ['id', 'employee_id', 'category', 'amount', 'submitted_at', 'approved'],
+    'leads': ['id', 'company', 'source', 'score', 'owner_id', 'created_at'],
+    'sensor_readings': ['id', 'device_id', 'temperature', 'humidity', 'recorded_at'],
+    'devices': ['id', 'model', 'firmware_version', 'installed_at', 'location'],
+    'budget_forecasts': ['id', 'department_id', 'quarter', 'forecast_amount', 'actual_amount'],
+    'timesheets': ['id', 'employee_id', 'work_date', 'hours', 'project_code'],
+    'projects': ['id', 'project_code', 'name', 'client', 'start_date', 'status'],
+}
+
+COMMON_VALUES = {
+    'status': ['shipped', 'pending', 'cancelled', 'active'],
+    'segment': ['enterprise', 'consumer', 'small business'],
+    'category': ['Electronics', 'Garden', 'Travel', 'Office supplies'],
+    'carrier': ['UPS', 'FedEx', 'DHL'],
+    'method': ['credit card', 'paypal', 'wire transfer'],
+    'priority': ['urgent', 'high', 'low'],
+    'channel': ['email', 'search', 'social'],
+    'plan': ['basic', 'premium', 'family'],
+    'reason': ['damaged', 'wrong size', 'late delivery'],
+}
+
+REGIONS = ['emea', 'apac', 'latam', 'na', 'uk', 'dach', 'nordics', 'benelux', 'iberia', 'india', 'japan', 'anz']
+
+# Question -> tables the answer has to read (for the first region)
+QUESTIONS = [
+    ("Total order value per customer segment in emea", ['orders_emea', 'customers_emea']),
+    ("Which carrier delivered the most emea shipments late?", ['shipments_emea']),
+    ("Average review rating per product category for apac", ['reviews_apac', 'products_apac']),
+    ("How many urgent support tickets were opened in latam last week", ['support_tickets_latam']),
+    ("Refund amount for damaged returns in the uk", ['returns_uk']),
+    ("Salary of employees by department in dach", ['employees_dach', 'departments_dach']),
+    ("Marketing campaign spend versus conversions for social channel in na", ['marketing_campaigns_na']),
+    ("Top 10 products by units sold in japan order items", ['order_items_japan', 'products_japan']),
+]
+
+
+def build_schema(regions):
+    tables = {}
+    for region in regions:
+        for entity, columns in ENTITIES.items():
+            row_count = 1000 + len(tables) * 37
+            stats = {
+                column: {
+                    'unique_values': len(COMMON_VALUES[column]),
+                    'null_count': 0,
+                    'most_common': [{'value': value, 'count': 10} for value in COMMON_VALUES[column]]
+                }
+                for column in columns if column in COMMON_VALUES
+            }
+            tables[f'{entity}_{region}'] = {
+                'columns': {column: 'INTEGER' if column == 'id' or column.endswith('_id') else 'TEXT' for column in columns},
+                'row_count': row_count,
+                'column_stats': {'row_count': row_count, 'columns': stats}
+            }
+    return {'tables': tables}
+
+
+def best_of(function, repeats: int = 20) -> float:
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    regions = REGIONS[:int(sys.argv[1])] if len(sys.argv) > 1 else REGIONS
+    schema = build_schema(regions)
+    # Rank on the lexical signal only; past usage would come from live traffic
+    index_advisor.INDEX_ADVISOR_ENABLED = False
+
+    full = format_schema_for_prompt(schema)
+    full_time = best_of(lambda: format_schema_for_prompt(schema))
+    print(f"{len(schema['tables'])} tables, SCHEMA_PROMPT_MAX_TABLES={SCHEMA_PROMPT_MAX_TABLES}")
+    print(f"full schema: {len(full):,} chars, ~{len(full) // 4:,} tokens, built in {full_time * 1000:.2f} ms")
+    print()
+    print(f"{'question':60} {'tokens':>7} {'saved':>6} {'recall':>6} {'ms':>6}")
+
+    total_tokens = 0
+    found = needed = 0
+    for question, targets in QUESTIONS:
+        pruned = format_schema_for_question(question, schema)
+        elapsed = best_of(lambda: format_schema_for_question(question, schema))
+        kept = [target for target in targets if f"Table: {target}\n" in pruned]
+        found += len(kept)
+        needed += len(targets)
+        total_tokens += len(pruned) // 4
+        print(f"{question[:60]:60} {len(pruned) // 4:7,} {1 - len(pruned) / len(full):6.1%} "
+              f"{len(kept)}/{len(targets):<4} {elapsed * 1000:6.2f}")
+
+    average = total_tokens / len(QUESTIONS)
+    print()
+    print(f"average prompt schema: ~{average:,.0f} tokens vs ~{len(full) // 4:,} "
+          f"({len(full) / 4 / average:.0f}x smaller), answer tables kept {found}/{needed}")
+
+
+if __name__ == "__main__":
+    main()
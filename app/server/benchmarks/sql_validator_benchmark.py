@@ -0,0 +1,130 @@
+"""
+Benchmark for SQL query validation.
+
+Compares core.sql_security.validate_sql_query, which tokenizes the query once,
+against the previous implementation that upper-cased the query and ran a list
+of regular expressions over it. Three workloads are timed:
+
+- typical generated queries, validated many times
+- long queries built by repeating keywords, where backtracking patterns such
+  as INSERT INTO .* SELECT make the regex pass quadratic
+- queries whose string literals contain keywords or comment markers, which
+  the regex pass rejected although they are safe
+
+Usage:
+    cd app/server
+    uv run python benchmarks/sql_validator_benchmark.py [iterations]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.sql_security import SQLSecurityError, validate_sql_query  # noqa: E402
+
+
+def regex_validate_sql_query(query: str) -> bool:
+    """Previous regex implementation, kept here as the baseline."""
+    normalized_query = query.upper().strip()
+    dangerous_patterns = [
+        r"\bDROP\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
+        r"\bDELETE\s+FROM\b",
+        r"\bTRUNCATE\s+TABLE\b",
+        r"\bEXEC(?:UTE)?\s*\(",
+        r"\bCREATE\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
+        r"\bALTER\s+TABLE\b",
+        r"\bGRANT\b",
+        r"\bREVOKE\b",
+        r"\bINSERT\s+INTO\b.*\bSELECT\b",
+        r"\bUPDATE\b.*\bSET\b",
+        r";\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT)",
+    ]
+    for pattern in dangerous_patterns:
+        if re.search(pattern, normalized_query):
+            raise SQLSecurityError(f"Query contains potentially dangerous operation: {pattern}")
+    if "--" in query or "/*" in query or "*/" in query:
+        raise SQLSecurityError("Query contains SQL comments which are not allowed")
+    injection_patterns = [
+        r"'\s*OR\s*'?1'?\s*=\s*'?1",
+        r'"\s*OR\s*"?1"?\s*=\s*"?1',
+        r"'[^']*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)",
+        r'"[^"]*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)',
+    ]
+    for pattern in injection_patterns:
+        if re.search(pattern, normalized_query, re.IGNORECASE):
+            raise SQLSecurityError("Query contains potential SQL injection pattern")
+    return True
+
+
+TYPICAL_QUERIES = [
+    "SELECT * FROM users",
+    "SELECT name, email FROM users WHERE age > 18 ORDER BY name LIMIT 50",
+    "SELECT city, COUNT(*) AS n, AVG(age) FROM users GROUP BY city HAVING n > 10 ORDER BY n DESC",
+    "SELECT u.name, SUM(o.total) FROM users u JOIN orders o ON o.user_id = u.id "
+    "WHERE o.created_at >= '2024-01-01' GROUP BY u.name ORDER BY 2 DESC LIMIT 10",
+    "WITH recent AS (SELECT * FROM orders WHERE created_at > date('now', '-30 days')) "
+    "SELECT product_id, COUNT(*) FROM recent GROUP BY product_id",
+]
+
+LITERAL_QUERIES = [
+    "SELECT * FROM products WHERE name = 'Update set'",
+    "SELECT * FROM notes WHERE body LIKE '%--%'",
+    "SELECT * FROM tickets WHERE title = 'Cannot drop table after update; please set owner'",
+    "SELECT * FROM logs WHERE message LIKE '%/* generated */%'",
+]
+
+
+def pathological_query(repeats: int) -> str:
+    # Upper-cased, the literals turn into INSERT INTO / UPDATE for the
+    # regexes; each one scans to the end of the query looking for the
+    # SELECT / SET that never comes
+    return "SELECT * FROM t WHERE a IN (" + ", ".join(["'insert into update'"] * repeats) + ")"
+
+
+def time_validator(validate, queries, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for query in queries:
+            try:
+                validate(query)
+            except SQLSecurityError:
+                pass
+    return time.perf_counter() - start
+
+
+def accepted(validate, query: str) -> bool:
+    try:
+        validate(query)
+        return True
+    except SQLSecurityError:
+        return False
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    per_query = iterations * len(TYPICAL_QUERIES)
+    regex_time = time_validator(regex_validate_sql_query, TYPICAL_QUERIES, iterations)
+    token_time = time_validator(validate_sql_query, TYPICAL_QUERIES, iterations)
+    print(f"typical queries ({per_query:,} validations)")
+    print(f"  regex:     {regex_time / per_query * 1e6:8.1f} us/query")
+    print(f"  tokenizer: {token_time / per_query * 1e6:8.1f} us/query")
+
+    print("long queries (one validation each)")
+    for repeats in (500, 1000, 2000, 4000):
+        query = pathological_query(repeats)
+        regex_time = time_validator(regex_validate_sql_query, [query], 1)
+        token_time = time_validator(validate_sql_query, [query], 1)
+        print(f"  {len(query):7,} chars  regex {regex_time * 1000:9.2f} ms   tokenizer {token_time * 1000:7.2f} ms")
+
+    rejected_by_regex = [query for query in LITERAL_QUERIES if not accepted(regex_validate_sql_query, query)]
+    rejected_by_tokenizer = [query for query in LITERAL_QUERIES if not accepted(validate_sql_query, query)]
+    print(f"safe queries with keywords in literals rejected: regex {len(rejected_by_regex)}/{len(LITERAL_QUERIES)}, "
+          f"tokenizer {len(rejected_by_tokenizer)}/{len(LITERAL_QUERIES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Admission control for LLM calls.
+
+Nothing limited how many requests called an LLM provider at once, so a
+burst overran the provider's rate limits and every request failed together.
+Each provider now has an admission controller that every LLM call passes
+through:
+- at most LLM_MAX_CONCURRENCY calls run at once; later calls wait in a
+  bounded FIFO queue
+- a token bucket paces calls to LLM_RATE_PER_SECOND, with bursts of up to
+  LLM_RATE_BURST calls
+- a call is refused at once, instead of queueing, when the queue is full or
+  its expected wait (from the queue length and recent call durations)
+  exceeds LLM_ADMISSION_MAX_WAIT_SECONDS; a call still queued at that limit
+  is refused too
+
+Refused calls raise AdmissionRejected, which the server turns into a 503
+(overloaded) or 429 (rate limited) response with a Retry-After header.
+
+Settings are read from the environment; each can be set for one provider
+by appending _OPENAI or _ANTHROPIC (e.g. LLM_RATE_PER_SECOND_OPENAI):
+- LLM_MAX_CONCURRENCY: concurrent calls per provider (default 16)
+- LLM_RATE_PER_SECOND: calls started per second (default 0, unlimited)
+- LLM_RATE_BURST: calls that may start back to back (default 10)
+- LLM_ADMISSION_QUEUE_SIZE: calls waiting per provider (default 64)
+- LLM_ADMISSION_MAX_WAIT_SECONDS: longest wait for admission (default 10)
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Deque, Dict, Optional, TypeVar
+
+from .executors import run_llm
+from .latency_histogram import LatencyHistogram
+
+T = TypeVar("T")
+
+# Weight of the newest sample in the moving average of call durations
+DURATION_SMOOTHING = 0.2
+
+
+def provider_setting(provider: str, name: str, default: str) -> float:
+    """Read LLM_<NAME>_<PROVIDER>, falling back to LLM_<NAME>, then `default`"""
+    value = os.environ.get(f"LLM_{name}_{provider.upper()}") or os.environ.get(f"LLM_{name}", default)
+    return float(value)
+
+
+class AdmissionRejected(Exception):
+    """An LLM call was refused because its provider is saturated."""
+
+    def __init__(self, message: str, status_code: int, retry_after: float):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Whole seconds, as the Retry-After header expects"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class TokenBucket:
+    """Token bucket pacing calls to `rate` per second with bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is free (0 when unlimited)"""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self.rate)
+
+    def take(self) -> float:
+        """Reserve a token, returning how long to wait before using it"""
+        delay = self.delay()
+        if self.rate > 0:
+            self._tokens -= 1
+        return delay
+
+    def refund(self) -> None:
+        """Return a token reserved by take() that was not used"""
+        if self.rate > 0:
+            self._tokens += 1
+
+
+class AdmissionSlot:
+    """A call slot held by AdmissionController.admit()."""
+
+    def __init__(self):
+        self.future: Optional[asyncio.Future] = None
+
+    def hold_until(self, future: asyncio.Future) -> None:
+        """
+        Keep the slot until `future` completes, even if the admit() block is
+        left first, e.g. because its caller was cancelled
+        """
+        self.future = future
+
+
+class AdmissionController:
+    """Concurrency limit, token bucket and bounded wait queue for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        rate_per_second: float = 0.0,
+        burst: float = 10,
+        queue_size: int = 64,
+        max_wait_seconds: float = 10.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_size = queue_size
+        self.max_wait_seconds = max_wait_seconds
+        self._bucket = TokenBucket(rate_per_second, burst, clock)
+        self._clock = clock
+        # Only touched from the event loop; the lock guards what stats() reads
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._average_duration: Optional[float] = None
+        self.wait_times = LatencyHistogram()
+        self.admitted = 0
+        self.rate_limited = 0
+        self.shed = 0
+
+    def _expected_wait(self, position: int) -> float:
+        """Expected wait for a slot with `position` calls queued ahead"""
+        if self._active < self.max_concurrency and not position:
+            return 0.0
+        duration = self._average_duration or 0.0
+        return (position + 1) * duration / self.max_concurrency
+
+    def _reject(self, status_code: int, retry_after: float, reason: str) -> AdmissionRejected:
+        with self._lock:
+            if status_code == 429:
+                self.rate_limited += 1
+            else:
+                self.shed += 1
+        return AdmissionRejected(f"{self.name} {reason}; retry after {retry_after:.1f}s", status_code, retry_after)
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                if not waiter.done():
+                    # Hand the slot straight to the next queued call
+                    waiter.set_result(None)
+                    return
+            self._active -= 1
+
+    def _record_duration(self, duration: float) -> None:
+        with self._lock:
+            if self._average_duration is None:
+                self._average_duration = duration
+            else:
+                self._average_duration += DURATION_SMOOTHING * (duration - self._average_duration)
+
+    def _call_done(self, future: asyncio.Future, call_start: float) -> None:
+        """Release the slot of a call handed to hold_until() once it has finished"""
+        if not future.cancelled() and future.exception() is None:
+            self._record_duration(self._clock() - call_start)
+        self._release()
+
+    async def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._active < self.max_concurrency and not self._waiters:
+                self._active += 1
+                return
+            queued = len(self._waiters)
+        expected_wait = self._expected_wait(queued)
+        if queued >= self.queue_size:
+            raise self._reject(503, expected_wait, "is overloaded: admission queue is full")
+        if expected_wait > self.max_wait_seconds:
+            raise self._reject(503, expected_wait, "is overloaded: expected wait exceeds the limit")
+
+        waiter = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                if isinstance(e, asyncio.TimeoutError):
+                    return
+                self._release()
+                raise
+            waiter.cancel()
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise self._reject(503, self._expected_wait(len(self._waiters)), "is overloaded: timed out waiting for admission")
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[AdmissionSlot]:
+        """
+        Hold one of the provider's call slots for the duration of the block,
+        or until the future passed to the slot's hold_until() completes.
+
+        Raises:
+            AdmissionRejected: If the call cannot start within the wait limit
+        """
+        start = self._clock()
+        delay = self._bucket.delay()
+        if delay > self.max_wait_seconds:
+            raise self._reject(429, delay, "is rate limited")
+
+        await self._acquire_slot()
+        slot = AdmissionSlot()
+        try:
+            remaining = self.max_wait_seconds - (self._clock() - start)
+            delay = self._bucket.take()
+            if delay > remaining:
+                self._bucket.refund()
+                raise self._reject(429, delay, "is rate limited")
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.wait_times.record(self._clock() - start)
+            with self._lock:
+                self.admitted += 1
+
+            call_start = self._clock()
+            yield slot
+            if slot.future is None:
+                self._record_duration(self._clock() - call_start)
+        finally:
+            if slot.future is None:
+                self._release()
+            elif slot.future.done():
+                self._call_done(slot.future, call_start)
+            else:
+                slot.future.add_done_callback(lambda future: self._call_done(future, call_start))
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait times and counters for the metrics endpoint"""
+        with self._lock:
+            stats = {
+                'active': self._active,
+                'queue_depth': sum(not waiter.done() for waiter in self._waiters),
+                'max_concurrency': self.max_concurrency,
+                'admitted': self.admitted,
+                'rate_limited': self.rate_limited,
+                'shed': self.shed
+            }
+        wait_times = self.wait_times.stats()
+        stats['mean_wait_seconds'] = wait_times['mean_seconds']
+        stats['p95_wait_seconds'] = wait_times['p95_seconds']
+        return stats
+
+
+_controllers: Dict[str, AdmissionController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_admission_controller(provider: str) -> AdmissionController:
+    """Get the shared admission controller for a provider, creating it on first use."""
+    controller = _controllers.get(provider)
+    if controller is None:
+        with _controllers_lock:
+            controller = _controllers.get(provider)
+            if controller is None:
+                controller = AdmissionController(
+                    provider,
+                    max_concurrency=int(provider_setting(provider, "MAX_CONCURRENCY", "16")),
+                    rate_per_second=provider_setting(provider, "RATE_PER_SECOND", "0"),
+                    burst=provider_setting(provider, "RATE_BURST", "10"),
+                    queue_size=int(provider_setting(provider, "ADMISSION_QUEUE_SIZE", "64")),
+                    max_wait_seconds=provider_setting(provider, "ADMISSION_MAX_WAIT_SECONDS", "10")
+                )
+                _controllers[provider] = controller
+    return controller
+
+
+def admission_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of every provider's controller, by provider"""
+    with _controllers_lock:
+        controllers = dict(_controllers)
+    return {provider: controller.stats() for provider, controller in sorted(controllers.items())}
+
+
+async def run_llm_admitted(provider: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking LLM call on the LLM pool once the provider's controller
+    admits it.
+
+    A worker thread cannot be stopped, so cancelling the caller (a losing
+    hedge, a client disconnect) leaves the provider call running; its slot
+    is only released once the worker has finished it.
+    """
+    async with get_admission_controller(provider).admit() as slot:
+        call = asyncio.ensure_future(run_llm(func, *args, **kwargs))
+        slot.hold_until(call)
+        return await asyncio.shield(call)
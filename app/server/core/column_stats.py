@@ -0,0 +1,163 @@
+"""
+Persisted column statistics, computed once when a table is ingested.
+
+Tables only change when a file is uploaded or a table is deleted, so the
+column insights are computed once per upload and stored in a side table.
+They are computed after the upload has committed, from SQL aggregates (or
+fixed-memory sketches for large tables), so the upload neither holds its
+write transaction nor grows its memory while they are computed.
+/api/insights then answers from the store without scanning, and the schema
+catalog hands the same statistics to the LLM prompt.
+
+Internal tables use the INTERNAL_TABLE_PREFIX and are hidden from the schema
+and table listings. Each entry records the row count it was computed for; a
+table whose row count has since changed (e.g. written to by another process)
+is treated as having no statistics.
+
+Settings are read from the environment:
+- COLUMN_STATS_EXACT_MAX_ROWS: tables with more rows get approximate,
+  fixed-memory statistics at ingestion (default 1000000)
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from .constants import INTERNAL_TABLE_PREFIX
+from .data_models import ColumnInsight
+from .insights import compute_column_insights
+
+COLUMN_STATS_EXACT_MAX_ROWS = int(os.environ.get("COLUMN_STATS_EXACT_MAX_ROWS", "1000000"))
+
+STATS_TABLE = f"{INTERNAL_TABLE_PREFIX}column_stats"
+
+
+def is_internal_table(table_name: str) -> bool:
+    """Whether a table belongs to the application rather than to the user"""
+    return table_name.startswith(INTERNAL_TABLE_PREFIX)
+
+
+def _ensure_stats_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS {STATS_TABLE} ("
+        " table_name TEXT NOT NULL,"
+        " column_name TEXT NOT NULL,"
+        " position INTEGER NOT NULL,"
+        " row_count INTEGER NOT NULL,"
+        " insight TEXT NOT NULL,"
+        " PRIMARY KEY (table_name, column_name))"
+    )
+
+
+def store_column_stats(conn: sqlite3.Connection, table_name: str, row_count: int) -> Dict[str, Any]:
+    """
+    Compute and persist the statistics of a freshly loaded table.
+
+    Call this on the writer connection after the ingestion transaction has
+    committed, and clear the table's old statistics with
+    delete_column_stats() inside that transaction so they never describe the
+    new data. The statistics are read without holding the write lock and
+    written in their own short transaction.
+
+    Returns:
+        The statistics in the shape read_column_stats() returns for one table
+    """
+    approximate = row_count > COLUMN_STATS_EXACT_MAX_ROWS
+    insights = compute_column_insights(conn, table_name, approximate=approximate)
+
+    # Blob values are stored as their string form
+    encoded = [json.dumps(insight.model_dump(), default=str) for insight in insights]
+
+    try:
+        _ensure_stats_table(conn)
+        conn.execute(f"DELETE FROM {STATS_TABLE} WHERE table_name = ?", (table_name,))
+        conn.executemany(
+            f"INSERT INTO {STATS_TABLE} (table_name, column_name, position, row_count, insight) VALUES (?, ?, ?, ?, ?)",
+            [
+                (table_name, insight.column_name, position, row_count, value)
+                for position, (insight, value) in enumerate(zip(insights, encoded))
+            ]
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return {
+        'row_count': row_count,
+        'columns': {insight.column_name: json.loads(value) for insight, value in zip(insights, encoded)}
+    }
+
+
+def delete_column_stats(conn: sqlite3.Connection, table_name: str) -> None:
+    """Remove a table's statistics; call it in the same transaction as the DROP"""
+    try:
+        conn.execute(f"DELETE FROM {STATS_TABLE} WHERE table_name = ?", (table_name,))
+    except sqlite3.OperationalError:
+        # The statistics table has not been created yet
+        pass
+
+
+def read_column_stats(conn: sqlite3.Connection, table_name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Read persisted statistics for one table or for every table
+
+    Returns:
+        Mapping of table name to {'row_count': int, 'columns': {column: insight
+        dict}}; tables without statistics are absent
+    """
+    sql = f"SELECT table_name, column_name, row_count, insight FROM {STATS_TABLE}"
+    params: tuple = ()
+    if table_name is not None:
+        sql += " WHERE table_name = ?"
+        params = (table_name,)
+    sql += " ORDER BY table_name, position"
+
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        # Nothing has been ingested since the statistics table was introduced
+        return {}
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    for row_table, column_name, row_count, insight in rows:
+        table_stats = stats.setdefault(row_table, {'row_count': row_count, 'columns': {}})
+        table_stats['columns'][column_name] = json.loads(insight)
+    return stats
+
+
+def insights_from_stats(
+    table_stats: Optional[Dict[str, Any]],
+    row_count: Optional[int],
+    column_names: Optional[List[str]] = None,
+    approximate: bool = False
+) -> Optional[List[ColumnInsight]]:
+    """
+    Answer an insights request from persisted statistics.
+
+    Args:
+        table_stats: One table's entry from read_column_stats()
+        row_count: The table's current row count, to detect stale statistics
+        column_names: Columns requested; None for all
+        approximate: Whether approximate statistics are acceptable
+
+    Returns:
+        The insights, or None if they have to be computed from the table
+    """
+    if not table_stats or table_stats['row_count'] != row_count:
+        return None
+
+    stored = table_stats['columns']
+    if column_names and any(name not in stored for name in column_names):
+        return None
+
+    # Stored in table order, like compute_column_insights() returns them
+    insights = [
+        ColumnInsight(**insight)
+        for name, insight in stored.items()
+        if not column_names or name in column_names
+    ]
+    if not approximate and any(insight.approximate for insight in insights):
+        return None
+    return insights
@@ -0,0 +1,217 @@
+"""
+SQLite connection pooling for the Natural Language SQL Interface.
+
+Connections are opened once, tuned (WAL journal, page cache and mmap sizes)
+and then reused across requests, so the connection handshake and page-cache
+warmup are paid once per connection instead of once per call.
+
+Two pools are kept per database file:
+- a read-only pool (PRAGMA query_only) for query, schema, insights and
+  export endpoints
+- a small writer pool for uploads and deletes
+
+Settings are read from the environment:
+- DATABASE_PATH: database file (default "db/database.db")
+- SQLITE_POOL_SIZE: read-only connections per database (default 8)
+- SQLITE_WRITE_POOL_SIZE: writer connections per database (default 2)
+- SQLITE_CACHE_SIZE_KIB: page cache per connection in KiB (default 65536)
+- SQLITE_MMAP_SIZE: memory-mapped I/O size in bytes (default 268435456)
+- SQLITE_BUSY_TIMEOUT_MS: busy timeout and pool wait timeout (default 5000)
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+DATABASE_PATH = os.environ.get("DATABASE_PATH", "db/database.db")
+POOL_SIZE = int(os.environ.get("SQLITE_POOL_SIZE", "8"))
+WRITE_POOL_SIZE = int(os.environ.get("SQLITE_WRITE_POOL_SIZE", "2"))
+CACHE_SIZE_KIB = int(os.environ.get("SQLITE_CACHE_SIZE_KIB", "65536"))
+MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def is_memory_database(db_path: str) -> bool:
+    """In-memory databases are private to one connection and cannot be pooled."""
+    return db_path == ":memory:" or db_path.startswith("file::memory:")
+
+
+def open_connection(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open and tune a single SQLite connection.
+
+    Args:
+        db_path: Path to the SQLite database
+        read_only: If True, the connection rejects every write (PRAGMA query_only)
+
+    Returns:
+        sqlite3.Connection: A connection that may be shared across threads,
+        one thread at a time
+    """
+    conn = sqlite3.connect(
+        db_path,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False
+    )
+    if not is_memory_database(db_path):
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB}")
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    if read_only:
+        conn.execute("PRAGMA query_only = ON")
+    return conn
+
+
+class ConnectionPool:
+    """A bounded pool of tuned connections to one SQLite database."""
+
+    def __init__(self, db_path: str, size: int, read_only: bool = False):
+        self.db_path = db_path
+        self.size = size
+        self.read_only = read_only
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._opened = 0
+        self._closed = False
+
+    def acquire(self, timeout: Optional[float] = BUSY_TIMEOUT_MS / 1000) -> sqlite3.Connection:
+        """
+        Take a connection from the pool, opening a new one while below `size`.
+
+        Raises:
+            sqlite3.OperationalError: If no connection frees up within `timeout`
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._closed:
+                raise sqlite3.OperationalError("Connection pool is closed")
+            if self._opened < self.size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+
+        if open_new:
+            try:
+                return open_connection(self.db_path, self.read_only)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError("Timed out waiting for a database connection")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Reset a connection's per-request state and return it to the pool."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            conn.row_factory = None
+            # A deadline's progress handler must not outlive its request
+            conn.set_progress_handler(None, 0)
+        except sqlite3.Error:
+            # Broken connection: drop it so a fresh one can be opened
+            self._discard(conn)
+            return
+
+        if self._closed:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._opened -= 1
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a with-block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self) -> None:
+        """Close every idle connection; busy ones are closed when released."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None, read_only: bool = False) -> ConnectionPool:
+    """
+    Get the shared pool for a database file, creating it on first use.
+
+    Pools are keyed on the absolute path so relative paths keep pointing at
+    the file they named when the pool was created.
+    """
+    path = os.path.abspath(db_path or DATABASE_PATH)
+    key = (path, read_only)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(path, POOL_SIZE if read_only else WRITE_POOL_SIZE, read_only)
+                _pools[key] = pool
+    return pool
+
+
+@contextmanager
+def get_connection(db_path: Optional[str] = None, read_only: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Borrow a pooled connection to the application database.
+
+    Args:
+        db_path: Database path; defaults to DATABASE_PATH
+        read_only: Use the read-only pool (queries, schema, insights, exports)
+
+    Example:
+        with get_connection(read_only=True) as conn:
+            conn.execute("SELECT 1")
+    """
+    if db_path and is_memory_database(db_path):
+        conn = open_connection(db_path, read_only)
+        try:
+            yield conn
+        finally:
+            conn.close()
+        return
+
+    with get_pool(db_path, read_only).connection() as conn:
+        yield conn
+
+
+def close_all_pools() -> None:
+    """Close every pool, e.g. on application shutdown."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -1,5 +1,5 @@
 """
-Constants for JSONL file processing and field flattening.
+Constants for file ingestion, JSONL processing and field flattening.
 
 This module defines the delimiter constants used for flattening nested JSON objects
 and arrays into flat column names suitable for SQLite tables.
@@ -18,4 +18,18 @@ Examples:
 NESTED_DELIMITER = "__"
 
 # Delimiter for list/array indices
-LIST_INDEX_DELIMITER = "_"
\ No newline at end of file
+LIST_INDEX_DELIMITER = "_"
+
+# Streaming ingestion settings
+# Bytes read from an upload stream per chunk
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Number of leading rows used to infer column types for streamed uploads
+SCHEMA_INFERENCE_ROWS = 1000
+
+# Number of rows written per executemany() call
+INSERT_BATCH_SIZE = 5000
+
+# Prefix of tables the application keeps for itself, e.g. column statistics;
+# they are hidden from the schema and cannot be uploaded over or deleted
+INTERNAL_TABLE_PREFIX = "_nlsql_"
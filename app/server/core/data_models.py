@@ -12,6 +12,7 @@ class FileUploadResponse(BaseModel):
     table_schema: Dict[str, str]  # column_name: data_type
     row_count: int
     sample_data: List[Dict[str, Any]]
+    rows_per_second: Optional[float] = None  # Ingestion throughput
     error: Optional[str] = None
 
 # Query Models  
@@ -19,6 +20,7 @@ class QueryRequest(BaseModel):
     query: str = Field(..., description="Natural language query")
     llm_provider: Literal["openai", "anthropic"] = "openai"
     table_name: Optional[str] = None  # If querying specific table
+    result_format: Optional[Literal["rows", "columnar"]] = None  # Defaults to rows unless negotiated via Accept
 
 class QueryResponse(BaseModel):
     sql: str
@@ -26,8 +28,26 @@ class QueryResponse(BaseModel):
     columns: List[str]
     row_count: int
     execution_time_ms: float
+    next_cursor: Optional[str] = None  # Continuation token when more rows are available
+    result_format: Literal["rows", "columnar"] = "rows"
+    column_data: Optional[List[List[Any]]] = None  # One list per entry in columns (columnar format)
+    estimated_cost: Optional[float] = None  # Rows the query plan was expected to visit
+    row_limit: Optional[int] = None  # LIMIT added by the cost guard to an unbounded query
+    truncated: bool = False  # More rows exist; next_cursor continues from /api/query/page
+    timed_out: bool = False  # The query was stopped at its deadline
     error: Optional[str] = None
 
+class QueryPageRequest(BaseModel):
+    query: Optional[str] = Field(None, description="Natural language query for the first page")
+    llm_provider: Literal["openai", "anthropic"] = "openai"
+    cursor: Optional[str] = Field(None, description="Continuation token from a previous page")
+    page_size: Optional[int] = Field(None, ge=1, description="Rows per page; capped by the server")
+
+class QueryBatchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, description="Natural language queries, answered independently")
+    llm_provider: Literal["openai", "anthropic"] = "openai"
+    result_format: Optional[Literal["rows", "columnar"]] = None  # Defaults to rows
+
 # Database Schema Models
 class ColumnInfo(BaseModel):
     name: str
@@ -53,6 +73,7 @@ class DatabaseSchemaResponse(BaseModel):
 class InsightsRequest(BaseModel):
     table_name: str
     column_names: Optional[List[str]] = None  # If None, analyze all columns
+    approximate: bool = False  # Use fixed-memory sketches for very large tables
 
 class ColumnInsight(BaseModel):
     column_name: str
@@ -63,6 +84,12 @@ class ColumnInsight(BaseModel):
     max_value: Optional[Any] = None
     avg_value: Optional[float] = None
     most_common: Optional[List[Dict[str, Any]]] = None
+    # Approximate mode only
+    approximate: bool = False
+    unique_values_error: Optional[float] = None  # Relative standard error of unique_values
+    most_common_error: Optional[int] = None  # Maximum overestimate of each most_common count
+    quantiles: Optional[Dict[str, float]] = None  # p25, p50 and p75 of numeric columns
+    quantiles_rank_error: Optional[float] = None  # Rank error bound of quantiles (95% confidence)
 
 class InsightsResponse(BaseModel):
     table_name: str
@@ -90,4 +117,70 @@ class HealthCheckResponse(BaseModel):
 class ExportResultsRequest(BaseModel):
     columns: List[str] = Field(..., description="Column names for CSV header")
     results: List[Dict[str, Any]] = Field(..., description="Query result rows")
-    filename: Optional[str] = Field(None, description="Optional custom filename")
\ No newline at end of file
+    filename: Optional[str] = Field(None, description="Optional custom filename")
+
+# Index Advisor Models
+class IndexInfo(BaseModel):
+    name: str
+    table_name: str
+    columns: List[str]
+    uses: int  # Predicate/sort uses of the column counted since startup
+
+class IndexListResponse(BaseModel):
+    indexes: List[IndexInfo]
+    error: Optional[str] = None
+
+# Metrics Models
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: float
+    entries: int
+    evictions: int = 0
+    expirations: int = 0
+    persistent_hits: int = 0
+    invalidations: int = 0  # Entries dropped because their tables changed
+    size_bytes: Optional[int] = None  # Size of the in-memory tier, where it is bounded by bytes
+
+class IndexAdvisorStats(BaseModel):
+    tracked_columns: int
+    indexes_built: int
+    last_error: Optional[str] = None
+
+class LatencyStats(BaseModel):
+    count: int
+    mean_seconds: Optional[float] = None
+    p50_seconds: Optional[float] = None  # Percentiles are bucket upper bounds
+    p95_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
+
+class HedgingStats(BaseModel):
+    enabled: bool
+    requests: int  # Requests that were eligible for hedging
+    hedges_sent: int
+    hedge_wins: int  # Requests answered by the hedge rather than the first provider
+
+class CoalescingStats(BaseModel):
+    calls: int
+    shared: int  # Calls answered by an identical call already in flight
+    in_flight: int
+
+class AdmissionStats(BaseModel):
+    active: int
+    queue_depth: int  # Calls waiting for a slot
+    max_concurrency: int
+    admitted: int
+    rate_limited: int  # Calls refused with a 429
+    shed: int  # Calls refused with a 503
+    mean_wait_seconds: Optional[float] = None
+    p95_wait_seconds: Optional[float] = None
+
+class MetricsResponse(BaseModel):
+    sql_cache: CacheStats
+    result_cache: Optional[CacheStats] = None
+    index_advisor: Optional[IndexAdvisorStats] = None
+    latency: Dict[str, LatencyStats] = {}  # e.g. "llm.openai"
+    llm_hedging: Optional[HedgingStats] = None
+    query_coalescing: Optional[CoalescingStats] = None
+    llm_admission: Dict[str, AdmissionStats] = {}  # By LLM provider
+    uptime_seconds: float
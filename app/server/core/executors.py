@@ -0,0 +1,126 @@
+"""
+Bounded thread pools for blocking work called from async request handlers.
+
+The FastAPI handlers are `async def`, but sqlite3 and the OpenAI/Anthropic
+clients are synchronous. Calling them directly would freeze the event loop
+for every other request, so handlers hand that work to one of three pools:
+- the database pool, sized to the SQLite connection pool
+- the low-priority database pool, where queries the cost guard expects to be
+  expensive run so they cannot occupy every database worker
+- the LLM pool, sized for many concurrent slow network calls
+
+Settings are read from the environment:
+- DB_MAX_WORKERS: concurrent database calls (default SQLITE_POOL_SIZE)
+- DB_LOW_PRIORITY_WORKERS: concurrent expensive queries (default 1)
+- LLM_MAX_WORKERS: concurrent LLM calls (default 32)
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, TypeVar
+
+from .connection_pool import POOL_SIZE
+
+DB_MAX_WORKERS = int(os.environ.get("DB_MAX_WORKERS", str(POOL_SIZE)))
+DB_LOW_PRIORITY_WORKERS = int(os.environ.get("DB_LOW_PRIORITY_WORKERS", "1"))
+LLM_MAX_WORKERS = int(os.environ.get("LLM_MAX_WORKERS", "32"))
+
+T = TypeVar("T")
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """Get a named executor, creating it on first use."""
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _executors[name] = executor
+    return executor
+
+
+async def run_in_executor(executor: ThreadPoolExecutor, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking callable on `executor` without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking SQLite call on the bounded database pool."""
+    return await run_in_executor(get_executor("db", DB_MAX_WORKERS), func, *args, **kwargs)
+
+
+async def run_db_low_priority(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run an expensive SQLite call on the small low-priority pool; excess calls queue there."""
+    return await run_in_executor(get_executor("db_low", DB_LOW_PRIORITY_WORKERS), func, *args, **kwargs)
+
+
+async def run_llm(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking LLM client call on the bounded LLM pool."""
+    return await run_in_executor(get_executor("llm", LLM_MAX_WORKERS), func, *args, **kwargs)
+
+
+async def iterate_db(
+    iterator: Iterator[T],
+    cancel: Optional[Callable[[], None]] = None,
+    low_priority: bool = False
+) -> AsyncIterator[T]:
+    """
+    Step a blocking iterator (e.g. one holding a database cursor) on the
+    database pool, or the low-priority pool, one item at a time.
+    
+    The iterator is closed on the pool as well, including when the consumer
+    stops early, so a pooled connection held by a generator is released.
+    If the consumer goes away (e.g. the client disconnected) while a step is
+    still running, `cancel` is called to interrupt it and the iterator is
+    closed as soon as that step returns, without waiting for it here.
+    """
+    done = object()
+    run = run_db_low_priority if low_priority else run_db
+    executor = get_executor("db_low", DB_LOW_PRIORITY_WORKERS) if low_priority else get_executor("db", DB_MAX_WORKERS)
+    # Serializes steps and close(): a generator cannot be closed while running
+    step_lock = threading.Lock()
+    
+    def step() -> Any:
+        with step_lock:
+            return next(iterator, done)
+    
+    def close() -> None:
+        with step_lock:
+            closer = getattr(iterator, "close", None)
+            if closer is not None:
+                closer()
+    
+    try:
+        while True:
+            item = await run(step)
+            if item is done:
+                break
+            yield item
+    except BaseException:
+        if cancel is not None:
+            cancel()
+        # Awaiting is not possible once the consumer is cancelled
+        executor.submit(close)
+        raise
+    else:
+        await run(close)
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shut down every executor; they are recreated on next use."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
@@ -1,15 +1,36 @@
 import json
-import pandas as pd
 import sqlite3
 import io
 import re
-from typing import Dict, Any, Set
+import csv
+import codecs
+import time
+from typing import Dict, Any, List, Optional, BinaryIO, Iterator, Callable
 from .sql_security import (
     execute_query_safely,
+    escape_identifier,
     validate_identifier,
     SQLSecurityError
 )
-from .constants import NESTED_DELIMITER, LIST_INDEX_DELIMITER
+from .connection_pool import get_connection
+from .column_stats import delete_column_stats, is_internal_table, store_column_stats
+from .json_flattener import flatten_json_object
+from .constants import (
+    UPLOAD_CHUNK_SIZE,
+    SCHEMA_INFERENCE_ROWS,
+    INSERT_BATCH_SIZE,
+    INTERNAL_TABLE_PREFIX
+)
+
+# Cell values treated as NULL when streaming CSV (mirrors pandas' defaults)
+CSV_NULL_VALUES = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+    '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+    'n/a', 'nan', 'null'
+}
+
+CSV_TRUE_VALUES = {'True', 'TRUE', 'true'}
+CSV_FALSE_VALUES = {'False', 'FALSE', 'false'}
 
 def sanitize_table_name(table_name: str) -> str:
     """
@@ -31,6 +52,10 @@ def sanitize_table_name(table_name: str) -> str:
     if not sanitized:
         sanitized = 'table'
     
+    # Keep uploads from replacing the application's own tables
+    if is_internal_table(sanitized):
+        sanitized = 'table' + sanitized
+    
     # Validate the sanitized name
     try:
         validate_identifier(sanitized, "table")
@@ -40,71 +65,321 @@ def sanitize_table_name(table_name: str) -> str:
     
     return sanitized
 
-def convert_csv_to_sqlite(csv_content: bytes, table_name: str, db_path: str = "db/database.db") -> Dict[str, Any]:
+def clean_column_name(column: str) -> str:
+    """
+    Normalize a column name the same way for every upload format
+    """
+    return column.lower().replace(' ', '_').replace('-', '_')
+
+def quote_column(column: str) -> str:
+    """
+    Quote an arbitrary column name for use in ingestion DDL/DML.
+
+    Uploaded headers and JSON keys are data, not trusted identifiers, so they
+    are always double-quoted (the same way pandas' to_sql does it) rather
+    than validated against the identifier whitelist.
+    """
+    return '"' + column.replace('"', '""') + '"'
+
+def iter_text_lines(stream: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[str]:
     """
-    Convert CSV file content to SQLite table
+    Yield decoded text lines from a binary stream read in fixed-size chunks.
+    
+    Lines keep their trailing newline so csv.reader can stitch quoted fields
+    that span several lines. Only one chunk plus one partial line is held in
+    memory at a time.
     """
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    
     try:
-        # Sanitize table name
-        table_name = sanitize_table_name(table_name)
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            
+            pending += decoder.decode(chunk)
+            last_newline = pending.rfind('\n')
+            if last_newline == -1:
+                continue
+            
+            complete, pending = pending[:last_newline], pending[last_newline + 1:]
+            for line in complete.split('\n'):
+                yield line + '\n'
         
-        # Read CSV into pandas DataFrame
-        df = pd.read_csv(io.BytesIO(csv_content))
+        pending += decoder.decode(b'', final=True)
+    except UnicodeDecodeError:
+        raise ValueError("File is not valid UTF-8 encoded text")
+    
+    if pending:
+        yield pending
+
+def infer_column_type(values: List[Optional[str]]) -> str:
+    """
+    Infer the SQLite column type for a column from a sample of raw CSV cells
+    """
+    seen_value = False
+    is_integer = True
+    is_real = True
+    
+    for value in values:
+        if value is None:
+            continue
+        seen_value = True
         
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
+        if value in CSV_TRUE_VALUES or value in CSV_FALSE_VALUES:
+            is_real = False
+            continue
         
-        # Connect to SQLite database
-        conn = sqlite3.connect(db_path)
+        if is_integer:
+            try:
+                int(value)
+                continue
+            except ValueError:
+                is_integer = False
         
-        # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
+        if is_real:
+            try:
+                float(value)
+            except ValueError:
+                return 'TEXT'
+        else:
+            return 'TEXT'
+    
+    if not seen_value:
+        return 'TEXT'
+    if is_integer:
+        return 'INTEGER'
+    if is_real:
+        return 'REAL'
+    return 'TEXT'
+
+def _csv_value_converter(column_type: str) -> Callable[[Optional[str]], Any]:
+    """
+    Build a converter from a raw CSV cell to the Python value bound into SQLite.
+    Values that do not match the inferred type are stored as text, which
+    SQLite's type affinity allows.
+    """
+    def convert_integer(value):
+        if value is None:
+            return None
+        if value in CSV_TRUE_VALUES:
+            return 1
+        if value in CSV_FALSE_VALUES:
+            return 0
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    
+    def convert_real(value):
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    
+    def convert_text(value):
+        return value
+    
+    if column_type == 'INTEGER':
+        return convert_integer
+    if column_type == 'REAL':
+        return convert_real
+    return convert_text
+
+def refresh_column_stats(conn: sqlite3.Connection, table_name: str, row_count: int) -> Optional[Dict[str, Any]]:
+    """
+    Compute and store a committed upload's column statistics.
+    
+    The upload stands if this fails: /api/insights then computes the
+    statistics on demand, so None is returned instead of an error.
+    """
+    try:
+        return store_column_stats(conn, table_name, row_count)
+    except Exception:
+        return None
+
+def describe_table(conn: sqlite3.Connection, table_name: str) -> Dict[str, Any]:
+    """
+    Return the schema and first rows of a freshly loaded table
+    """
+    cursor_info = execute_query_safely(
+        conn,
+        "PRAGMA table_info({table})",
+        identifier_params={'table': table_name}
+    )
+    columns_info = cursor_info.fetchall()
+    
+    schema = {}
+    for col in columns_info:
+        schema[col[1]] = col[2]  # column_name: data_type
+    
+    cursor_sample = execute_query_safely(
+        conn,
+        "SELECT * FROM {table} LIMIT 5",
+        identifier_params={'table': table_name}
+    )
+    sample_rows = cursor_sample.fetchall()
+    column_names = [col[1] for col in columns_info]
+    sample_data = [dict(zip(column_names, row)) for row in sample_rows]
+    
+    return {
+        'schema': schema,
+        'sample_data': sample_data
+    }
+
+def convert_csv_stream_to_sqlite(
+    csv_stream: BinaryIO,
+    table_name: str,
+    db_path: Optional[str] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    batch_size: int = INSERT_BATCH_SIZE,
+    inference_rows: int = SCHEMA_INFERENCE_ROWS
+) -> Dict[str, Any]:
+    """
+    Stream a CSV file into a SQLite table with bounded memory.
+    
+    The stream is read in fixed-size chunks, column types are inferred from
+    the first `inference_rows` rows, and rows are inserted in batches with
+    executemany() inside a single transaction, so peak memory does not grow
+    with the file size.
+    
+    Args:
+        csv_stream: Binary file-like object positioned at the start of the CSV
+        table_name: Name for the SQLite table
+        db_path: Path to the SQLite database
+        chunk_size: Bytes read from the stream per chunk
+        batch_size: Rows per executemany() call
+        inference_rows: Rows buffered to infer column types
         
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
+    Returns:
+        Dict containing table info, schema, row count, sample data and rows/sec
+    """
+    try:
+        start_time = time.perf_counter()
         
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
+        # Sanitize table name
+        table_name = sanitize_table_name(table_name)
         
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
+        reader = csv.reader(iter_text_lines(csv_stream, chunk_size))
+        
+        header = next(reader, None)
+        if not header:
+            raise ValueError("CSV file is empty")
+        
+        # Clean column names and de-duplicate them
+        columns = []
+        for raw_column in header:
+            column = clean_column_name(raw_column.strip()) or f"column_{len(columns)}"
+            base, suffix = column, 1
+            while column in columns:
+                column = f"{base}_{suffix}"
+                suffix += 1
+            columns.append(column)
+        width = len(columns)
+        
+        def normalize(row: List[str], line_num: int) -> List[Optional[str]]:
+            if len(row) > width:
+                raise ValueError(f"Expected {width} fields in line {line_num}, saw {len(row)}")
+            values = [None if value in CSV_NULL_VALUES else value for value in row]
+            if len(values) < width:
+                values.extend([None] * (width - len(values)))
+            return values
+        
+        # Buffer a bounded prefix to infer the schema
+        prefix = []
+        for row in reader:
+            if not row:
+                continue
+            prefix.append(normalize(row, reader.line_num))
+            if len(prefix) >= inference_rows:
+                break
+        
+        column_types = [
+            infer_column_type([row[i] for row in prefix])
+            for i in range(width)
+        ]
+        converters = [_csv_value_converter(column_type) for column_type in column_types]
+        
+        column_defs = ", ".join(
+            f"{quote_column(column)} {column_type}"
+            for column, column_type in zip(columns, column_types)
         )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
+        insert_sql = (
+            f"INSERT INTO {escape_identifier(table_name)} "
+            f"VALUES ({', '.join('?' for _ in columns)})"
         )
-        row_count = cursor_count.fetchone()[0]
         
-        conn.close()
+        with get_connection(db_path) as conn:
+            try:
+                conn.execute("BEGIN")
+                execute_query_safely(
+                    conn,
+                    "DROP TABLE IF EXISTS {table}",
+                    identifier_params={'table': table_name},
+                    allow_ddl=True
+                )
+                execute_query_safely(
+                    conn,
+                    f"CREATE TABLE {{table}} ({column_defs})",
+                    identifier_params={'table': table_name},
+                    allow_ddl=True
+                )
+                
+                cursor = conn.cursor()
+                row_count = 0
+                batch = []
+                
+                def flush():
+                    cursor.executemany(insert_sql, batch)
+                    batch.clear()
+                
+                for values in prefix:
+                    batch.append(tuple(convert(value) for convert, value in zip(converters, values)))
+                    if len(batch) >= batch_size:
+                        flush()
+                row_count += len(prefix)
+                prefix = None
+                
+                for row in reader:
+                    if not row:
+                        continue
+                    values = normalize(row, reader.line_num)
+                    batch.append(tuple(convert(value) for convert, value in zip(converters, values)))
+                    row_count += 1
+                    if len(batch) >= batch_size:
+                        flush()
+                if batch:
+                    flush()
+                
+                delete_column_stats(conn, table_name)
+                conn.commit()
+                column_stats = refresh_column_stats(conn, table_name, row_count)
+                
+                table_info = describe_table(conn, table_name)
+            except Exception:
+                conn.rollback()
+                raise
+        
+        elapsed = time.perf_counter() - start_time
         
         return {
             'table_name': table_name,
-            'schema': schema,
+            'schema': table_info['schema'],
             'row_count': row_count,
-            'sample_data': sample_data
+            'sample_data': table_info['sample_data'],
+            'rows_per_second': row_count / elapsed if elapsed > 0 else float(row_count),
+            'column_stats': column_stats
         }
         
     except Exception as e:
         raise Exception(f"Error converting CSV to SQLite: {str(e)}")
 
-def convert_json_to_sqlite(json_content: bytes, table_name: str, db_path: str = "db/database.db") -> Dict[str, Any]:
+def convert_json_to_sqlite(json_content: bytes, table_name: str, db_path: Optional[str] = None) -> Dict[str, Any]:
     """
-    Convert JSON file content to SQLite table
+    Convert JSON file content to SQLite table with flattened structure
     """
     try:
         # Sanitize table name
@@ -120,216 +395,292 @@ def convert_json_to_sqlite(json_content: bytes, table_name: str, db_path: str =
         if not data:
             raise ValueError("JSON array is empty")
         
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(data)
-        
-        # Clean column names
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
-        
-        # Connect to SQLite database
-        conn = sqlite3.connect(db_path)
-        
-        # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
-        
-        conn.close()
+        # Flatten each object into one table row
+        with get_connection(db_path) as conn:
+            try:
+                conn.execute("BEGIN")
+                loader = RecordTableLoader(conn, table_name)
+                
+                for item in data:
+                    loader.add(flatten_json_object(item))
+                
+                if not loader.finish():
+                    raise ValueError("JSON objects contain no fields")
+                
+                delete_column_stats(conn, table_name)
+                conn.commit()
+                column_stats = refresh_column_stats(conn, table_name, loader.row_count)
+                
+                table_info = describe_table(conn, table_name)
+            except Exception:
+                conn.rollback()
+                raise
         
         return {
             'table_name': table_name,
-            'schema': schema,
-            'row_count': row_count,
-            'sample_data': sample_data
+            'schema': table_info['schema'],
+            'row_count': loader.row_count,
+            'sample_data': table_info['sample_data'],
+            'column_stats': column_stats
         }
         
     except Exception as e:
         raise Exception(f"Error converting JSON to SQLite: {str(e)}")
 
-def flatten_json_object(obj: Any, prefix: str = "") -> Dict[str, Any]:
+def sqlite_type_for_value(value: Any) -> str:
     """
-    Flatten a nested JSON object using delimiter constants.
-    
-    Args:
-        obj: The object to flatten (can be dict, list, or primitive)
-        prefix: The current prefix for nested keys
-        
-    Returns:
-        Dict with flattened key-value pairs
+    Map a parsed JSON primitive to the SQLite column type used to store it
     """
-    result = {}
-    
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            new_key = f"{prefix}{NESTED_DELIMITER}{key}" if prefix else key
-            result.update(flatten_json_object(value, new_key))
-    elif isinstance(obj, list):
-        for i, value in enumerate(obj):
-            new_key = f"{prefix}{LIST_INDEX_DELIMITER}{i}"
-            result.update(flatten_json_object(value, new_key))
-    else:
-        # Primitive value (string, number, boolean, null)
-        result[prefix] = obj
-    
-    return result
+    if isinstance(value, (bool, int)):
+        return 'INTEGER'
+    if isinstance(value, float):
+        return 'REAL'
+    return 'TEXT'
+
+# Column types ordered from narrowest to widest
+COLUMN_TYPE_WIDTH = {'INTEGER': 0, 'REAL': 1, 'TEXT': 2}
 
-def discover_jsonl_fields(jsonl_content: bytes) -> Set[str]:
+class RecordTableLoader:
     """
-    Discover all possible field names by scanning the entire JSONL file.
+    Load flattened records into a SQLite table in a single pass.
     
-    Args:
-        jsonl_content: The raw JSONL file content
-        
-    Returns:
-        Set of all flattened field names found in the file
+    Columns are added with ALTER TABLE ADD COLUMN the first time a key shows
+    up with a non-null value, and rows are written in batches with
+    executemany(). Only the current batch is held in memory; a batch is
+    flushed before every schema change so all rows in it share one layout.
+    Keys that are only ever null are added as TEXT columns on finish().
+    
+    A column's type comes from its first value and widens from INTEGER to
+    REAL to TEXT as later values need it (e.g. 1 then 2.5). SQLite cannot
+    change a column's type in place, so finish() rebuilds the table once
+    when any column was widened.
     """
-    all_fields = set()
     
-    try:
-        content = jsonl_content.decode('utf-8')
-        lines = content.strip().split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
+    def __init__(self, conn: sqlite3.Connection, table_name: str, batch_size: int = INSERT_BATCH_SIZE):
+        self.conn = conn
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.row_count = 0
+        self._columns: Dict[str, int] = {}
+        self._column_types: List[str] = []
+        self._widened = False
+        self._key_columns: Dict[str, str] = {}
+        self._null_only_columns: Dict[str, None] = {}
+        self._table_created = False
+        self._leading_empty_rows = 0
+        self._insert_sql = ""
+        self._batch: List[List[Any]] = []
+        self._cursor = conn.cursor()
+        
+        execute_query_safely(
+            conn,
+            "DROP TABLE IF EXISTS {table}",
+            identifier_params={'table': table_name},
+            allow_ddl=True
+        )
+    
+    def _column_for_key(self, key: str) -> str:
+        column = self._key_columns.get(key)
+        if column is None:
+            column = clean_column_name(key)
+            self._key_columns[key] = column
+        return column
+    
+    def _add_columns(self, new_columns: Dict[str, str]) -> None:
+        self._flush()
+        
+        if not self._table_created:
+            column_defs = ", ".join(
+                f"{quote_column(column)} {column_type}"
+                for column, column_type in new_columns.items()
+            )
+            execute_query_safely(
+                self.conn,
+                f"CREATE TABLE {{table}} ({column_defs})",
+                identifier_params={'table': self.table_name},
+                allow_ddl=True
+            )
+            self._table_created = True
+            for _ in range(self._leading_empty_rows):
+                execute_query_safely(
+                    self.conn,
+                    "INSERT INTO {table} DEFAULT VALUES",
+                    identifier_params={'table': self.table_name}
+                )
+        else:
+            for column, column_type in new_columns.items():
+                execute_query_safely(
+                    self.conn,
+                    f"ALTER TABLE {{table}} ADD COLUMN {quote_column(column)} {column_type}",
+                    identifier_params={'table': self.table_name},
+                    allow_ddl=True
+                )
+        
+        for column, column_type in new_columns.items():
+            self._columns[column] = len(self._columns)
+            self._column_types.append(column_type)
+            self._null_only_columns.pop(column, None)
+        
+        quoted_columns = ", ".join(quote_column(column) for column in self._columns)
+        placeholders = ", ".join("?" for _ in self._columns)
+        self._insert_sql = (
+            f"INSERT INTO {escape_identifier(self.table_name)} "
+            f"({quoted_columns}) VALUES ({placeholders})"
+        )
+    
+    def _flush(self) -> None:
+        if self._batch:
+            self._cursor.executemany(self._insert_sql, self._batch)
+            self._batch.clear()
+    
+    def add(self, record: Dict[str, Any]) -> None:
+        """Append one flattened record, evolving the table schema as needed"""
+        new_columns = {}
+        for key, value in record.items():
+            column = self._column_for_key(key)
+            if column in self._columns or column in new_columns:
                 continue
-                
-            try:
-                json_obj = json.loads(line)
-                flattened = flatten_json_object(json_obj)
-                all_fields.update(flattened.keys())
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON on line {line_num}: {str(e)}")
-    except UnicodeDecodeError:
-        raise ValueError("File is not valid UTF-8 encoded text")
+            if value is None:
+                self._null_only_columns[column] = None
+            else:
+                new_columns[column] = sqlite_type_for_value(value)
+        
+        if new_columns:
+            self._add_columns(new_columns)
+        
+        self.row_count += 1
+        if not self._table_created:
+            self._leading_empty_rows += 1
+            return
+        
+        row = [None] * len(self._columns)
+        column_types = self._column_types
+        for key, value in record.items():
+            index = self._columns.get(self._column_for_key(key))
+            if index is None:
+                continue
+            row[index] = value
+            if value is not None and column_types[index] != 'TEXT':
+                value_type = sqlite_type_for_value(value)
+                if COLUMN_TYPE_WIDTH[value_type] > COLUMN_TYPE_WIDTH[column_types[index]]:
+                    column_types[index] = value_type
+                    self._widened = True
+        self._batch.append(row)
+        
+        if len(self._batch) >= self.batch_size:
+            self._flush()
     
-    return all_fields
+    def finish(self) -> List[str]:
+        """Flush buffered rows, add null-only columns and return the column list"""
+        null_only = {column: 'TEXT' for column in self._null_only_columns}
+        if null_only:
+            self._add_columns(null_only)
+        self._flush()
+        if self._widened:
+            self._rebuild()
+        return list(self._columns)
+    
+    def _rebuild(self) -> None:
+        """Copy the rows into a table declared with the widened column types"""
+        rebuilt = f"{INTERNAL_TABLE_PREFIX}rebuild_{self.table_name}"
+        identifiers = {'table': self.table_name, 'rebuilt': rebuilt}
+        column_defs = ", ".join(
+            f"{quote_column(column)} {column_type}"
+            for column, column_type in zip(self._columns, self._column_types)
+        )
+        for statement in (
+            "DROP TABLE IF EXISTS {rebuilt}",
+            f"CREATE TABLE {{rebuilt}} ({column_defs})",
+            "INSERT INTO {rebuilt} SELECT * FROM {table}",
+            "DROP TABLE {table}",
+            "ALTER TABLE {rebuilt} RENAME TO {table}"
+        ):
+            execute_query_safely(self.conn, statement, identifier_params=identifiers, allow_ddl=True)
+        self._widened = False
 
-def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str, db_path: str = "db/database.db") -> Dict[str, Any]:
+def convert_jsonl_stream_to_sqlite(
+    jsonl_stream: BinaryIO,
+    table_name: str,
+    db_path: Optional[str] = None,
+    chunk_size: int = UPLOAD_CHUNK_SIZE,
+    batch_size: int = INSERT_BATCH_SIZE
+) -> Dict[str, Any]:
     """
-    Convert JSONL file content to SQLite table with flattened structure.
+    Stream a JSONL file into a SQLite table with flattened structure in one pass.
+    
+    Each line is parsed and flattened exactly once; new flattened keys become
+    columns via ALTER TABLE ADD COLUMN as they appear and rows are inserted
+    in batches inside a single transaction.
     
     Args:
-        jsonl_content: The raw JSONL file content
+        jsonl_stream: Binary file-like object positioned at the start of the JSONL
         table_name: Name for the SQLite table
+        db_path: Path to the SQLite database
+        chunk_size: Bytes read from the stream per chunk
+        batch_size: Rows per executemany() call
         
     Returns:
-        Dict containing table info, schema, row count, and sample data
+        Dict containing table info, schema, row count, sample data and rows/sec
     """
     try:
+        start_time = time.perf_counter()
+        
         # Sanitize table name
         table_name = sanitize_table_name(table_name)
         
-        # First pass: discover all possible fields
-        all_fields = discover_jsonl_fields(jsonl_content)
-        
-        if not all_fields:
-            raise ValueError("No valid JSON objects found in JSONL file")
-        
-        # Second pass: process each line and create consistent records
-        content = jsonl_content.decode('utf-8')
-        lines = content.strip().split('\n')
-        
-        records = []
-        for line_num, line in enumerate(lines, 1):
-            line = line.strip()
-            if not line:
-                continue
-                
+        with get_connection(db_path) as conn:
             try:
-                json_obj = json.loads(line)
-                flattened = flatten_json_object(json_obj)
+                conn.execute("BEGIN")
+                loader = RecordTableLoader(conn, table_name, batch_size)
                 
-                # Create record with all fields, filling missing ones with None
-                record = {}
-                for field in all_fields:
-                    record[field] = flattened.get(field, None)
+                for line_num, line in enumerate(iter_text_lines(jsonl_stream, chunk_size), 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    
+                    try:
+                        json_obj = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON on line {line_num}: {str(e)}")
+                    
+                    loader.add(flatten_json_object(json_obj))
                 
-                records.append(record)
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON on line {line_num}: {str(e)}")
-        
-        if not records:
-            raise ValueError("No valid records found in JSONL file")
-        
-        # Convert to pandas DataFrame
-        df = pd.DataFrame(records)
-        
-        # Clean column names for SQLite compatibility
-        df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
-        
-        # Connect to SQLite database
-        conn = sqlite3.connect(db_path)
-        
-        # Write DataFrame to SQLite
-        df.to_sql(table_name, conn, if_exists='replace', index=False)
-        
-        # Get schema information using safe query execution
-        cursor_info = execute_query_safely(
-            conn,
-            "PRAGMA table_info({table})",
-            identifier_params={'table': table_name}
-        )
-        columns_info = cursor_info.fetchall()
-        
-        schema = {}
-        for col in columns_info:
-            schema[col[1]] = col[2]  # column_name: data_type
-        
-        # Get sample data using safe query execution
-        cursor_sample = execute_query_safely(
-            conn,
-            "SELECT * FROM {table} LIMIT 5",
-            identifier_params={'table': table_name}
-        )
-        sample_rows = cursor_sample.fetchall()
-        column_names = [col[1] for col in columns_info]
-        sample_data = [dict(zip(column_names, row)) for row in sample_rows]
-        
-        # Get row count using safe query execution
-        cursor_count = execute_query_safely(
-            conn,
-            "SELECT COUNT(*) FROM {table}",
-            identifier_params={'table': table_name}
-        )
-        row_count = cursor_count.fetchone()[0]
+                if not loader.finish():
+                    raise ValueError("No valid JSON objects found in JSONL file")
+                
+                delete_column_stats(conn, table_name)
+                conn.commit()
+                column_stats = refresh_column_stats(conn, table_name, loader.row_count)
+                
+                table_info = describe_table(conn, table_name)
+            except Exception:
+                conn.rollback()
+                raise
         
-        conn.close()
+        elapsed = time.perf_counter() - start_time
+        row_count = loader.row_count
         
         return {
             'table_name': table_name,
-            'schema': schema,
+            'schema': table_info['schema'],
             'row_count': row_count,
-            'sample_data': sample_data
+            'sample_data': table_info['sample_data'],
+            'rows_per_second': row_count / elapsed if elapsed > 0 else float(row_count),
+            'column_stats': column_stats
         }
         
     except Exception as e:
-        raise Exception(f"Error converting JSONL to SQLite: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Error converting JSONL to SQLite: {str(e)}")
+
+def convert_jsonl_to_sqlite(jsonl_content: bytes, table_name: str, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Convert JSONL file content to SQLite table with flattened structure.
+    
+    Args:
+        jsonl_content: The raw JSONL file content
+        table_name: Name for the SQLite table
+        
+    Returns:
+        Dict containing table info, schema, row count, and sample data
+    """
+    return convert_jsonl_stream_to_sqlite(io.BytesIO(jsonl_content), table_name, db_path)
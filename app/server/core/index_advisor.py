@@ -0,0 +1,407 @@
+"""
+Automatic index advisor for the Natural Language SQL Interface.
+
+Uploaded tables are created without indexes, so every WHERE, JOIN or
+ORDER BY in the generated SQL scans the whole table. The advisor tokenizes
+each query that runs through execute_sql_safely(), counts how often every
+table column appears in a WHERE/ON/USING predicate or a GROUP BY/ORDER BY,
+and once a column crosses INDEX_ADVISOR_MIN_USES it builds a single-column
+index in the background and runs ANALYZE so the planner has sqlite_stat1.
+
+Indexes it builds are named with INDEX_PREFIX so they can be listed and
+dropped without touching anything else. A dropped index is not rebuilt until
+the process restarts or its table is replaced.
+
+Settings are read from the environment:
+- INDEX_ADVISOR_ENABLED: record queries and build indexes (default true)
+- INDEX_ADVISOR_MIN_USES: uses of a column before it is indexed (default 5)
+- INDEX_ADVISOR_MIN_ROWS: smaller tables are never indexed (default 1000)
+- INDEX_ADVISOR_MAX_PER_TABLE: advisor indexes per table (default 5)
+"""
+
+import os
+import sqlite3
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .connection_pool import DATABASE_PATH, get_connection
+from .constants import INTERNAL_TABLE_PREFIX
+from .executors import get_executor
+from .sql_security import execute_query_safely, validate_identifier, SQLSecurityError
+from .sql_tokenizer import Token, tokenize_sql
+
+INDEX_ADVISOR_ENABLED = os.environ.get("INDEX_ADVISOR_ENABLED", "true").lower() in ("1", "true", "yes")
+INDEX_ADVISOR_MIN_USES = int(os.environ.get("INDEX_ADVISOR_MIN_USES", "5"))
+INDEX_ADVISOR_MIN_ROWS = int(os.environ.get("INDEX_ADVISOR_MIN_ROWS", "1000"))
+INDEX_ADVISOR_MAX_PER_TABLE = int(os.environ.get("INDEX_ADVISOR_MAX_PER_TABLE", "5"))
+
+INDEX_PREFIX = f"{INTERNAL_TABLE_PREFIX}idx_"
+
+# Keywords that switch which clause the following tokens belong to
+_PREDICATE_KEYWORDS = {'WHERE', 'ON', 'USING'}
+_TABLE_KEYWORDS = {'FROM', 'JOIN'}
+_OTHER_CLAUSE_KEYWORDS = {
+    'SELECT', 'HAVING', 'LIMIT', 'OFFSET', 'UNION', 'INTERSECT', 'EXCEPT',
+    'WINDOW', 'VALUES', 'SET', 'RETURNING'
+}
+
+ColumnRef = Tuple[Optional[str], str]
+
+
+def index_name(table_name: str, column_name: str) -> str:
+    """Name of the advisor index on one column"""
+    return f"{INDEX_PREFIX}{table_name}__{column_name}"
+
+
+def extract_column_references(sql_query: str) -> Tuple[Dict[str, str], List[ColumnRef]]:
+    """
+    Find the tables a query reads and the columns it filters, joins or sorts on.
+
+    Returns:
+        (tables, references): tables maps every alias and table name to its
+        table; references are (qualifier or None, column) pairs found in
+        WHERE/ON/USING predicates and GROUP BY/ORDER BY lists
+    """
+    tokens = tokenize_sql(sql_query)
+    tables: Dict[str, str] = {}
+    references: List[ColumnRef] = []
+
+    clause: Optional[str] = None
+    clause_stack: List[Optional[str]] = []
+    expect_table = False
+    last_table: Optional[str] = None
+
+    def is_name(token: Token) -> bool:
+        return token.kind == 'name'
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        following = tokens[i + 1] if i + 1 < len(tokens) else None
+
+        if token.kind == 'keyword':
+            if token.value in _TABLE_KEYWORDS:
+                clause, expect_table, last_table = 'from', True, None
+            elif token.value in _PREDICATE_KEYWORDS:
+                clause = 'predicate'
+            elif token.value in ('GROUP', 'ORDER') and following is not None and following.value == 'BY':
+                clause = 'order'
+                i += 1
+            elif token.value in _OTHER_CLAUSE_KEYWORDS:
+                clause = None
+        elif token.value == '(':
+            clause_stack.append(clause)
+            if following is not None and following.value in ('SELECT', 'WITH', 'VALUES'):
+                clause = None
+            expect_table = False
+        elif token.value == ')':
+            clause = clause_stack.pop() if clause_stack else None
+        elif clause == 'from':
+            if token.value == ',':
+                expect_table, last_table = True, None
+            elif is_name(token):
+                if following is not None and following.value == '.' and i + 2 < len(tokens):
+                    # schema.table: keep the table name
+                    i += 2
+                    token = tokens[i]
+                if expect_table:
+                    tables[token.value] = token.value
+                    expect_table, last_table = False, token.value
+                elif last_table is not None:
+                    tables[token.value] = last_table
+                    last_table = None
+        elif clause in ('predicate', 'order') and is_name(token):
+            if following is not None and following.value == '(':
+                # Function call
+                pass
+            elif following is not None and following.value == '.' and i + 2 < len(tokens) and is_name(tokens[i + 2]):
+                references.append((token.value, tokens[i + 2].value))
+                i += 2
+            else:
+                references.append((None, token.value))
+
+        i += 1
+
+    return tables, references
+
+
+class IndexAdvisor:
+    """Counts indexable column uses for one database and builds indexes for the hot ones."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        min_uses: int = INDEX_ADVISOR_MIN_USES,
+        min_rows: int = INDEX_ADVISOR_MIN_ROWS,
+        max_per_table: int = INDEX_ADVISOR_MAX_PER_TABLE,
+        background: bool = True
+    ):
+        self.db_path = db_path
+        self.min_uses = min_uses
+        self.min_rows = min_rows
+        self.max_per_table = max_per_table
+        self.background = background
+        self._lock = threading.Lock()
+        self._uses: Counter = Counter()
+        # Lower-cased table name -> (catalog name, {lower-cased column: column})
+        self._columns: Dict[str, Tuple[Optional[str], Dict[str, str]]] = {}
+        self._scheduled: Set[Tuple[str, str]] = set()
+        self._dismissed: Set[Tuple[str, str]] = set()
+        self.built_count = 0
+        self.last_error: Optional[str] = None
+
+    def _table_columns(self, table_name: str) -> Tuple[Optional[str], Dict[str, str]]:
+        """
+        The catalog name of a table and its columns, keyed by lower-cased name
+
+        SQLite matches table and column names case-insensitively, so the SQL
+        may spell them differently from the schema. Opens a connection on a
+        cache miss: never call it while holding the advisor lock.
+        """
+        key = table_name.lower()
+        with self._lock:
+            known = self._columns.get(key)
+        if known is None:
+            known = (None, {})
+            try:
+                validate_identifier(table_name, "table")
+                with get_connection(self.db_path, read_only=True) as conn:
+                    row = conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE",
+                        (table_name,)
+                    ).fetchone()
+                    if row is not None:
+                        cursor = execute_query_safely(
+                            conn,
+                            "PRAGMA table_info({table})",
+                            identifier_params={'table': row[0]}
+                        )
+                        known = (row[0], {info[1].lower(): info[1] for info in cursor.fetchall()})
+            except (SQLSecurityError, sqlite3.Error):
+                pass
+            with self._lock:
+                self._columns[key] = known
+        return known
+
+    def _resolve(self, tables: Dict[str, str], references: List[ColumnRef]) -> Set[Tuple[str, str]]:
+        """Map column references to (table, column) pairs named as in the catalog"""
+        schemas: Dict[str, Tuple[str, Dict[str, str]]] = {}
+        for table in set(tables.values()):
+            name, columns = self._table_columns(table)
+            if name is not None and not name.startswith(INTERNAL_TABLE_PREFIX):
+                schemas[table.lower()] = (name, columns)
+        aliases = {alias.lower(): table.lower() for alias, table in tables.items()}
+        query_tables = {name: columns for name, columns in schemas.values()}
+
+        resolved = set()
+        for qualifier, column in references:
+            if qualifier is not None:
+                schema = schemas.get(aliases.get(qualifier.lower(), ''))
+                candidates = [schema] if schema is not None else []
+            else:
+                candidates = list(query_tables.items())
+            matches = [
+                (name, columns[column.lower()]) for name, columns in candidates
+                if column.lower() in columns
+            ]
+            # Bare names that exist in several joined tables are ambiguous
+            if len(matches) == 1:
+                resolved.add(matches[0])
+        return resolved
+
+    def record(self, sql_query: str) -> None:
+        """
+        Count the indexable columns of a successfully executed query and
+        schedule index builds for columns that crossed the threshold.
+        Never raises: advice must not break the query that triggered it.
+        """
+        try:
+            tables, references = extract_column_references(sql_query)
+            if not references:
+                return
+
+            # Resolved before taking the lock: it may read the table schemas
+            keys = self._resolve(tables, references)
+            due = []
+            with self._lock:
+                for key in keys:
+                    self._uses[key] += 1
+                    if (
+                        self._uses[key] >= self.min_uses
+                        and key not in self._scheduled
+                        and key not in self._dismissed
+                    ):
+                        self._scheduled.add(key)
+                        due.append(key)
+
+            for table_name, column_name in due:
+                if self.background:
+                    get_executor("index_advisor", 1).submit(self.build_index, table_name, column_name)
+                else:
+                    self.build_index(table_name, column_name)
+        except Exception as e:
+            self.last_error = str(e)
+
+    def _indexed_columns(self, conn: sqlite3.Connection, table_name: str) -> Tuple[Set[str], int]:
+        """Leading columns of the table's existing indexes, and how many the advisor built"""
+        leading = set()
+        ours = 0
+        for row in execute_query_safely(conn, "PRAGMA index_list({table})", identifier_params={'table': table_name}).fetchall():
+            name = row[1]
+            if name.startswith(INDEX_PREFIX):
+                ours += 1
+            info = conn.execute("SELECT name FROM pragma_index_info(?) ORDER BY seqno LIMIT 1", (name,)).fetchone()
+            if info is not None and info[0] is not None:
+                leading.add(info[0])
+        return leading, ours
+
+    def build_index(self, table_name: str, column_name: str) -> bool:
+        """
+        Create the advisor index on one column and refresh the planner statistics
+
+        Returns:
+            True if an index was created; False if the table is too small,
+            the column is already the leading column of an index, or the
+            table has reached max_per_table advisor indexes
+        """
+        try:
+            with get_connection(self.db_path) as conn:
+                row_count = execute_query_safely(
+                    conn,
+                    "SELECT COUNT(*) FROM {table}",
+                    identifier_params={'table': table_name}
+                ).fetchone()[0]
+                if row_count < self.min_rows:
+                    return False
+
+                leading, ours = self._indexed_columns(conn, table_name)
+                if column_name in leading or ours >= self.max_per_table:
+                    return False
+
+                execute_query_safely(
+                    conn,
+                    "CREATE INDEX IF NOT EXISTS {index} ON {table} ({column})",
+                    identifier_params={
+                        'index': index_name(table_name, column_name),
+                        'table': table_name,
+                        'column': column_name
+                    },
+                    allow_ddl=True
+                )
+                execute_query_safely(conn, "ANALYZE {table}", identifier_params={'table': table_name})
+                conn.commit()
+
+            self.built_count += 1
+            self._refresh_catalog(table_name)
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            with self._lock:
+                # Allow a later attempt once the column is used again
+                self._scheduled.discard((table_name, column_name))
+            return False
+
+    def _refresh_catalog(self, table_name: str) -> None:
+        # Imported here: the schema catalog depends on sql_processor, which records through this module
+        from .schema_catalog import get_schema_catalog
+        get_schema_catalog(self.db_path).invalidate(table_name)
+
+    def list_indexes(self) -> List[Dict[str, Any]]:
+        """
+        List the indexes the advisor has built
+
+        Returns:
+            One dict per index with 'name', 'table_name', 'columns' and the
+            'uses' counted for its column since the process started
+        """
+        with get_connection(self.db_path, read_only=True) as conn:
+            rows = conn.execute(
+                "SELECT name, tbl_name FROM sqlite_master WHERE type = 'index' AND name GLOB ? ORDER BY tbl_name, name",
+                (INDEX_PREFIX + '*',)
+            ).fetchall()
+            indexes = []
+            for name, table_name in rows:
+                columns = [
+                    info[0] for info in
+                    conn.execute("SELECT name FROM pragma_index_info(?) ORDER BY seqno", (name,)).fetchall()
+                ]
+                uses = sum(self._uses.get((table_name, column), 0) for column in columns)
+                indexes.append({'name': name, 'table_name': table_name, 'columns': columns, 'uses': uses})
+        return indexes
+
+    def drop_index(self, name: str) -> bool:
+        """
+        Drop an advisor index; it is not rebuilt while this process runs
+
+        Returns:
+            False if no advisor index has that name
+        """
+        if not name.startswith(INDEX_PREFIX):
+            return False
+
+        with get_connection(self.db_path) as conn:
+            row = conn.execute(
+                "SELECT tbl_name FROM sqlite_master WHERE type = 'index' AND name = ?",
+                (name,)
+            ).fetchone()
+            if row is None:
+                return False
+            table_name = row[0]
+            columns = [info[0] for info in conn.execute("SELECT name FROM pragma_index_info(?)", (name,)).fetchall()]
+            execute_query_safely(conn, "DROP INDEX IF EXISTS {index}", identifier_params={'index': name}, allow_ddl=True)
+            conn.commit()
+
+        with self._lock:
+            for column in columns:
+                self._dismissed.add((table_name, column))
+        self._refresh_catalog(table_name)
+        return True
+
+    def forget_table(self, table_name: str) -> None:
+        """Reset what is known about a table that was replaced or dropped"""
+        table_key = table_name.lower()
+        with self._lock:
+            self._columns.pop(table_key, None)
+            for key_set in (self._scheduled, self._dismissed):
+                for key in [key for key in key_set if key[0].lower() == table_key]:
+                    key_set.discard(key)
+            for key in [key for key in self._uses if key[0].lower() == table_key]:
+                del self._uses[key]
+
+    def column_uses(self) -> Dict[Tuple[str, str], int]:
+        """Predicate and sort uses counted per (table, column) since startup"""
+        with self._lock:
+            return dict(self._uses)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                'tracked_columns': len(self._uses),
+                'indexes_built': self.built_count,
+                'last_error': self.last_error
+            }
+
+
+_advisors: Dict[str, IndexAdvisor] = {}
+_advisors_lock = threading.Lock()
+
+
+def get_index_advisor(db_path: Optional[str] = None) -> IndexAdvisor:
+    """Get the shared advisor for a database file, creating it on first use."""
+    path = os.path.abspath(db_path or DATABASE_PATH)
+    advisor = _advisors.get(path)
+    if advisor is None:
+        with _advisors_lock:
+            advisor = _advisors.get(path)
+            if advisor is None:
+                advisor = IndexAdvisor(path)
+                _advisors[path] = advisor
+    return advisor
+
+
+def record_query(sql_query: str, db_path: Optional[str] = None) -> None:
+    """Feed an executed query to the shared advisor unless it is disabled"""
+    if INDEX_ADVISOR_ENABLED:
+        get_index_advisor(db_path).record(sql_query)
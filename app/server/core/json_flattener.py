@@ -0,0 +1,118 @@
+"""
+Iterative flattening engine for nested JSON documents.
+
+Nested objects and arrays are flattened into a single level of column names
+using the delimiters from constants.py. The engine walks documents with an
+explicit stack of iterators instead of recursion, so arbitrarily deep
+documents cannot hit the recursion limit, and every leaf is written straight
+into one output dict instead of merging intermediate dicts at each level.
+
+Flattened key paths are cached per parent path. Records in an upload almost
+always share the same shape, so after the first record every key path is a
+dictionary lookup instead of a fresh string concatenation.
+"""
+
+from typing import Any, Dict, Optional
+
+from .constants import NESTED_DELIMITER, LIST_INDEX_DELIMITER
+
+# Upper bound on cached key paths before the cache is reset
+MAX_CACHED_KEY_PATHS = 100_000
+
+
+class JsonFlattener:
+    """Stack-based JSON flattener with a per-shape key path cache."""
+
+    def __init__(self, max_cached_paths: int = MAX_CACHED_KEY_PATHS):
+        self.max_cached_paths = max_cached_paths
+        self._object_paths: Dict[Any, Dict[Any, Any]] = {}
+        self._array_paths: Dict[Any, Dict[int, str]] = {}
+        self._cached_paths = 0
+
+    def clear_cache(self) -> None:
+        """Drop every cached key path."""
+        self._object_paths.clear()
+        self._array_paths.clear()
+        self._cached_paths = 0
+
+    def flatten(self, obj: Any, prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Flatten a nested JSON value into `out`.
+
+        Args:
+            obj: The object to flatten (can be dict, list, or primitive)
+            prefix: Key prefix for the top-level value
+            out: Optional dict to write into; a new one is created if omitted
+
+        Returns:
+            The output dict with flattened key-value pairs
+        """
+        if out is None:
+            out = {}
+
+        if isinstance(obj, dict):
+            stack = [(prefix, False, iter(obj.items()))]
+        elif isinstance(obj, list):
+            stack = [(prefix, True, enumerate(obj))]
+        else:
+            # Primitive value (string, number, boolean, null)
+            out[prefix] = obj
+            return out
+
+        while stack:
+            path, is_array, items = stack[-1]
+            if is_array:
+                children = self._array_paths.get(path)
+                if children is None:
+                    children = self._new_children(self._array_paths, path)
+            else:
+                children = self._object_paths.get(path)
+                if children is None:
+                    children = self._new_children(self._object_paths, path)
+
+            for key, value in items:
+                child_path = children.get(key)
+                if child_path is None:
+                    if is_array:
+                        child_path = f"{path}{LIST_INDEX_DELIMITER}{key}"
+                    else:
+                        child_path = f"{path}{NESTED_DELIMITER}{key}" if path else key
+                    children[key] = child_path
+                    self._cached_paths += 1
+
+                if isinstance(value, dict):
+                    stack.append((child_path, False, iter(value.items())))
+                    break
+                if isinstance(value, list):
+                    stack.append((child_path, True, enumerate(value)))
+                    break
+                out[child_path] = value
+            else:
+                stack.pop()
+
+        return out
+
+    def _new_children(self, cache: Dict[Any, Dict[Any, Any]], path: Any) -> Dict[Any, Any]:
+        if self._cached_paths >= self.max_cached_paths:
+            self.clear_cache()
+        children = {}
+        cache[path] = children
+        return children
+
+
+# Shared engine used by the upload paths
+_default_flattener = JsonFlattener()
+
+
+def flatten_json_object(obj: Any, prefix: str = "") -> Dict[str, Any]:
+    """
+    Flatten a nested JSON object using delimiter constants.
+
+    Args:
+        obj: The object to flatten (can be dict, list, or primitive)
+        prefix: The current prefix for nested keys
+
+    Returns:
+        Dict with flattened key-value pairs
+    """
+    return _default_flattener.flatten(obj, prefix)
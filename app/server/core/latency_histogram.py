@@ -0,0 +1,98 @@
+"""
+Fixed-memory latency histograms.
+
+Latencies are counted in log-spaced buckets (each about 19% wider than the
+last, from 10 ms to 5 minutes), so a histogram takes the same memory however
+many samples it sees and percentiles are accurate to within one bucket.
+Histograms are kept per name (e.g. per LLM provider) for the life of the
+process and reported by the metrics endpoint.
+"""
+
+import bisect
+import math
+import threading
+from typing import Dict, List, Optional
+
+MIN_LATENCY_SECONDS = 0.01
+MAX_LATENCY_SECONDS = 300.0
+BUCKET_GROWTH = 2 ** 0.25
+
+
+def _bucket_bounds() -> List[float]:
+    count = math.ceil(math.log(MAX_LATENCY_SECONDS / MIN_LATENCY_SECONDS, BUCKET_GROWTH))
+    return [MIN_LATENCY_SECONDS * BUCKET_GROWTH ** i for i in range(count + 1)]
+
+
+class LatencyHistogram:
+    """Thread-safe histogram of latencies in seconds."""
+
+    def __init__(self):
+        # Upper bound of each bucket; the last bucket holds everything slower
+        self.bounds = _bucket_bounds()
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    def record(self, seconds: float) -> None:
+        """Count one latency."""
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._count += 1
+            self._total += seconds
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Latency below which `percent` of the samples fall, as the upper bound
+        of the bucket holding it; None when nothing was recorded.
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            rank = max(1, math.ceil(self._count * percent / 100))
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return self.bounds[min(index, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+    def stats(self) -> Dict[str, Optional[float]]:
+        """Sample count, mean and percentiles for the metrics endpoint"""
+        with self._lock:
+            count, total = self._count, self._total
+        return {
+            'count': count,
+            'mean_seconds': total / count if count else None,
+            'p50_seconds': self.percentile(50),
+            'p95_seconds': self.percentile(95),
+            'p99_seconds': self.percentile(99),
+        }
+
+
+_histograms: Dict[str, LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_latency_histogram(name: str) -> LatencyHistogram:
+    """Get the shared histogram for `name`, creating it on first use."""
+    histogram = _histograms.get(name)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = LatencyHistogram()
+                _histograms[name] = histogram
+    return histogram
+
+
+def latency_stats() -> Dict[str, Dict[str, Optional[float]]]:
+    """Stats of every histogram, by name"""
+    with _histograms_lock:
+        histograms = dict(_histograms)
+    return {name: histogram.stats() for name, histogram in sorted(histograms.items())}
@@ -0,0 +1,83 @@
+"""
+Shared OpenAI and Anthropic clients.
+
+Creating an SDK client per request throws away its HTTP connection pool, so
+every LLM call paid for a fresh TCP and TLS handshake. Clients are instead
+created on first use, one per SDK client class and API key, and shared by
+every request; their keep-alive connections are reused across calls.
+
+Failed calls (connection errors, timeouts, 408/409/429 and 5xx responses)
+are retried by the SDKs with exponential backoff and random jitter, up to
+LLM_MAX_RETRIES times.
+
+Settings are read from the environment:
+- LLM_HTTP_MAX_CONNECTIONS: open connections per client (default
+  LLM_MAX_WORKERS)
+- LLM_HTTP_MAX_KEEPALIVE: idle connections kept per client (default 16)
+- LLM_HTTP_KEEPALIVE_SECONDS: how long idle connections are kept (default 60)
+- LLM_TIMEOUT_SECONDS: overall timeout per attempt (default 60)
+- LLM_CONNECT_TIMEOUT_SECONDS: timeout for opening a connection (default 5)
+- LLM_MAX_RETRIES: retries after a failed attempt (default 2)
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import httpx
+
+from .executors import LLM_MAX_WORKERS
+
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", str(LLM_MAX_WORKERS)))
+LLM_HTTP_MAX_KEEPALIVE = int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE", "16"))
+LLM_HTTP_KEEPALIVE_SECONDS = float(os.environ.get("LLM_HTTP_KEEPALIVE_SECONDS", "60"))
+LLM_TIMEOUT_SECONDS = float(os.environ.get("LLM_TIMEOUT_SECONDS", "60"))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("LLM_CONNECT_TIMEOUT_SECONDS", "5"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "2"))
+
+_clients: Dict[Tuple[Callable[..., Any], str], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def _create_client(client_class: Callable[..., Any], api_key: str) -> Any:
+    timeout = httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_HTTP_KEEPALIVE_SECONDS
+        ),
+        timeout=timeout,
+        follow_redirects=True
+    )
+    return client_class(
+        api_key=api_key,
+        timeout=timeout,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=http_client
+    )
+
+
+def get_llm_client(client_class: Callable[..., Any], api_key: str) -> Any:
+    """
+    Get the shared client for an SDK client class (OpenAI or Anthropic) and
+    API key, creating it on first use.
+    """
+    key = (client_class, api_key)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _create_client(client_class, api_key)
+                _clients[key] = client
+    return client
+
+
+def close_llm_clients() -> None:
+    """Close every shared client and its connections; they are recreated on next use."""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
@@ -0,0 +1,138 @@
+"""
+Hedged SQL generation across OpenAI and Anthropic.
+
+generate_sql() asks a single provider, so one slow response sets the
+request's latency. In hedged mode the request's provider is asked first and,
+if it has not produced valid SQL after the hedge delay, the other provider
+is asked too. The first response that passes validate_sql_query() wins; if
+the first provider fails or returns invalid SQL, the hedge is sent at once.
+
+The hedge delay defaults to a percentile of the first provider's recorded
+latency (see core.latency_histogram), so only its slow tail gets a second
+call. The losing call's result is discarded. The synchronous SDK call cannot
+be interrupted, so it finishes on the LLM pool (bounded by
+LLM_TIMEOUT_SECONDS) and still contributes a latency sample.
+
+Hedging needs both OPENAI_API_KEY and ANTHROPIC_API_KEY; with one key,
+requests go to that provider alone.
+
+Settings are read from the environment:
+- LLM_HEDGE_ENABLED: hedge SQL generation (default false)
+- LLM_HEDGE_DELAY_MS: fixed hedge delay, 0 asks both providers at once
+  (default: derived from latency percentiles)
+- LLM_HEDGE_PERCENTILE: latency percentile used as the delay (default 95)
+- LLM_HEDGE_MIN_SAMPLES: samples needed before the percentile is trusted
+  (default 20)
+- LLM_HEDGE_INITIAL_DELAY_MS: delay until then (default 2000)
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .data_models import QueryRequest
+from .admission import run_llm_admitted
+from .latency_histogram import get_latency_histogram
+from .llm_processor import generate_sql, generate_sql_with_provider, resolve_sql_provider
+from .sql_security import validate_sql_query
+
+LLM_HEDGE_ENABLED = os.environ.get("LLM_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+_hedge_delay_ms = os.environ.get("LLM_HEDGE_DELAY_MS", "")
+LLM_HEDGE_DELAY_SECONDS: Optional[float] = float(_hedge_delay_ms) / 1000 if _hedge_delay_ms else None
+LLM_HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_INITIAL_DELAY_SECONDS = float(os.environ.get("LLM_HEDGE_INITIAL_DELAY_MS", "2000")) / 1000
+
+PROVIDERS = ("openai", "anthropic")
+PROVIDER_KEYS = {"openai": "OPENAI_API_KEY", "anthropic": "ANTHROPIC_API_KEY"}
+
+
+class HedgeStats:
+    """Counters of hedged requests for the metrics endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedge_wins = 0
+
+    def record(self, hedged: bool, hedge_won: bool) -> None:
+        with self._lock:
+            self.requests += 1
+            self.hedges_sent += hedged
+            self.hedge_wins += hedge_won
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': LLM_HEDGE_ENABLED,
+                'requests': self.requests,
+                'hedges_sent': self.hedges_sent,
+                'hedge_wins': self.hedge_wins
+            }
+
+
+hedge_stats = HedgeStats()
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on `provider` before asking the other provider too"""
+    if LLM_HEDGE_DELAY_SECONDS is not None:
+        return LLM_HEDGE_DELAY_SECONDS
+    histogram = get_latency_histogram(f"llm.{provider}")
+    if histogram.count < LLM_HEDGE_MIN_SAMPLES:
+        return LLM_HEDGE_INITIAL_DELAY_SECONDS
+    return histogram.percentile(LLM_HEDGE_PERCENTILE)
+
+
+async def _generate_valid_sql(provider: str, request: QueryRequest, schema_info: Dict[str, Any]) -> str:
+    sql = await run_llm_admitted(provider, generate_sql_with_provider, provider, request.query, schema_info)
+    validate_sql_query(sql)
+    return sql
+
+
+def hedging_available() -> bool:
+    """Whether hedging is enabled and both providers have an API key"""
+    return LLM_HEDGE_ENABLED and all(os.environ.get(key) for key in PROVIDER_KEYS.values())
+
+
+async def generate_sql_hedged(request: QueryRequest, schema_info: Dict[str, Any]) -> str:
+    """
+    Generate SQL for a request, hedging across providers when
+    hedging_available(); otherwise the same as generate_sql().
+
+    Raises:
+        The first provider's error when neither provider produced valid SQL
+    """
+    if not hedging_available():
+        return await run_llm_admitted(resolve_sql_provider(request), generate_sql, request, schema_info)
+
+    primary = resolve_sql_provider(request)
+    secondary = next(provider for provider in PROVIDERS if provider != primary)
+    hedge_at = time.monotonic() + hedge_delay(primary)
+    tasks = {asyncio.create_task(_generate_valid_sql(primary, request, schema_info)): primary}
+    errors: Dict[str, BaseException] = {}
+    try:
+        while tasks:
+            hedged = secondary in tasks.values() or secondary in errors
+            timeout = None if hedged else max(0.0, hedge_at - time.monotonic())
+            done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                provider = tasks.pop(task)
+                try:
+                    sql = task.result()
+                except Exception as e:
+                    errors[provider] = e
+                    continue
+                hedge_stats.record(hedged=hedged, hedge_won=provider == secondary)
+                return sql
+            if not hedged:
+                tasks[asyncio.create_task(_generate_valid_sql(secondary, request, schema_info))] = secondary
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    hedge_stats.record(hedged=True, hedge_won=False)
+    raise errors[primary]
@@ -1,8 +1,13 @@
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 from openai import OpenAI
 from anthropic import Anthropic
 from core.data_models import QueryRequest
+from core.index_advisor import INDEX_ADVISOR_ENABLED, get_index_advisor
+from core.latency_histogram import get_latency_histogram
+from core.llm_clients import get_llm_client
+from core.schema_retrieval import select_schema_context
 
 def generate_sql_with_openai(query_text: str, schema_info: Dict[str, Any]) -> str:
     """
@@ -14,10 +19,10 @@ def generate_sql_with_openai(query_text: str, schema_info: Dict[str, Any]) -> st
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        client = OpenAI(api_key=api_key)
+        client = get_llm_client(OpenAI, api_key)
         
-        # Format schema for prompt
-        schema_description = format_schema_for_prompt(schema_info)
+        # Format the tables relevant to the question for the prompt
+        schema_description = format_schema_for_question(query_text, schema_info)
         
         # Create prompt
         prompt = f"""Given the following database schema:
@@ -75,10 +80,10 @@ def generate_sql_with_anthropic(query_text: str, schema_info: Dict[str, Any]) ->
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
-        client = Anthropic(api_key=api_key)
+        client = get_llm_client(Anthropic, api_key)
         
-        # Format schema for prompt
-        schema_description = format_schema_for_prompt(schema_info)
+        # Format the tables relevant to the question for the prompt
+        schema_description = format_schema_for_question(query_text, schema_info)
         
         # Create prompt
         prompt = f"""Given the following database schema:
@@ -125,9 +130,35 @@ SQL Query:"""
     except Exception as e:
         raise Exception(f"Error generating SQL with Anthropic: {str(e)}")
 
+def _prompt_value(value: Any) -> str:
+    text = repr(value) if isinstance(value, str) else str(value)
+    return text if len(text) <= 40 else text[:37] + "..."
+
+def format_column_hint(insight: Optional[Dict[str, Any]]) -> str:
+    """
+    Summarize a column's persisted statistics for the schema prompt, e.g.
+    "3 distinct, values like 'active', 'closed'" or "range 1 to 99, 4 nulls"
+    """
+    if not insight:
+        return ""
+    
+    parts = [f"{insight['unique_values']} distinct"]
+    if insight.get('min_value') is not None and insight.get('max_value') is not None:
+        parts.append(f"range {_prompt_value(insight['min_value'])} to {_prompt_value(insight['max_value'])}")
+    elif insight.get('most_common'):
+        # Example values tell the model how text is spelled and formatted
+        examples = ", ".join(_prompt_value(item['value']) for item in insight['most_common'][:3])
+        parts.append(f"values like {examples}")
+    if insight.get('null_count'):
+        parts.append(f"{insight['null_count']} nulls")
+    return ", ".join(parts)
+
 def format_schema_for_prompt(schema_info: Dict[str, Any]) -> str:
     """
     Format database schema for LLM prompt
+    
+    Columns with persisted statistics (see core.column_stats) get a short
+    hint with their cardinality, range or typical values.
     """
     lines = []
     
@@ -135,14 +166,27 @@ def format_schema_for_prompt(schema_info: Dict[str, Any]) -> str:
         lines.append(f"Table: {table_name}")
         lines.append("Columns:")
         
+        column_stats = table_info.get('column_stats', {}).get('columns', {})
         for col_name, col_type in table_info['columns'].items():
-            lines.append(f"  - {col_name} ({col_type})")
+            hint = format_column_hint(column_stats.get(col_name))
+            lines.append(f"  - {col_name} ({col_type}){': ' + hint if hint else ''}")
         
         lines.append(f"Row count: {table_info['row_count']}")
         lines.append("")
     
     return "\n".join(lines)
 
+def format_schema_for_question(query_text: str, schema_info: Dict[str, Any]) -> str:
+    """
+    Format the part of the schema relevant to a question for the LLM prompt
+    
+    On large databases only the best matching tables and columns are sent
+    (see core.schema_retrieval), ranked partly by how often past queries
+    used them.
+    """
+    column_uses = get_index_advisor().column_uses() if INDEX_ADVISOR_ENABLED else None
+    return format_schema_for_prompt(select_schema_context(query_text, schema_info, column_uses))
+
 def generate_random_query_with_openai(schema_info: Dict[str, Any]) -> str:
     """
     Generate a random natural language query using OpenAI API
@@ -153,7 +197,7 @@ def generate_random_query_with_openai(schema_info: Dict[str, Any]) -> str:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable not set")
         
-        client = OpenAI(api_key=api_key)
+        client = get_llm_client(OpenAI, api_key)
         
         # Format schema for prompt
         schema_description = format_schema_for_prompt(schema_info)
@@ -206,7 +250,7 @@ def generate_random_query_with_anthropic(schema_info: Dict[str, Any]) -> str:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable not set")
         
-        client = Anthropic(api_key=api_key)
+        client = get_llm_client(Anthropic, api_key)
         
         # Format schema for prompt
         schema_description = format_schema_for_prompt(schema_info)
@@ -248,38 +292,58 @@ Natural language query:"""
     except Exception as e:
         raise Exception(f"Error generating random query with Anthropic: {str(e)}")
 
-def generate_random_query(schema_info: Dict[str, Any]) -> str:
+def resolve_random_query_provider() -> Optional[str]:
     """
-    Route to appropriate LLM provider for random query generation
+    Decide which LLM provider generate_random_query() will use, if any.
     Priority: 1) OpenAI API key exists, 2) Anthropic API key exists
     """
-    openai_key = os.environ.get("OPENAI_API_KEY")
-    anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
-    
-    # Check API key availability (OpenAI priority)
-    if openai_key:
+    if os.environ.get("OPENAI_API_KEY"):
+        return "openai"
+    elif os.environ.get("ANTHROPIC_API_KEY"):
+        return "anthropic"
+    return None
+
+def generate_random_query(schema_info: Dict[str, Any]) -> str:
+    """
+    Route to appropriate LLM provider for random query generation.
+    See resolve_random_query_provider() for the routing rules.
+    """
+    provider = resolve_random_query_provider()
+    if provider == "openai":
         return generate_random_query_with_openai(schema_info)
-    elif anthropic_key:
+    elif provider == "anthropic":
         return generate_random_query_with_anthropic(schema_info)
     else:
         raise ValueError("No LLM API key found. Please set either OPENAI_API_KEY or ANTHROPIC_API_KEY")
 
-def generate_sql(request: QueryRequest, schema_info: Dict[str, Any]) -> str:
+def resolve_sql_provider(request: QueryRequest) -> str:
     """
-    Route to appropriate LLM provider based on API key availability and request preference.
+    Decide which LLM provider generate_sql() will use for a request.
     Priority: 1) OpenAI API key exists, 2) Anthropic API key exists, 3) request.llm_provider
     """
-    openai_key = os.environ.get("OPENAI_API_KEY")
-    anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
-    
     # Check API key availability first (OpenAI priority)
-    if openai_key:
-        return generate_sql_with_openai(request.query, schema_info)
-    elif anthropic_key:
-        return generate_sql_with_anthropic(request.query, schema_info)
+    if os.environ.get("OPENAI_API_KEY"):
+        return "openai"
+    elif os.environ.get("ANTHROPIC_API_KEY"):
+        return "anthropic"
     
     # Fall back to request preference if both keys available or neither available
-    if request.llm_provider == "openai":
-        return generate_sql_with_openai(request.query, schema_info)
-    else:
-        return generate_sql_with_anthropic(request.query, schema_info)
\ No newline at end of file
+    return "openai" if request.llm_provider == "openai" else "anthropic"
+
+def generate_sql_with_provider(provider: str, query_text: str, schema_info: Dict[str, Any]) -> str:
+    """
+    Generate SQL with the named provider ("openai" or "anthropic"), recording
+    the latency of successful calls in the provider's histogram
+    """
+    generate = generate_sql_with_openai if provider == "openai" else generate_sql_with_anthropic
+    start = time.perf_counter()
+    sql = generate(query_text, schema_info)
+    get_latency_histogram(f"llm.{provider}").record(time.perf_counter() - start)
+    return sql
+
+def generate_sql(request: QueryRequest, schema_info: Dict[str, Any]) -> str:
+    """
+    Route to appropriate LLM provider based on API key availability and request preference.
+    See resolve_sql_provider() for the routing rules.
+    """
+    return generate_sql_with_provider(resolve_sql_provider(request), request.query, schema_info)
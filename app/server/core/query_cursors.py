@@ -0,0 +1,174 @@
+"""
+Open SQLite cursors kept between the pages of a paginated query.
+
+Re-running a query for every page and skipping the rows already sent makes
+reading a result of n pages cost O(n^2) rows, and deep pages get slower and
+slower. Instead, /api/query/page keeps the statement of a query with more
+pages open on its connection, and the next page continues it with
+fetchmany() where the previous one stopped.
+
+An open cursor pins a read-only pooled connection and holds a read
+transaction, which keeps the WAL from being checkpointed past it. So only
+QUERY_CURSOR_MAX_OPEN cursors are kept (the least recently used is closed to
+make room) and each is closed after QUERY_CURSOR_IDLE_SECONDS without a page
+request. A continuation token whose cursor is gone still works: the query is
+re-run and the rows before the token's offset are skipped on the cursor.
+
+Settings are read from the environment:
+- QUERY_CURSOR_MAX_OPEN: cursors kept open at once (default 2, 0 disables)
+- QUERY_CURSOR_IDLE_SECONDS: idle time before a cursor is closed (default 60)
+"""
+
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Any, Callable, Dict, List, Optional
+
+QUERY_CURSOR_MAX_OPEN = int(os.environ.get("QUERY_CURSOR_MAX_OPEN", "2"))
+QUERY_CURSOR_IDLE_SECONDS = float(os.environ.get("QUERY_CURSOR_IDLE_SECONDS", "60"))
+
+
+class OpenCursor:
+    """A running statement, the connection it runs on and where it stopped."""
+
+    def __init__(self, sql_query: str, conn: sqlite3.Connection, resources: ExitStack):
+        self.sql_query = sql_query
+        self.conn = conn
+        self.cursor: Optional[sqlite3.Cursor] = None
+        self.offset = 0
+        # Row read past the end of the last page to learn whether there is more
+        self.pending: List[tuple] = []
+        self.last_used = 0.0
+        self._resources = resources
+
+    def execute(self) -> None:
+        self.cursor = self.conn.execute(self.sql_query)
+
+    @property
+    def columns(self) -> List[str]:
+        return [description[0] for description in self.cursor.description or []]
+
+    def skip(self, rows: int, batch_size: int) -> None:
+        """Step past `rows` rows without keeping them"""
+        while rows > 0:
+            batch = self.cursor.fetchmany(min(batch_size, rows))
+            if not batch:
+                break
+            rows -= len(batch)
+            self.offset += len(batch)
+
+    def fetch(self, page_size: int) -> List[tuple]:
+        """
+        Read the next page, plus one row more if there is one; the extra row
+        is kept for the next page
+        """
+        rows = self.pending + self.cursor.fetchmany(page_size + 1 - len(self.pending))
+        self.pending = rows[page_size:]
+        rows = rows[:page_size]
+        self.offset += len(rows)
+        return rows
+
+    def close(self) -> None:
+        """Finish the statement and give the connection back"""
+        try:
+            if self.cursor is not None:
+                self.cursor.close()
+        except sqlite3.Error:
+            pass
+        self._resources.close()
+
+
+class QueryCursorRegistry:
+    """Bounded set of open cursors, looked up by the id in a continuation token."""
+
+    def __init__(
+        self,
+        max_open: int = QUERY_CURSOR_MAX_OPEN,
+        idle_seconds: float = QUERY_CURSOR_IDLE_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_open = max_open
+        self.idle_seconds = idle_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cursors: "OrderedDict[str, OpenCursor]" = OrderedDict()
+        self.resumed = 0
+        self.evicted = 0
+
+    def _expire(self) -> List[OpenCursor]:
+        now = self._clock()
+        expired = [cursor_id for cursor_id, entry in self._cursors.items() if now - entry.last_used >= self.idle_seconds]
+        return [self._cursors.pop(cursor_id) for cursor_id in expired]
+
+    def take(self, cursor_id: Optional[str], sql_query: str, offset: int) -> Optional[OpenCursor]:
+        """
+        Remove and return the open cursor continuing `sql_query` at `offset`,
+        or None if it is gone; put() it back once the page is read
+        """
+        with self._lock:
+            stale = self._expire()
+            entry = self._cursors.get(cursor_id) if cursor_id else None
+            if entry is not None and (entry.sql_query != sql_query or entry.offset != offset):
+                # An earlier token for the same cursor, e.g. a retried page
+                entry = None
+            if entry is not None:
+                del self._cursors[cursor_id]
+                self.resumed += 1
+        for old in stale:
+            old.close()
+        return entry
+
+    def put(self, entry: OpenCursor, cursor_id: Optional[str] = None) -> Optional[str]:
+        """
+        Keep a cursor open for its next page
+
+        Returns:
+            The id to put in the continuation token, or None if cursors are
+            disabled and the entry was closed
+        """
+        if self.max_open <= 0:
+            entry.close()
+            return None
+        cursor_id = cursor_id or secrets.token_urlsafe(12)
+        entry.last_used = self._clock()
+        with self._lock:
+            closing = self._expire()
+            while len(self._cursors) >= self.max_open:
+                _, oldest = self._cursors.popitem(last=False)
+                closing.append(oldest)
+                self.evicted += 1
+            self._cursors[cursor_id] = entry
+        for old in closing:
+            old.close()
+        return cursor_id
+
+    def close(self) -> None:
+        """Close every open cursor, e.g. on application shutdown"""
+        with self._lock:
+            entries = list(self._cursors.values())
+            self._cursors.clear()
+        for entry in entries:
+            entry.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for tests and diagnostics"""
+        with self._lock:
+            return {'open': len(self._cursors), 'resumed': self.resumed, 'evicted': self.evicted}
+
+
+_registry: Optional[QueryCursorRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_query_cursors() -> QueryCursorRegistry:
+    """Get the shared registry of open query cursors, creating it on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = QueryCursorRegistry()
+    return _registry
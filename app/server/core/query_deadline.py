@@ -0,0 +1,121 @@
+"""
+Deadlines and cooperative cancellation for SQL execution.
+
+A QueryDeadline is created when a request arrives and handed down to the
+code that executes SQL. While a statement runs, SQLite calls a progress
+handler every QUERY_PROGRESS_INTERVAL virtual machine instructions; the
+handler aborts the statement once the deadline has passed or the request
+was cancelled. cancel() also calls Connection.interrupt(), which stops a
+running statement from another thread straight away, so a request whose
+client has gone away frees its worker and connection immediately.
+
+Time spent waiting for a worker counts against the deadline, so under load
+queries that could not have finished in time are dropped before they start.
+
+Settings are read from the environment (seconds; 0 disables the limit):
+- QUERY_TIMEOUT_SECONDS: POST /api/query (default 30)
+- QUERY_PAGE_TIMEOUT_SECONDS: POST /api/query/page, per page (default 30)
+- QUERY_STREAM_TIMEOUT_SECONDS: POST /api/query/stream, whole stream
+  (default 300)
+- QUERY_PROGRESS_INTERVAL: VM instructions between deadline checks
+  (default 10000)
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+QUERY_TIMEOUT_SECONDS = float(os.environ.get("QUERY_TIMEOUT_SECONDS", "30"))
+QUERY_PAGE_TIMEOUT_SECONDS = float(os.environ.get("QUERY_PAGE_TIMEOUT_SECONDS", "30"))
+QUERY_STREAM_TIMEOUT_SECONDS = float(os.environ.get("QUERY_STREAM_TIMEOUT_SECONDS", "300"))
+QUERY_PROGRESS_INTERVAL = int(os.environ.get("QUERY_PROGRESS_INTERVAL", "10000"))
+
+
+class QueryCancelled(Exception):
+    """The query was cancelled, e.g. because the client disconnected."""
+
+
+class QueryTimeout(QueryCancelled):
+    """The query ran past its deadline."""
+
+
+class QueryDeadline:
+    """
+    A time limit and cancellation flag shared by a request and the thread
+    executing its SQL.
+    """
+
+    def __init__(self, timeout_seconds: Optional[float] = None, clock=time.monotonic):
+        self.timeout_seconds = timeout_seconds or None
+        self._clock = clock
+        self._expires_at = clock() + timeout_seconds if timeout_seconds else None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def expired(self) -> bool:
+        return self._expires_at is not None and self._clock() >= self._expires_at
+
+    def should_stop(self) -> bool:
+        return self.cancelled or self.expired()
+
+    def check(self) -> None:
+        """
+        Raise if the query must not continue
+
+        Raises:
+            QueryCancelled: If cancel() was called
+            QueryTimeout: If the deadline has passed
+        """
+        if self.cancelled:
+            raise QueryCancelled("Query cancelled")
+        if self.expired():
+            raise QueryTimeout(f"Query exceeded the time limit of {self.timeout_seconds:g}s")
+
+    def cancel(self) -> None:
+        """Cancel the query and interrupt its statement if one is running (thread-safe)"""
+        self._cancelled.set()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.interrupt()
+
+    @contextmanager
+    def guard(self, conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+        """
+        Enforce the deadline on a connection for the duration of a with-block.
+
+        Statements aborted by the progress handler or by interrupt() raise
+        sqlite3.OperationalError("interrupted"), which is translated into
+        QueryTimeout or QueryCancelled.
+        """
+        self.check()
+        conn.set_progress_handler(lambda: 1 if self.should_stop() else 0, QUERY_PROGRESS_INTERVAL)
+        with self._lock:
+            self._conn = conn
+        try:
+            yield conn
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e) and self.should_stop():
+                self.check()
+            raise
+        finally:
+            with self._lock:
+                self._conn = None
+            conn.set_progress_handler(None, 0)
+
+
+@contextmanager
+def deadline_guard(conn: sqlite3.Connection, deadline: Optional[QueryDeadline]) -> Iterator[sqlite3.Connection]:
+    """deadline.guard(conn), or nothing when there is no deadline"""
+    if deadline is None:
+        yield conn
+        return
+    with deadline.guard(conn):
+        yield conn
@@ -0,0 +1,331 @@
+"""
+Pre-execution cost guard for generated SQL.
+
+Before a query runs, EXPLAIN QUERY PLAN shows how SQLite will execute it:
+which tables it scans in full, which it searches through an index, and how
+the loops nest. Combined with the catalog's row counts (and the column
+statistics stored at ingestion, for equality selectivity), this gives a
+rough estimate of how many rows the query will visit and return, without
+running it.
+
+The estimate is deliberately pessimistic: WHERE filters that cannot use an
+index are assumed to keep every row, so an accidental cartesian join costs
+the product of its tables' sizes. Based on the budgets below, a query is
+- rejected when it would visit more than QUERY_COST_MAX_ROWS rows
+- rewritten with a LIMIT when it has none and would return more than
+  QUERY_AUTO_LIMIT rows
+- sent to the low-priority database executor when it would visit more
+  than QUERY_COST_LOW_PRIORITY_ROWS rows, so it cannot occupy the workers
+  that serve cheap queries
+
+Settings are read from the environment:
+- QUERY_COST_MAX_ROWS: rows visited above which queries are rejected
+  (default 100000000; 0 disables)
+- QUERY_COST_LOW_PRIORITY_ROWS: rows visited above which queries run on the
+  low-priority executor (default 1000000; 0 disables)
+- QUERY_AUTO_LIMIT: LIMIT added to unbounded queries returning more rows
+  (default 10000; 0 disables)
+- QUERY_COST_UNKNOWN_ROWS: row count assumed for tables the catalog does not
+  know (default 1000)
+"""
+
+import math
+import os
+import re
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .connection_pool import get_connection
+from .index_advisor import extract_column_references
+from .sql_processor import strip_trailing_semicolons
+from .sql_security import ParsedStatement, parse_sql_query, SQLSecurityError
+from .sql_tokenizer import Token, tokenize_sql
+
+QUERY_COST_MAX_ROWS = int(os.environ.get("QUERY_COST_MAX_ROWS", "100000000"))
+QUERY_COST_LOW_PRIORITY_ROWS = int(os.environ.get("QUERY_COST_LOW_PRIORITY_ROWS", "1000000"))
+QUERY_AUTO_LIMIT = int(os.environ.get("QUERY_AUTO_LIMIT", "10000"))
+QUERY_COST_UNKNOWN_ROWS = int(os.environ.get("QUERY_COST_UNKNOWN_ROWS", "1000"))
+
+# Rows SQLite itself assumes an equality or range constraint on an index
+# matches when it has no statistics
+DEFAULT_EQUALITY_ROWS = 10
+RANGE_SELECTIVITY = 0.25
+
+AGGREGATE_FUNCTIONS = {'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'TOTAL', 'GROUP_CONCAT', 'STRING_AGG'}
+
+_STEP_PATTERN = re.compile(
+    r"^(?P<op>SCAN|SEARCH) (?P<name>\S+)(?: AS \S+)?"
+    r"(?: USING (?P<using>.*?))?(?: \((?P<constraint>[^()]*)\))?$"
+)
+_NESTED_SUBQUERY_PATTERN = re.compile(r"^(?:LIST|SCALAR) SUBQUERY")
+_MATERIALIZE_PATTERN = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (?P<name>\S+)")
+
+
+@dataclass
+class QueryPlanEstimate:
+    """Rough cost of a query derived from its plan"""
+    rows_visited: float
+    rows_returned: float
+    full_scans: List[str]
+    plan: List[str]
+
+
+@dataclass
+class CostDecision:
+    """What the cost guard decided to do with a query"""
+    action: str  # "run", "limit" or "reject"
+    sql: str
+    low_priority: bool = False
+    row_limit: Optional[int] = None  # Set when action is "limit"
+    estimate: Optional[QueryPlanEstimate] = None
+    reason: Optional[str] = None
+
+
+class _PlanCoster:
+    """Walks the EXPLAIN QUERY PLAN tree and estimates rows visited and returned."""
+
+    def __init__(self, plan_rows: List[tuple], schema_info: Dict[str, Any], aliases: Dict[str, str]):
+        self.children: Dict[int, List[Tuple[int, str]]] = {}
+        for node_id, parent_id, _, detail in plan_rows:
+            self.children.setdefault(parent_id, []).append((node_id, detail))
+        self.tables = schema_info.get('tables', {})
+        self.aliases = aliases
+        self.materialized: Dict[str, float] = {}
+        self.full_scans: List[str] = []
+
+    def _table(self, name: str) -> Optional[str]:
+        table = self.aliases.get(name, name)
+        return table if table in self.tables else None
+
+    def _rows(self, name: str) -> float:
+        if name in self.materialized:
+            return self.materialized[name]
+        table = self._table(name)
+        if table is None:
+            target = self.aliases.get(name, name)
+            return self.materialized.get(target, float(QUERY_COST_UNKNOWN_ROWS))
+        return float(max(self.tables[table].get('row_count', 0), 1))
+
+    def _lookup_rows(self, name: str, constraint: str, rows: float) -> float:
+        """Rows one index lookup is expected to match"""
+        table = self._table(name)
+        stats = self.tables[table].get('column_stats', {}).get('columns', {}) if table else {}
+        matched = rows
+        for term in constraint.split(' AND '):
+            if '=' in term and '<' not in term and '>' not in term:
+                distinct = stats.get(term.split('=')[0].strip(), {}).get('unique_values')
+                matched = matched / distinct if distinct else min(matched, DEFAULT_EQUALITY_ROWS)
+            else:
+                matched *= RANGE_SELECTIVITY
+        return max(matched, 1.0)
+
+    def _step_cost(self, detail: str) -> Tuple[float, float, float]:
+        """(one-off rows visited, rows visited per outer row, rows produced per outer row)"""
+        match = _STEP_PATTERN.match(detail)
+        if match is None:
+            # e.g. SCAN CONSTANT ROW
+            return 0.0, 0.0, 1.0
+        name = match.group('name')
+        rows = self._rows(name)
+        using = match.group('using') or ''
+        constraint = match.group('constraint') or ''
+
+        if match.group('op') == 'SCAN':
+            self.full_scans.append(self.aliases.get(name, name))
+            return 0.0, rows, rows
+        if 'PRIMARY KEY' in using and '=' in constraint and '<' not in constraint and '>' not in constraint:
+            return 0.0, 1.0, 1.0
+        # SQLite builds an automatic index over the whole table before searching it
+        one_off = rows if 'AUTOMATIC' in using else 0.0
+        matched = self._lookup_rows(name, constraint, rows)
+        return one_off, math.log2(rows + 1) + matched, matched
+
+    def estimate(self, parent_id: int = 0) -> Tuple[float, float]:
+        """
+        Estimate (rows visited, rows produced) under one plan node.
+
+        Sibling SCAN/SEARCH steps are nested loops, so each one runs once per
+        row produced by the steps before it.
+        """
+        visited = 0.0
+        outer = 1.0
+        has_steps = False
+        member_rows = 0.0
+        for node_id, detail in self.children.get(parent_id, []):
+            if detail.startswith(('SCAN ', 'SEARCH ')):
+                has_steps = True
+                one_off, per_outer, produced = self._step_cost(detail)
+                visited += one_off + outer * per_outer
+                outer *= produced
+                continue
+
+            inner_visited, inner_rows = self.estimate(node_id)
+            materialize = _MATERIALIZE_PATTERN.match(detail)
+            if materialize:
+                visited += inner_visited
+                self.materialized[materialize.group('name')] = max(inner_rows, 1.0)
+            elif detail.startswith('CORRELATED '):
+                visited += outer * inner_visited
+            elif detail.startswith('USE TEMP B-TREE'):
+                # Sorting or grouping touches every row produced so far
+                visited += outer
+                if detail.endswith('GROUP BY'):
+                    # Assume n rows fall into about sqrt(n) groups
+                    outer = math.sqrt(outer)
+            else:
+                # Compound query members and uncorrelated subqueries run once
+                visited += inner_visited
+                if not _NESTED_SUBQUERY_PATTERN.match(detail):
+                    member_rows += inner_rows
+        return visited, (outer if has_steps else max(member_rows, 1.0))
+
+
+def explain_query_plan(conn: sqlite3.Connection, sql_query: str) -> List[tuple]:
+    """Return the (id, parent, notused, detail) rows of EXPLAIN QUERY PLAN"""
+    return conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
+
+
+def estimate_query_cost(conn: sqlite3.Connection, sql_query: str, schema_info: Dict[str, Any]) -> QueryPlanEstimate:
+    """
+    Estimate how many rows a query will visit and return from its plan
+
+    Args:
+        conn: Connection to plan on; nothing is executed
+        sql_query: A validated query
+        schema_info: Catalog schema with row counts and optional column_stats
+    """
+    plan_rows = explain_query_plan(conn, strip_trailing_semicolons(sql_query))
+    aliases, _ = extract_column_references(sql_query)
+    coster = _PlanCoster(plan_rows, schema_info, aliases)
+    visited, returned = coster.estimate()
+    if is_single_row_aggregate(sql_query):
+        returned = 1.0
+    return QueryPlanEstimate(
+        rows_visited=visited,
+        rows_returned=returned,
+        full_scans=coster.full_scans,
+        plan=[row[3] for row in plan_rows]
+    )
+
+
+def _top_level_tokens(sql_query: str) -> List[Token]:
+    """Tokens of the outermost statement, outside any parentheses"""
+    depth = 0
+    tokens = []
+    for token in tokenize_sql(sql_query):
+        if token.value == '(':
+            depth += 1
+        elif token.value == ')':
+            depth -= 1
+        elif depth == 0:
+            tokens.append(token)
+    return tokens
+
+def has_top_level_limit(sql_query: str) -> bool:
+    """Whether the outermost statement already has a LIMIT clause"""
+    return any(token.kind == 'keyword' and token.value == 'LIMIT' for token in _top_level_tokens(sql_query))
+
+def add_top_level_limit(sql_query: str, limit: int) -> str:
+    """
+    Append LIMIT to the outermost statement, which keeps its column names and
+    ORDER BY; a statement ending in VALUES cannot take one and is wrapped in
+    a subquery instead
+    """
+    sql_query = strip_trailing_semicolons(sql_query)
+    cores = [
+        token.value for token in _top_level_tokens(sql_query)
+        if token.kind == 'keyword' and token.value in ('SELECT', 'VALUES')
+    ]
+    if cores and cores[-1] == 'SELECT':
+        return f"{sql_query} LIMIT {limit}"
+    return f"SELECT * FROM ({sql_query}) LIMIT {limit}"
+
+def is_single_row_aggregate(sql_query: str) -> bool:
+    """Whether the outermost statement aggregates without GROUP BY, so it returns one row"""
+    tokens = tokenize_sql(sql_query)
+    if not tokens or tokens[0].value != 'SELECT':
+        return False
+    top_level = _top_level_tokens(sql_query)
+    keywords = {token.value for token in top_level if token.kind == 'keyword'}
+    if keywords & {'GROUP', 'UNION', 'INTERSECT', 'EXCEPT', 'WINDOW', 'OVER'}:
+        return False
+    # Aggregate calls in the select list (the '(' itself is not a top-level token)
+    depth = 0
+    for token, following in zip(tokens, tokens[1:]):
+        if token.value == '(':
+            depth += 1
+        elif token.value == ')':
+            depth -= 1
+        elif depth == 0 and token.kind == 'keyword' and token.value == 'FROM':
+            break
+        elif depth == 0 and following.value == '(' and token.value.upper() in AGGREGATE_FUNCTIONS:
+            return True
+    return False
+
+
+def guard_query_cost(
+    conn: sqlite3.Connection,
+    sql_query: str,
+    schema_info: Dict[str, Any],
+    statement: Optional[ParsedStatement] = None
+) -> CostDecision:
+    """
+    Decide whether and how a validated query may run, based on its plan.
+
+    Queries SQLite cannot plan (syntax errors, unknown tables) are passed
+    through so execution reports the real error. `statement` is the query
+    as parse_sql_query() returned it, when the caller already parsed it.
+    """
+    if statement is None:
+        statement = parse_sql_query(sql_query)
+    try:
+        estimate = estimate_query_cost(conn, sql_query, schema_info)
+    except (sqlite3.Error, sqlite3.Warning):
+        return CostDecision(action="run", sql=sql_query)
+
+    if QUERY_COST_MAX_ROWS and estimate.rows_visited > QUERY_COST_MAX_ROWS:
+        scans = f" (full scans of: {', '.join(estimate.full_scans)})" if estimate.full_scans else ""
+        return CostDecision(
+            action="reject",
+            sql=sql_query,
+            estimate=estimate,
+            reason=(
+                f"Query rejected by cost guard: it would read about {estimate.rows_visited:,.0f} rows{scans}, "
+                f"over the budget of {QUERY_COST_MAX_ROWS:,}. Try adding filters or join conditions."
+            )
+        )
+
+    low_priority = bool(QUERY_COST_LOW_PRIORITY_ROWS) and estimate.rows_visited > QUERY_COST_LOW_PRIORITY_ROWS
+
+    if (
+        QUERY_AUTO_LIMIT
+        and estimate.rows_returned > QUERY_AUTO_LIMIT
+        and statement.is_select
+        and not has_top_level_limit(sql_query)
+    ):
+        return CostDecision(
+            action="limit",
+            sql=add_top_level_limit(sql_query, QUERY_AUTO_LIMIT),
+            low_priority=low_priority,
+            row_limit=QUERY_AUTO_LIMIT,
+            estimate=estimate,
+            reason=f"Result limited to {QUERY_AUTO_LIMIT:,} rows by cost guard"
+        )
+
+    return CostDecision(action="run", sql=sql_query, low_priority=low_priority, estimate=estimate)
+
+
+def check_query_cost(sql_query: str, schema_info: Dict[str, Any]) -> CostDecision:
+    """
+    Plan a query on a pooled read-only connection and apply the cost guard
+    (blocking; run through run_db)
+    """
+    try:
+        statement = parse_sql_query(sql_query)
+    except SQLSecurityError:
+        # Execution reports the security error
+        return CostDecision(action="run", sql=sql_query)
+    
+    with get_connection(read_only=True) as conn:
+        return guard_query_cost(conn, sql_query, schema_info, statement)
@@ -0,0 +1,296 @@
+"""
+Cache for the results of executed SQL.
+
+Users and dashboards re-run the same SQL against tables that have not
+changed. Rather than planning and executing it again, the outcome of the
+last run is returned from memory.
+
+Entries are keyed on:
+- the SQL, normalized through the tokenizer (whitespace and keyword case
+  folded, comments dropped)
+- the result variant (rows or columnar)
+- the data version of every table the SQL mentions
+
+Each table's data version is bumped when it is uploaded or deleted, so a
+change to one table only invalidates results that read it. Statements that
+read the schema itself (PRAGMA, sqlite_master) depend on every table.
+Changes made to the database behind the server's back are not seen.
+
+The in-memory tier is an LRU bounded by the total size of the cached
+results (measured as their JSON encoding). An optional SQLite file adds a
+persistent tier, with its own size budget, that survives restarts; the data
+versions are stored alongside it so entries stay valid across restarts.
+
+Settings are read from the environment:
+- RESULT_CACHE_MAX_BYTES: in-memory budget (default 67108864, 0 disables
+  caching)
+- RESULT_CACHE_MAX_ENTRY_BYTES: results larger than this are not cached
+  (default 8388608)
+- RESULT_CACHE_PATH: SQLite file for the persistent tier (default: disabled)
+- RESULT_CACHE_DISK_MAX_BYTES: persistent tier budget (default 1073741824)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from .sql_security import SQLSecurityError, parse_sql_query
+
+RESULT_CACHE_MAX_BYTES = int(os.environ.get("RESULT_CACHE_MAX_BYTES", str(64 * 2**20)))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.environ.get("RESULT_CACHE_MAX_ENTRY_BYTES", str(8 * 2**20)))
+RESULT_CACHE_PATH = os.environ.get("RESULT_CACHE_PATH", "")
+RESULT_CACHE_DISK_MAX_BYTES = int(os.environ.get("RESULT_CACHE_DISK_MAX_BYTES", str(2**30)))
+
+# Pseudo-table for statements that depend on the whole schema; bumped
+# whenever any table changes
+ALL_TABLES = "*"
+
+
+def normalize_sql(sql_query: str) -> Tuple[str, FrozenSet[str]]:
+    """
+    Normalize SQL for use in a cache key and find the tables it may read.
+
+    Names are kept as written, since they become the result's column names.
+    Any name matching a table counts as a read of that table; a column that
+    shares a table's name only makes invalidation more eager.
+
+    Raises:
+        SQLSecurityError: If the SQL fails validation
+    """
+    statement = parse_sql_query(sql_query)
+    parts = []
+    names = set()
+    for token in statement.tokens:
+        parts.append(f"{token.kind[0]}{token.value}")
+        if token.kind == 'name':
+            names.add(token.value.lower())
+    if statement.statement_type == 'PRAGMA' or any(name.startswith('sqlite_') for name in names):
+        names.add(ALL_TABLES)
+    return "\x1f".join(parts), frozenset(names)
+
+
+class ResultCache:
+    """Size-bounded LRU cache of SQL results with an optional SQLite-backed tier."""
+
+    def __init__(
+        self,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        max_entry_bytes: int = RESULT_CACHE_MAX_ENTRY_BYTES,
+        persist_path: Optional[str] = None,
+        disk_max_bytes: int = RESULT_CACHE_DISK_MAX_BYTES,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.persist_path = persist_path
+        self.disk_max_bytes = disk_max_bytes
+        self._clock = clock
+        # key -> (result, size in bytes, tables read)
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], int, FrozenSet[str]]]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+        if persist_path:
+            directory = os.path.dirname(persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(persist_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS query_results ("
+                "cache_key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, "
+                "tables TEXT NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS table_versions ("
+                "table_name TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+            self._versions = dict(self._conn.execute("SELECT table_name, version FROM table_versions").fetchall())
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def make_key(self, sql_query: str, variant: str = "rows") -> Tuple[Optional[str], FrozenSet[str]]:
+        """
+        Build the cache key for SQL at the current data versions.
+
+        Returns:
+            The key and the tables it depends on; the key is None for SQL
+            that cannot be cached (caching disabled or SQL fails validation)
+        """
+        if not self.enabled:
+            return None, frozenset()
+        try:
+            normalized, tables = normalize_sql(sql_query)
+        except SQLSecurityError:
+            return None, frozenset()
+        with self._lock:
+            versions = sorted((table, self._versions.get(table, 0)) for table in tables)
+        raw = json.dumps([normalized, variant, versions])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest(), tables
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(entry[0])
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT result, size, tables FROM query_results WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    payload, size, tables = row
+                    result = json.loads(payload)
+                    self._conn.execute(
+                        "UPDATE query_results SET accessed_at = ? WHERE cache_key = ?",
+                        (self._clock(), key)
+                    )
+                    self._conn.commit()
+                    self._store(key, result, size, frozenset(json.loads(tables)))
+                    self.hits += 1
+                    self.persistent_hits += 1
+                    return dict(result)
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, result: Dict[str, Any], tables: Iterable[str]) -> None:
+        """
+        Cache a result (any JSON-serializable dict) under `key`, recording the
+        tables it read; results over the entry size limit are skipped.
+        """
+        if not self.enabled:
+            return
+
+        payload = json.dumps(result, default=str)
+        size = len(payload)
+        if size > self.max_entry_bytes:
+            return
+        # JSON round trip so memory and disk hits return the same values
+        result = json.loads(payload)
+        tables = frozenset(tables)
+        with self._lock:
+            self._store(key, result, size, tables)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO query_results (cache_key, result, size, tables, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, payload, size, json.dumps(sorted(tables)), self._clock())
+                )
+                self._trim_disk()
+                self._conn.commit()
+
+    def _store(self, key: str, result: Dict[str, Any], size: int, tables: FrozenSet[str]) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._size -= previous[1]
+        self._entries[key] = (result, size, tables)
+        self._size += size
+        while self._size > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._size -= evicted_size
+            self.evictions += 1
+
+    def _trim_disk(self) -> None:
+        """Drop least recently used persistent entries until the tier fits its budget."""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM query_results").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT cache_key, size FROM query_results ORDER BY accessed_at"
+        ).fetchall():
+            self._conn.execute("DELETE FROM query_results WHERE cache_key = ?", (key,))
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+    def bump_table(self, table_name: str) -> None:
+        """
+        Record that a table's data changed, dropping every result that read it
+        (and every result that read the schema).
+        """
+        changed = {table_name.lower(), ALL_TABLES}
+        with self._lock:
+            for table in changed:
+                self._versions[table] = self._versions.get(table, 0) + 1
+            stale = [key for key, (_, _, tables) in self._entries.items() if tables & changed]
+            for key in stale:
+                self._size -= self._entries.pop(key)[1]
+            self.invalidations += len(stale)
+            if self._conn is not None:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO table_versions (table_name, version) VALUES (?, ?)",
+                    [(table, self._versions[table]) for table in changed]
+                )
+                self._conn.executemany(
+                    "DELETE FROM query_results WHERE EXISTS "
+                    "(SELECT 1 FROM json_each(query_results.tables) WHERE value = ?)",
+                    [(table,) for table in changed]
+                )
+                self._conn.commit()
+
+    def clear(self) -> None:
+        """Drop every cached result from both tiers (data versions are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM query_results")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the metrics endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'persistent_hits': self.persistent_hits,
+                'size_bytes': self._size
+            }
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_result_cache: Optional[ResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Get the process-wide result cache, creating it on first use."""
+    global _result_cache
+    if _result_cache is None:
+        with _result_cache_lock:
+            if _result_cache is None:
+                _result_cache = ResultCache(persist_path=RESULT_CACHE_PATH or None)
+    return _result_cache
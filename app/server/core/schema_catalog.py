@@ -0,0 +1,181 @@
+"""
+In-process catalog of the database schema.
+
+get_database_schema() runs PRAGMA table_info and a full COUNT(*) per table,
+which is far too expensive to repeat on every natural language query. The
+catalog builds that information once and then keeps it current:
+- uploads register the new table with the columns, row count and column
+  statistics the ingestion already computed, so no rescan is needed
+- deletes drop the table's entry
+- other DDL paths call invalidate() for one table or the whole catalog,
+  which keeps the table's known row count instead of recounting it
+- PRAGMA data_version on a dedicated connection detects commits made by
+  anything else (another process, a shell), which triggers a full rebuild
+
+After each explicit update the catalog re-reads data_version, so its own
+application's writes do not trigger a rebuild. A foreign commit that lands
+in that window is only picked up by the next change or invalidate().
+"""
+
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Optional
+
+from .column_stats import read_column_stats
+from .connection_pool import DATABASE_PATH, is_memory_database, open_connection
+from .sql_processor import read_database_schema, read_table_schema
+
+
+class SchemaCatalog:
+    """Cached, explicitly invalidated schema of one SQLite database."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._tables: Optional[Dict[str, Dict[str, Any]]] = None
+        self._data_version: Optional[int] = None
+        self.rebuild_count = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = open_connection(self.db_path, read_only=True)
+        return self._conn
+
+    def _read_data_version(self) -> int:
+        return self._connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def _rebuild(self) -> None:
+        conn = self._connection()
+        data_version = self._read_data_version()
+        tables = read_database_schema(conn)['tables']
+        for table_name, table_stats in read_column_stats(conn).items():
+            if table_name in tables:
+                tables[table_name]['column_stats'] = table_stats
+        self._tables = tables
+        self._data_version = data_version
+        self.rebuild_count += 1
+
+    def _acknowledge_writes(self) -> None:
+        if self._tables is not None:
+            self._data_version = self._read_data_version()
+
+    def get_schema(self) -> Dict[str, Any]:
+        """
+        Get the database schema in the same shape as get_database_schema().
+
+        Returns:
+            Dict with a 'tables' mapping of table name to 'columns',
+            'row_count' and, for tables ingested with statistics,
+            'column_stats'; or an additional 'error' key if the build failed
+        """
+        try:
+            with self._lock:
+                if self._tables is None or self._read_data_version() != self._data_version:
+                    self._rebuild()
+
+                tables = {}
+                for table_name, table_info in self._tables.items():
+                    tables[table_name] = {
+                        'columns': dict(table_info['columns']),
+                        'row_count': table_info['row_count']
+                    }
+                    if 'column_stats' in table_info:
+                        # Shared, not copied: callers must treat it as read-only
+                        tables[table_name]['column_stats'] = table_info['column_stats']
+                return {'tables': tables}
+        except Exception as e:
+            self.invalidate()
+            return {'tables': {}, 'error': str(e)}
+
+    def register_table(
+        self,
+        table_name: str,
+        columns: Dict[str, str],
+        row_count: int,
+        column_stats: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Record a table created or replaced by this application."""
+        with self._lock:
+            if self._tables is not None:
+                self._tables[table_name] = {
+                    'columns': dict(columns),
+                    'row_count': row_count
+                }
+                if column_stats is not None:
+                    self._tables[table_name]['column_stats'] = column_stats
+                self._acknowledge_writes()
+
+    def drop_table(self, table_name: str) -> None:
+        """Forget a table dropped by this application."""
+        with self._lock:
+            if self._tables is not None:
+                self._tables.pop(table_name, None)
+                self._acknowledge_writes()
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """
+        Refresh one table from the database, or drop the whole cache.
+
+        Args:
+            table_name: Table whose columns changed; None rebuilds everything
+                on the next get_schema() call
+        """
+        with self._lock:
+            if table_name is None or self._tables is None:
+                self._tables = None
+                return
+
+            try:
+                known = self._tables.get(table_name)
+                table_info = read_table_schema(self._connection(), table_name, count_rows=known is None)
+                if not table_info['columns']:
+                    # The table no longer exists
+                    self._tables.pop(table_name, None)
+                else:
+                    if known is not None:
+                        table_info['row_count'] = known['row_count']
+                    table_stats = read_column_stats(self._connection(), table_name).get(table_name)
+                    if table_stats is not None:
+                        table_info['column_stats'] = table_stats
+                    self._tables[table_name] = table_info
+                self._acknowledge_writes()
+            except sqlite3.Error:
+                self._tables = None
+
+    def close(self) -> None:
+        """Close the catalog's connection and drop the cache."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._tables = None
+
+
+_catalogs: Dict[str, SchemaCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_schema_catalog(db_path: Optional[str] = None) -> SchemaCatalog:
+    """Get the shared catalog for a database file, creating it on first use."""
+    path = db_path or DATABASE_PATH
+    if not is_memory_database(path):
+        path = os.path.abspath(path)
+    catalog = _catalogs.get(path)
+    if catalog is None:
+        with _catalogs_lock:
+            catalog = _catalogs.get(path)
+            if catalog is None:
+                catalog = SchemaCatalog(path)
+                _catalogs[path] = catalog
+    return catalog
+
+
+def close_all_catalogs() -> None:
+    """Close every catalog, e.g. on application shutdown."""
+    with _catalogs_lock:
+        catalogs = list(_catalogs.values())
+        _catalogs.clear()
+    for catalog in catalogs:
+        catalog.close()
@@ -0,0 +1,300 @@
+"""
+Relevance-pruned schema context for SQL generation prompts.
+
+format_schema_for_prompt() describes every table and column, so with
+hundreds of uploaded tables the prompt (and the LLM's latency) grows with
+the database and eventually hits the model's token limit. Before the prompt
+is built, the tables are ranked against the question with BM25 over:
+- table and column names, split on snake_case and camelCase
+- the most common text values from the persisted column statistics
+- how often past queries filtered or sorted on the table's columns (taken
+  from the index advisor)
+
+Only the best matching tables are sent, plus tables they reference through
+`<table>_id` columns so the model can still join, and each wide table keeps
+the columns that match the question, its keys and then its leading columns.
+Ranking is local and needs no network. Small databases are sent unpruned.
+
+Settings are read from the environment:
+- SCHEMA_PROMPT_MAX_TABLES: tables sent when pruning (default 10, 0 sends
+  every table); databases with at most this many tables are not pruned
+- SCHEMA_PROMPT_MAX_COLUMNS: columns sent per table (default 60, 0 sends
+  every column)
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+SCHEMA_PROMPT_MAX_TABLES = int(os.environ.get("SCHEMA_PROMPT_MAX_TABLES", "10"))
+SCHEMA_PROMPT_MAX_COLUMNS = int(os.environ.get("SCHEMA_PROMPT_MAX_COLUMNS", "60"))
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Term frequency given to each occurrence of a term, by where it appears
+TABLE_NAME_WEIGHT = 3
+COLUMN_NAME_WEIGHT = 2
+VALUE_WEIGHT = 1
+# Common values per column that are indexed
+VALUES_PER_COLUMN = 5
+# Added to a matching table's score per log of its recorded uses
+USAGE_WEIGHT = 0.5
+
+STOPWORDS = frozenset({
+    "a", "all", "an", "and", "any", "are", "as", "at", "be", "by", "each", "for",
+    "from", "get", "give", "how", "in", "is", "it", "list", "me", "many", "much",
+    "of", "on", "or", "per", "show", "that", "the", "their", "them", "there",
+    "to", "what", "when", "where", "which", "who", "with",
+})
+
+_WORD_PATTERN = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+
+def _stem(word: str) -> str:
+    """Fold simple English plurals so "orders" matches an "order_id" column"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def extract_terms(text: str) -> List[str]:
+    """Split text or an identifier into lowercase, stemmed search terms."""
+    terms = []
+    for word in _WORD_PATTERN.findall(text):
+        word = word.lower()
+        if word not in STOPWORDS:
+            terms.append(_stem(word))
+    return terms
+
+
+@dataclass
+class _TableDocument:
+    terms: Counter
+    length: int
+    name_terms: frozenset
+    # Terms of each column's name and common values, in schema order
+    column_terms: Dict[str, frozenset]
+
+
+def _build_document(table_name: str, table_info: Mapping[str, Any]) -> _TableDocument:
+    table_terms = extract_terms(table_name)
+    terms = Counter()
+    for term in table_terms:
+        terms[term] += TABLE_NAME_WEIGHT
+
+    column_stats = table_info.get('column_stats', {}).get('columns', {})
+    column_terms = {}
+    for column_name in table_info['columns']:
+        name_terms = extract_terms(column_name)
+        for term in name_terms:
+            terms[term] += COLUMN_NAME_WEIGHT
+        value_terms = []
+        for item in (column_stats.get(column_name) or {}).get('most_common', [])[:VALUES_PER_COLUMN]:
+            if isinstance(item['value'], str):
+                value_terms.extend(extract_terms(item['value']))
+        for term in value_terms:
+            terms[term] += VALUE_WEIGHT
+        column_terms[column_name] = frozenset(name_terms) | frozenset(value_terms)
+
+    return _TableDocument(terms, sum(terms.values()), frozenset(table_terms), column_terms)
+
+
+# table name -> (column names, column_stats object, document). The schema
+# catalog shares column_stats between calls, so an unchanged table is only
+# tokenized once.
+_documents: Dict[str, Tuple[Tuple[str, ...], Any, _TableDocument]] = {}
+_documents_lock = threading.Lock()
+
+
+def _table_documents(tables: Mapping[str, Mapping[str, Any]]) -> Dict[str, _TableDocument]:
+    documents = {}
+    with _documents_lock:
+        for table_name, table_info in tables.items():
+            columns = tuple(table_info['columns'])
+            column_stats = table_info.get('column_stats')
+            cached = _documents.get(table_name)
+            if cached is None or cached[0] != columns or cached[1] is not column_stats:
+                cached = (columns, column_stats, _build_document(table_name, table_info))
+                _documents[table_name] = cached
+            documents[table_name] = cached[2]
+        if len(_documents) > 2 * len(tables):
+            for table_name in [name for name in _documents if name not in tables]:
+                del _documents[table_name]
+    return documents
+
+
+def _table_uses(column_uses: Optional[Mapping[Tuple[str, str], int]]) -> Counter:
+    uses = Counter()
+    for (table_name, _), count in (column_uses or {}).items():
+        uses[table_name.lower()] += count
+    return uses
+
+
+def rank_tables(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    column_uses: Optional[Mapping[Tuple[str, str], int]] = None
+) -> List[Tuple[str, float]]:
+    """
+    Score every table against a question with BM25 plus a usage prior.
+
+    Args:
+        query_text: Natural language question
+        schema_info: Schema in the shape returned by get_database_schema()
+        column_uses: Past predicate/sort uses per (table, column)
+
+    Returns:
+        (table name, score) for tables sharing a term with the question,
+        best first
+    """
+    tables = schema_info.get('tables', {})
+    query_terms = set(extract_terms(query_text))
+    if not tables or not query_terms:
+        return []
+
+    documents = _table_documents(tables)
+    average_length = sum(doc.length for doc in documents.values()) / len(documents) or 1
+    document_frequency = Counter()
+    for doc in documents.values():
+        for term in query_terms:
+            if term in doc.terms:
+                document_frequency[term] += 1
+
+    uses = _table_uses(column_uses)
+    scores = []
+    for table_name, doc in documents.items():
+        score = 0.0
+        for term in query_terms:
+            frequency = doc.terms.get(term)
+            if not frequency:
+                continue
+            df = document_frequency[term]
+            idf = math.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc.length / average_length)
+            score += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        if score > 0:
+            score += USAGE_WEIGHT * math.log1p(uses[table_name.lower()])
+            scores.append((table_name, score))
+
+    scores.sort(key=lambda item: (-item[1], item[0]))
+    return scores
+
+
+def _referenced_tables(table_name: str, documents: Mapping[str, _TableDocument], rank: Mapping[str, int]) -> List[str]:
+    """
+    Tables that a table's `<table>_id` columns point to.
+
+    The target's name must contain the column's entity (customer_id matches
+    customers or customers_emea). Among several, the one whose other name
+    parts also appear in the referencing table's name (the same region or
+    year suffix) wins, then the best ranked.
+    """
+    source = documents[table_name]
+    referenced = []
+    for column_name in source.column_terms:
+        if not column_name.lower().endswith("_id"):
+            continue
+        entity = frozenset(extract_terms(column_name[:-3]))
+        if not entity:
+            continue
+        best = None
+        for name, doc in documents.items():
+            if name == table_name or not entity <= doc.name_terms:
+                continue
+            key = (len(doc.name_terms - entity - source.name_terms), rank.get(name, len(rank)), name)
+            if best is None or key < best:
+                best = key
+        if best is not None:
+            referenced.append(best[2])
+    return referenced
+
+
+def _select_columns(columns: Dict[str, str], doc: _TableDocument, query_terms: set, max_columns: int) -> Dict[str, str]:
+    if not max_columns or len(columns) <= max_columns:
+        return columns
+    matching = [name for name in columns if doc.column_terms.get(name, frozenset()) & query_terms]
+    keys = [name for name in columns if name.lower() == "id" or name.lower().endswith("_id")]
+    kept = []
+    for name in matching + keys + list(columns):
+        if name not in kept:
+            kept.append(name)
+        if len(kept) == max_columns:
+            break
+    # Keep the table's own column order
+    kept = set(kept)
+    return {name: col_type for name, col_type in columns.items() if name in kept}
+
+
+def select_schema_context(
+    query_text: str,
+    schema_info: Dict[str, Any],
+    column_uses: Optional[Mapping[Tuple[str, str], int]] = None,
+    max_tables: Optional[int] = None,
+    max_columns: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Reduce a schema to the tables and columns relevant to a question.
+
+    Args:
+        query_text: Natural language question
+        schema_info: Schema in the shape returned by get_database_schema()
+        column_uses: Past predicate/sort uses per (table, column)
+        max_tables: Defaults to SCHEMA_PROMPT_MAX_TABLES
+        max_columns: Defaults to SCHEMA_PROMPT_MAX_COLUMNS
+
+    Returns:
+        Schema in the same shape, holding only the selected tables; the
+        input is returned unchanged when it is small enough
+    """
+    max_tables = SCHEMA_PROMPT_MAX_TABLES if max_tables is None else max_tables
+    max_columns = SCHEMA_PROMPT_MAX_COLUMNS if max_columns is None else max_columns
+    tables = schema_info.get('tables', {})
+    too_many_columns = max_columns and any(len(info['columns']) > max_columns for info in tables.values())
+    if (not max_tables or len(tables) <= max_tables) and not too_many_columns:
+        return schema_info
+
+    if max_tables and len(tables) > max_tables:
+        ranked = [name for name, _ in rank_tables(query_text, schema_info, column_uses)]
+        if not ranked:
+            # Nothing matched: fall back to the most queried tables
+            uses = _table_uses(column_uses)
+            ranked = sorted(tables, key=lambda name: (-uses[name.lower()], name))
+
+        documents = _table_documents(tables)
+        rank = {name: position for position, name in enumerate(ranked)}
+        selected = ranked[:max(1, max_tables // 2)]
+        # Add the tables the best matches join to, then the next best matches
+        for table_name in list(selected):
+            for target in _referenced_tables(table_name, documents, rank):
+                if len(selected) < max_tables and target not in selected:
+                    selected.append(target)
+        for table_name in ranked:
+            if len(selected) >= max_tables:
+                break
+            if table_name not in selected:
+                selected.append(table_name)
+        # Keep the schema's own table order
+        chosen = set(selected)
+        selected = [name for name in tables if name in chosen]
+    else:
+        selected = list(tables)
+
+    query_terms = set(extract_terms(query_text))
+    documents = _table_documents(tables)
+    pruned = {}
+    for table_name in selected:
+        table_info = dict(tables[table_name])
+        table_info['columns'] = _select_columns(table_info['columns'], documents[table_name], query_terms, max_columns)
+        pruned[table_name] = table_info
+
+    result = dict(schema_info)
+    result['tables'] = pruned
+    return result
@@ -0,0 +1,80 @@
+"""
+Coalescing of identical concurrent async calls.
+
+When a dashboard loads, several clients send the same question within the
+same second, and each would pay for its own LLM call and query. A
+SingleFlight runs one call per key at a time: callers that arrive while a
+call with their key is in flight wait for it and share its result (or its
+exception) instead of starting their own.
+
+The shared call is not tied to the caller that started it. A caller that is
+cancelled (e.g. its client disconnected) stops waiting, and the call itself
+is cancelled only once every caller waiting for it is gone.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    def __init__(self, task: "asyncio.Task[Any]"):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key."""
+
+    def __init__(self):
+        # Only touched from the event loop; the lock guards the counters
+        # read by the metrics endpoint
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """
+        Await func() for `key`, or join the call already in flight for it.
+
+        Returns:
+            The result and whether it came from another caller's call
+        """
+        flight = self._flights.get(key)
+        shared = flight is not None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(func()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._finish(key, flight))
+        with self._lock:
+            self.calls += 1
+            self.shared += shared
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                # Every caller gave up: stop the work nobody is waiting for
+                flight.task.cancel()
+                self._finish(key, flight)
+
+    def _finish(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if flight.task.done() and not flight.task.cancelled():
+            # Mark the exception as retrieved when no caller is left to see it
+            flight.task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for the metrics endpoint"""
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'shared': self.shared,
+                'in_flight': len(self._flights)
+            }
@@ -0,0 +1,198 @@
+"""
+Fixed-memory sketches for approximate column statistics.
+
+The exact insights path runs SQL aggregates: one scan for the counts and a
+GROUP BY per column for its most common values, so SQLite sorts every
+distinct value (spilling to disk) and the table is read 1 + N times for N
+columns. These sketches read it once and use a fixed amount of memory,
+whatever the table size:
+- HyperLogLog estimates distinct counts
+- a Count-Min sketch with a small candidate set estimates the most common values
+- a bottom-k reservoir sample estimates quantiles
+
+Updates take a whole batch of values at once. Values are hashed with the
+built-in hash() in C, then mixed and bucketed with numpy, so the per-value
+Python work is limited to the hash() call. hash() is salted per process for
+str and bytes, so sketches can be merged only within one process.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_SPLITMIX_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_SPLITMIX_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_SPLITMIX_MUL2 = np.uint64(0x94D049BB133111EB)
+_POWERS_OF_TWO = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+
+
+def mix64(hashes: np.ndarray) -> np.ndarray:
+    """
+    Spread hash bits with the splitmix64 finalizer.
+
+    hash() of a small int is the int itself, which would leave the high bits
+    HyperLogLog relies on empty.
+    """
+    z = hashes + _SPLITMIX_GAMMA
+    z = (z ^ (z >> np.uint64(30))) * _SPLITMIX_MUL1
+    z = (z ^ (z >> np.uint64(27))) * _SPLITMIX_MUL2
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_values(values: Sequence[Any]) -> np.ndarray:
+    """
+    Hash a batch of hashable values to well-mixed unsigned 64-bit integers
+    """
+    raw = np.fromiter(map(hash, values), dtype=np.int64, count=len(values))
+    return mix64(raw.view(np.uint64))
+
+
+class HyperLogLog:
+    """
+    Distinct count estimator with a relative standard error of 1.04/sqrt(2^p).
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Relative standard error of estimate()"""
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def update(self, hashes: np.ndarray) -> None:
+        """Add a batch of mixed 64-bit hashes"""
+        if not len(hashes):
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        remainder = hashes << p
+        # Position of the first set bit in the remaining 64-p bits
+        bit_length = np.searchsorted(_POWERS_OF_TWO, remainder, side='right')
+        rank = np.minimum(65 - bit_length, 65 - self.precision).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        """Estimated number of distinct values added"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / float(np.sum(np.ldexp(1.0, -self.registers.astype(np.int32))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            raw = m * math.log(m / zeros)
+        return int(round(raw))
+
+
+class CountMinTopK:
+    """
+    Most common values from a Count-Min sketch (with conservative update)
+    plus a bounded candidate set.
+
+    Counts are overestimated by at most error_bound() with probability
+    1 - e^-depth, so only values estimated above that bound are reported.
+    Each batch's most frequent values become candidates, so a value that is
+    frequent overall but never frequent within a batch can be missed.
+    """
+
+    def __init__(self, k: int = 5, width: int = 2048, depth: int = 4, candidates: int = 64):
+        self.k = k
+        self.width = width
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.seeds = [np.uint64((i + 1) * 0x9E3779B97F4A7C15 % (1 << 64)) for i in range(depth)]
+        self.max_candidates = max(candidates, 4 * k)
+        self.candidates: Dict[int, Any] = {}
+        self.total = 0
+
+    def error_bound(self) -> int:
+        """Upper bound on how much any reported count is overestimated"""
+        return int(math.ceil(math.e / self.width * self.total))
+
+    def _indexes(self, hashes: np.ndarray) -> List[np.ndarray]:
+        return [(mix64(hashes ^ seed) % np.uint64(self.width)).astype(np.intp) for seed in self.seeds]
+
+    def _estimate(self, hashes: np.ndarray) -> np.ndarray:
+        rows = self._indexes(hashes)
+        return np.min([self.table[i, index] for i, index in enumerate(rows)], axis=0)
+
+    def update(self, hashes: np.ndarray, values: Sequence[Any]) -> None:
+        """Add a batch of mixed hashes and the values they were computed from"""
+        if not len(hashes):
+            return
+        self.total += len(hashes)
+        unique, first_seen, counts = np.unique(hashes, return_index=True, return_counts=True)
+
+        # Conservative update: raise each cell only as far as the value's
+        # current estimate plus its count requires, which keeps collisions
+        # from inflating every counter they touch
+        rows = self._indexes(unique)
+        estimates = np.min([self.table[i, index] for i, index in enumerate(rows)], axis=0)
+        for i, index in enumerate(rows):
+            np.maximum.at(self.table[i], index, estimates + counts)
+
+        # The batch's most frequent values become candidates
+        if len(unique) > self.max_candidates:
+            top = np.argpartition(counts, -self.max_candidates)[-self.max_candidates:]
+            unique, first_seen = unique[top], first_seen[top]
+        for hash_value, position in zip(unique.tolist(), first_seen.tolist()):
+            self.candidates.setdefault(hash_value, values[position])
+
+        if len(self.candidates) > 2 * self.max_candidates:
+            self.candidates = dict(self.top(self.max_candidates, with_hashes=True))
+
+    def top(self, k: Optional[int] = None, with_hashes: bool = False) -> List[Tuple[Any, int]]:
+        """The k candidates with the highest estimated counts"""
+        k = k or self.k
+        if not self.candidates:
+            return []
+        hashes = np.fromiter(self.candidates.keys(), dtype=np.uint64, count=len(self.candidates))
+        estimates = self._estimate(hashes)
+        order = np.argsort(-estimates, kind='stable')[:k]
+        if with_hashes:
+            return [(int(hashes[i]), self.candidates[int(hashes[i])]) for i in order]
+        # Anything at or below the error bound is indistinguishable from noise
+        bound = self.error_bound()
+        return [(self.candidates[int(hashes[i])], int(estimates[i])) for i in order if estimates[i] > bound]
+
+
+class ReservoirSample:
+    """
+    Uniform sample of numeric values, kept as the values with the `size`
+    smallest random priorities (bottom-k sampling).
+    """
+
+    def __init__(self, size: int = 10000, seed: Optional[int] = None):
+        self.size = size
+        self.rng = np.random.default_rng(seed)
+        self.values = np.empty(0, dtype=np.float64)
+        self.priorities = np.empty(0, dtype=np.float64)
+        self.seen = 0
+
+    def update(self, values: np.ndarray) -> None:
+        """Add a batch of numeric values"""
+        if not len(values):
+            return
+        self.seen += len(values)
+        self.values = np.concatenate([self.values, values])
+        self.priorities = np.concatenate([self.priorities, self.rng.random(len(values))])
+        if len(self.values) > self.size:
+            keep = np.argpartition(self.priorities, self.size)[:self.size]
+            self.values = self.values[keep]
+            self.priorities = self.priorities[keep]
+
+    def quantiles(self, probabilities: Sequence[float]) -> List[float]:
+        """Estimated quantiles of every value added"""
+        if not len(self.values):
+            return []
+        return [float(q) for q in np.quantile(self.values, probabilities)]
+
+    def rank_error(self, confidence: float = 0.95) -> float:
+        """
+        Bound on the rank error of quantiles() (Dvoretzky-Kiefer-Wolfowitz);
+        0 while every value seen is still in the sample
+        """
+        if self.seen <= self.size:
+            return 0.0
+        return math.sqrt(math.log(2 / (1 - confidence)) / (2 * len(self.values)))
@@ -0,0 +1,196 @@
+"""
+Cache for SQL generated from natural language queries.
+
+Dashboards tend to ask the same handful of questions over and over. When the
+schema has not changed, the LLM will produce the same SQL again, so the
+generated SQL is cached and the network round trip is skipped.
+
+Entries are keyed on:
+- the normalized query text (case, whitespace and trailing punctuation folded)
+- the LLM provider that generated the SQL
+- a fingerprint of the schema's tables and columns
+
+Row counts are left out of the fingerprint: they change on every upload but
+do not change the SQL the model should write.
+
+The in-memory tier is an LRU with a TTL. An optional SQLite file adds a
+persistent tier that survives restarts.
+
+Settings are read from the environment:
+- SQL_CACHE_MAX_ENTRIES: in-memory entries (default 1024, 0 disables caching)
+- SQL_CACHE_TTL_SECONDS: entry lifetime (default 3600)
+- SQL_CACHE_PATH: SQLite file for the persistent tier (default: disabled)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+SQL_CACHE_MAX_ENTRIES = int(os.environ.get("SQL_CACHE_MAX_ENTRIES", "1024"))
+SQL_CACHE_TTL_SECONDS = float(os.environ.get("SQL_CACHE_TTL_SECONDS", "3600"))
+SQL_CACHE_PATH = os.environ.get("SQL_CACHE_PATH", "")
+
+
+def normalize_query_text(query: str) -> str:
+    """Fold case, whitespace and trailing punctuation out of a natural language query."""
+    return " ".join(query.lower().split()).rstrip("?.!;").strip()
+
+
+def schema_fingerprint(schema_info: Dict[str, Any]) -> str:
+    """Hash the tables and columns of a schema, ignoring row counts."""
+    shape = sorted(
+        (table_name, sorted(table_info.get('columns', {}).items()))
+        for table_name, table_info in schema_info.get('tables', {}).items()
+    )
+    return hashlib.sha256(json.dumps(shape).encode('utf-8')).hexdigest()
+
+
+class GeneratedSQLCache:
+    """LRU/TTL cache of generated SQL with an optional SQLite-backed tier."""
+
+    def __init__(
+        self,
+        max_entries: int = SQL_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = SQL_CACHE_TTL_SECONDS,
+        persist_path: Optional[str] = None,
+        clock: Callable[[], float] = time.time
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+        self._clock = clock
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        if persist_path:
+            directory = os.path.dirname(persist_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(persist_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS generated_sql ("
+                "cache_key TEXT PRIMARY KEY, sql TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def make_key(query: str, provider: str, fingerprint: str) -> str:
+        """Build the cache key for a query against a schema fingerprint."""
+        raw = "\x1f".join((normalize_query_text(query), provider, fingerprint))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return cached SQL for `key`, or None on a miss."""
+        if not self.enabled:
+            return None
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                sql, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return sql
+                del self._entries[key]
+                self.expirations += 1
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT sql, created_at FROM generated_sql WHERE cache_key = ?",
+                    (key,)
+                ).fetchone()
+                if row is not None:
+                    sql, created_at = row
+                    if now - created_at < self.ttl_seconds:
+                        self._store(key, sql, created_at)
+                        self.hits += 1
+                        self.persistent_hits += 1
+                        return sql
+                    self._conn.execute("DELETE FROM generated_sql WHERE cache_key = ?", (key,))
+                    self._conn.commit()
+                    self.expirations += 1
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, sql: str) -> None:
+        """Cache generated SQL under `key`."""
+        if not self.enabled:
+            return
+
+        created_at = self._clock()
+        with self._lock:
+            self._store(key, sql, created_at)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO generated_sql (cache_key, sql, created_at) VALUES (?, ?, ?)",
+                    (key, sql, created_at)
+                )
+                self._conn.commit()
+
+    def _store(self, key: str, sql: str, created_at: float) -> None:
+        self._entries[key] = (sql, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM generated_sql")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the metrics endpoint."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'persistent_hits': self.persistent_hits
+            }
+
+    def close(self) -> None:
+        """Close the persistent tier."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_sql_cache: Optional[GeneratedSQLCache] = None
+_sql_cache_lock = threading.Lock()
+
+
+def get_sql_cache() -> GeneratedSQLCache:
+    """Get the process-wide generated SQL cache, creating it on first use."""
+    global _sql_cache
+    if _sql_cache is None:
+        with _sql_cache_lock:
+            if _sql_cache is None:
+                _sql_cache = GeneratedSQLCache(persist_path=SQL_CACHE_PATH or None)
+    return _sql_cache
@@ -1,32 +1,94 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
 import sqlite3
-from typing import Dict, Any
+from contextlib import ExitStack
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from .connection_pool import get_connection
+from .column_stats import is_internal_table
+from .index_advisor import record_query
+from .query_cursors import OpenCursor, get_query_cursors
+from .query_deadline import QueryDeadline, QueryTimeout, QueryCancelled, deadline_guard
 from .sql_security import (
     execute_query_safely, 
+    parse_sql_query, 
     validate_sql_query, 
     SQLSecurityError
 )
 
-def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
+# Rows pulled from the cursor per fetchmany() call when streaming
+QUERY_FETCH_SIZE = int(os.environ.get("QUERY_FETCH_SIZE", "1000"))
+# Default and maximum rows per page for paginated queries
+QUERY_PAGE_SIZE = int(os.environ.get("QUERY_PAGE_SIZE", "1000"))
+MAX_QUERY_PAGE_SIZE = int(os.environ.get("MAX_QUERY_PAGE_SIZE", "10000"))
+# Rows execute_sql_safely returns before it stops fetching (0 disables)
+MAX_RESULT_ROWS = int(os.environ.get("MAX_RESULT_ROWS", "10000"))
+# Key used to sign continuation tokens; a random per-process key means
+# tokens stop working after a restart unless one is configured
+QUERY_CURSOR_SECRET = os.environ.get("QUERY_CURSOR_SECRET", "").encode() or secrets.token_bytes(32)
+
+def execute_sql_safely(
+    sql_query: str,
+    columnar: bool = False,
+    deadline: Optional[QueryDeadline] = None,
+    max_rows: Optional[int] = None
+) -> Dict[str, Any]:
     """
     Execute SQL query with safety checks
+    
+    With columnar=True the rows are transposed into one list per column under
+    'column_data' instead of one dict per row under 'results', so column names
+    are not repeated for every row.
+    
+    At most `max_rows` rows (default MAX_RESULT_ROWS; 0 for no cap) are
+    returned. One row more is fetched to learn whether the result was cut
+    off, then the statement is abandoned; 'truncated' tells which.
+    
+    With a deadline, the statement is aborted once it expires or is
+    cancelled; the result then has 'timed_out' set (on expiry) and an error.
     """
+    row_cap = MAX_RESULT_ROWS if max_rows is None else max_rows
     try:
         # Validate the SQL query for dangerous operations
         validate_sql_query(sql_query)
         
-        # Connect to database
-        conn = sqlite3.connect("db/database.db")
-        conn.row_factory = sqlite3.Row  # Enable column access by name
+        # Borrow a pooled read-only connection
+        with get_connection(read_only=True) as conn, deadline_guard(conn, deadline):
+            if not columnar:
+                conn.row_factory = sqlite3.Row  # Enable column access by name
+            
+            # Execute query safely
+            # Note: Since this is a user-provided complete SQL query,
+            # we can't use parameterization. The validate_sql_query
+            # function provides protection against dangerous operations.
+            cursor = conn.cursor()
+            cursor.execute(sql_query)
+            
+            # Get results, stopping one row past the cap
+            rows = cursor.fetchmany(row_cap + 1) if row_cap else cursor.fetchall()
+            description = cursor.description
+            cursor.close()
         
-        # Execute query safely
-        # Note: Since this is a user-provided complete SQL query,
-        # we can't use parameterization. The validate_sql_query
-        # function provides protection against dangerous operations.
-        cursor = conn.cursor()
-        cursor.execute(sql_query)
+        truncated = bool(row_cap) and len(rows) > row_cap
+        if truncated:
+            rows = rows[:row_cap]
+        
+        # Count the columns it filters and sorts on for automatic indexing
+        record_query(sql_query)
         
-        # Get results
-        rows = cursor.fetchall()
+        if columnar:
+            columns = [column[0] for column in description or []]
+            column_data = [list(values) for values in zip(*rows)] if rows else [[] for _ in columns]
+            return {
+                'results': [],
+                'column_data': column_data,
+                'columns': columns,
+                'truncated': truncated,
+                'error': None
+            }
         
         # Convert rows to dictionaries
         results = []
@@ -37,11 +99,10 @@ def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
             for row in rows:
                 results.append(dict(row))
         
-        conn.close()
-        
         return {
             'results': results,
             'columns': columns,
+            'truncated': truncated,
             'error': None
         }
     
@@ -51,6 +112,13 @@ def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
             'columns': [],
             'error': f"Security error: {str(e)}"
         }
+    except QueryCancelled as e:
+        return {
+            'results': [],
+            'columns': [],
+            'error': str(e),
+            'timed_out': isinstance(e, QueryTimeout)
+        }
     except Exception as e:
         return {
             'results': [],
@@ -58,60 +126,234 @@ def execute_sql_safely(sql_query: str) -> Dict[str, Any]:
             'error': str(e)
         }
 
-def get_database_schema() -> Dict[str, Any]:
+def strip_trailing_semicolons(sql_query: str) -> str:
     """
-    Get complete database schema information
+    Remove trailing semicolons and whitespace so the query can be embedded
     """
-    try:
-        conn = sqlite3.connect("db/database.db")
+    return sql_query.strip().rstrip(';').rstrip()
+
+def iter_sql_batches(
+    sql_query: str,
+    batch_size: Optional[int] = None,
+    deadline: Optional[QueryDeadline] = None
+) -> Iterator[Tuple[List[str], List[Dict[str, Any]]]]:
+    """
+    Execute a SQL query with safety checks and yield its rows in batches.
+    
+    Rows are pulled from the cursor with fetchmany(), so memory stays bounded
+    by `batch_size` (default QUERY_FETCH_SIZE) however large the result is.
+    The pooled connection is held until the generator is exhausted or closed.
+    
+    Yields:
+        (columns, rows) tuples; the first batch is yielded even when empty so
+        callers always learn the column names
+    
+    Raises:
+        SQLSecurityError: If the query fails validation
+        QueryTimeout, QueryCancelled: If the deadline expires or is cancelled
+            while rows are being read
+    """
+    batch_size = batch_size or QUERY_FETCH_SIZE
+    
+    # Validate the SQL query for dangerous operations
+    validate_sql_query(sql_query)
+    
+    with get_connection(read_only=True) as conn, deadline_guard(conn, deadline):
         cursor = conn.cursor()
+        cursor.execute(sql_query)
+        columns = [description[0] for description in cursor.description or []]
         
-        # Get all tables safely
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
+        first = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows and not first:
+                break
+            first = False
+            yield columns, [dict(zip(columns, row)) for row in rows]
+            if len(rows) < batch_size:
+                break
+
+def execute_sql_page(
+    sql_query: str,
+    offset: int = 0,
+    page_size: int = QUERY_PAGE_SIZE,
+    deadline: Optional[QueryDeadline] = None,
+    cursor_id: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Execute one page of a SQL query with safety checks.
+    
+    The statement runs unchanged and rows are read with fetchmany(). When
+    more rows remain, the statement is kept open (see core.query_cursors)
+    and the next page with `cursor_id` continues it where this one stopped.
+    Without an open cursor the query is re-run and the first `offset` rows
+    are stepped past on the cursor.
+    
+    Returns:
+        Dict with 'results', 'columns', 'has_more', 'cursor_id' (of the
+        cursor kept open for the next page, if any) and 'error'
+    """
+    try:
+        # Validate the SQL query for dangerous operations
+        parse_sql_query(sql_query)
         
-        schema = {'tables': {}}
+        query_cursors = get_query_cursors()
+        entry = query_cursors.take(cursor_id, sql_query, offset)
+        if entry is None:
+            resources = ExitStack()
+            conn = resources.enter_context(get_connection(read_only=True))
+            entry = OpenCursor(sql_query, conn, resources)
+            cursor_id = None
         
-        for table in tables:
-            table_name = table[0]
-            
-            # Skip system tables
-            if table_name.startswith('sqlite_'):
-                continue
-            
-            try:
-                # Get columns for each table using safe query execution
-                cursor_info = execute_query_safely(
-                    conn,
-                    "PRAGMA table_info({table})",
-                    identifier_params={'table': table_name}
-                )
-                columns_info = cursor_info.fetchall()
-                
-                columns = {}
-                for col in columns_info:
-                    columns[col[1]] = col[2]  # column_name: data_type
-                
-                # Get row count safely
-                cursor_count = execute_query_safely(
-                    conn,
-                    "SELECT COUNT(*) FROM {table}",
-                    identifier_params={'table': table_name}
-                )
-                row_count = cursor_count.fetchone()[0]
-                
-                schema['tables'][table_name] = {
-                    'columns': columns,
-                    'row_count': row_count
-                }
-                
-            except SQLSecurityError:
-                # Skip tables with invalid names
-                continue
+        try:
+            with deadline_guard(entry.conn, deadline):
+                if entry.cursor is None:
+                    entry.execute()
+                    entry.skip(offset, QUERY_FETCH_SIZE)
+                columns = entry.columns
+                rows = entry.fetch(page_size)
+        except BaseException:
+            entry.close()
+            raise
+        
+        has_more = bool(entry.pending)
+        if has_more:
+            cursor_id = query_cursors.put(entry, cursor_id)
+        else:
+            entry.close()
+            cursor_id = None
+        
+        return {
+            'results': [dict(zip(columns, row)) for row in rows],
+            'columns': columns,
+            'has_more': has_more,
+            'cursor_id': cursor_id,
+            'error': None
+        }
+    
+    except SQLSecurityError as e:
+        return {
+            'results': [],
+            'columns': [],
+            'has_more': False,
+            'error': f"Security error: {str(e)}"
+        }
+    except QueryCancelled as e:
+        return {
+            'results': [],
+            'columns': [],
+            'has_more': False,
+            'error': str(e),
+            'timed_out': isinstance(e, QueryTimeout)
+        }
+    except Exception as e:
+        return {
+            'results': [],
+            'columns': [],
+            'has_more': False,
+            'error': str(e)
+        }
+
+def _sign_cursor(payload: bytes) -> str:
+    return hmac.new(QUERY_CURSOR_SECRET, payload, hashlib.sha256).hexdigest()
+
+def encode_query_cursor(sql_query: str, offset: int, cursor_id: Optional[str] = None) -> str:
+    """
+    Build a signed continuation token for the page of `sql_query` at `offset`,
+    naming the open cursor that continues it if there is one
+    """
+    data = {'sql': sql_query, 'offset': offset}
+    if cursor_id:
+        data['cursor'] = cursor_id
+    payload = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    return f"{base64.urlsafe_b64encode(payload).decode('ascii')}.{_sign_cursor(payload)}"
+
+def decode_query_cursor(cursor: str) -> Tuple[str, int, Optional[str]]:
+    """
+    Decode a continuation token into the SQL and offset it points at and the
+    id of its open cursor (None if it has none)
+    
+    Raises:
+        ValueError: If the token is malformed or was not issued by this server
+    """
+    try:
+        encoded, signature = cursor.split('.', 1)
+        payload = base64.urlsafe_b64decode(encoded.encode('ascii'))
+    except Exception:
+        raise ValueError("Invalid query cursor")
+    
+    if not hmac.compare_digest(signature, _sign_cursor(payload)):
+        raise ValueError("Invalid or expired query cursor")
+    
+    data = json.loads(payload)
+    return data['sql'], int(data['offset']), data.get('cursor')
+
+def read_table_schema(conn: sqlite3.Connection, table_name: str, count_rows: bool = True) -> Dict[str, Any]:
+    """
+    Read one table's columns (and optionally its row count) on an open connection
+    """
+    # Get columns for the table using safe query execution
+    cursor_info = execute_query_safely(
+        conn,
+        "PRAGMA table_info({table})",
+        identifier_params={'table': table_name}
+    )
+    columns_info = cursor_info.fetchall()
+    
+    columns = {}
+    for col in columns_info:
+        columns[col[1]] = col[2]  # column_name: data_type
+    
+    table_schema = {'columns': columns}
+    
+    if count_rows:
+        # Get row count safely
+        cursor_count = execute_query_safely(
+            conn,
+            "SELECT COUNT(*) FROM {table}",
+            identifier_params={'table': table_name}
+        )
+        table_schema['row_count'] = cursor_count.fetchone()[0]
+    
+    return table_schema
+
+def read_database_schema(conn: sqlite3.Connection) -> Dict[str, Any]:
+    """
+    Read the complete database schema on an open connection
+    """
+    cursor = conn.cursor()
+    
+    # Get all tables safely
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+    tables = cursor.fetchall()
+    
+    schema = {'tables': {}}
+    
+    for table in tables:
+        table_name = table[0]
         
-        conn.close()
+        # Skip system tables and the application's own tables
+        if table_name.startswith('sqlite_') or is_internal_table(table_name):
+            continue
         
-        return schema
+        try:
+            schema['tables'][table_name] = read_table_schema(conn, table_name)
+        except SQLSecurityError:
+            # Skip tables with invalid names
+            continue
+    
+    return schema
+
+def get_database_schema() -> Dict[str, Any]:
+    """
+    Get complete database schema information.
+    
+    This always introspects the database; request handlers should use the
+    cached catalog in core.schema_catalog instead.
+    """
+    try:
+        with get_connection(read_only=True) as conn:
+            return read_database_schema(conn)
         
     except Exception as e:
-        return {'tables': {}, 'error': str(e)}
\ No newline at end of file
+        return {'tables': {}, 'error': str(e)}
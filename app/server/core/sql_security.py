@@ -6,8 +6,37 @@ and proper escaping mechanisms.
 
 import re
 import sqlite3
+from dataclasses import dataclass
 from typing import Any, List, Tuple, Optional, Union
 
+from .sql_tokenizer import Token, tokenize_sql
+
+# Statement types a query may have; everything else can write to or
+# reconfigure the database
+READ_ONLY_STATEMENTS = frozenset({"SELECT", "WITH", "VALUES", "EXPLAIN", "PRAGMA"})
+
+# Statements that may follow EXPLAIN or a WITH clause's table expressions
+READ_ONLY_MAIN_STATEMENTS = frozenset({"SELECT", "VALUES"})
+
+# Keywords rejected wherever they appear outside literals, e.g. the DELETE in
+# WITH ... DELETE FROM. REPLACE is also a function, so it is only rejected
+# when INTO follows it
+DANGEROUS_KEYWORDS = frozenset({
+    "ALTER", "ANALYZE", "ATTACH", "CREATE", "DELETE", "DETACH", "DROP",
+    "INSERT", "REINDEX", "UPDATE", "VACUUM",
+})
+
+# Pragmas that only report on the schema; others can change settings such as
+# query_only, which keeps the read-only pool read-only
+READ_ONLY_PRAGMAS = frozenset({
+    "collation_list", "compile_options", "database_list", "foreign_key_list",
+    "function_list", "index_info", "index_list", "index_xinfo", "pragma_list",
+    "table_info", "table_list", "table_xinfo",
+})
+
+# Functions rejected when called
+DANGEROUS_FUNCTIONS = frozenset({"EXEC", "EXECUTE", "LOAD_EXTENSION"})
+
 
 class SQLSecurityError(Exception):
     """Raised when SQL security validation fails."""
@@ -150,60 +179,185 @@ def execute_query_safely(
     return cursor
 
 
-def validate_sql_query(query: str) -> bool:
+@dataclass(frozen=True)
+class ParsedStatement:
+    """A single read-only statement that passed validate_sql_query."""
+
+    statement_type: str  # Leading keyword: SELECT, WITH, VALUES, EXPLAIN or PRAGMA
+    tokens: Tuple[Token, ...]  # Without the trailing semicolons
+
+    @property
+    def is_select(self) -> bool:
+        """Whether the statement can be wrapped as a subquery"""
+        return self.statement_type in ("SELECT", "WITH", "VALUES")
+
+
+def _is_terminated_string(text: str) -> bool:
+    """Whether a string literal token (possibly x'..') has its closing quote"""
+    body = text[text.index("'") + 1:]
+    # Inside the literal quotes come in escaped pairs, so an odd run of
+    # trailing quotes means the last one closes it
+    trailing = len(body) - len(body.rstrip("'"))
+    return trailing % 2 == 1
+
+
+def _literal_value(token: Token) -> Optional[str]:
+    """Comparable value of a string or number literal, None for anything else"""
+    if token.kind == "string" and token.value[0] not in "xX":
+        text = token.value[1:-1].replace("''", "'")
+    elif token.kind == "number":
+        text = token.value
+    else:
+        return None
+    try:
+        return repr(float(int(text, 16) if text.lower().startswith("0x") else text))
+    except ValueError:
+        return text
+
+
+def _is_tautology(left: Token, operator: Token, right: Token) -> bool:
+    """Whether left = right compares two equal literals (e.g. '1'='1')"""
+    if operator.value not in ("=", "=="):
+        return False
+    left_value = _literal_value(left)
+    return left_value is not None and left_value == _literal_value(right)
+
+
+def _is_read_only_pragma(tokens: List[Token]) -> bool:
+    """Whether PRAGMA [schema.]name[(argument)] names a reporting pragma"""
+    name_at = 3 if len(tokens) > 2 and tokens[2].value == "." else 1
+    if name_at >= len(tokens) or tokens[name_at].kind != "name":
+        return False
+    if any(token.value in ("=", "==") for token in tokens):
+        return False
+    return tokens[name_at].value.lower() in READ_ONLY_PRAGMAS
+
+
+def _main_statement(tokens: List[Token]) -> Optional[str]:
     """
-    Validate a SQL query to ensure it doesn't contain dangerous operations.
+    Leading keyword of the statement that runs: the one after EXPLAIN [QUERY
+    PLAN] and after the table expressions of a WITH clause
+    """
+    i = 0
+    while i < len(tokens) and tokens[i].value == "(":
+        i += 1
+    if i < len(tokens) and tokens[i].value.upper() == "EXPLAIN":
+        i += 1
+        if [token.value.upper() for token in tokens[i:i + 2]] == ["QUERY", "PLAN"]:
+            i += 2
+    if i >= len(tokens) or tokens[i].value.upper() != "WITH":
+        return tokens[i].value.upper() if i < len(tokens) else None
+
+    # name [(columns)] AS [[NOT] MATERIALIZED] (body), ...: the statement
+    # starts after a body that no comma follows
+    depth = 0
+    body = False
+    for position in range(i + 1, len(tokens)):
+        value = tokens[position].value
+        if value == "(":
+            if depth == 0:
+                body = tokens[position - 1].value.upper() in ("AS", "MATERIALIZED")
+            depth += 1
+        elif value == ")":
+            depth -= 1
+            if depth == 0 and body:
+                following = tokens[position + 1] if position + 1 < len(tokens) else None
+                if following is None or following.value != ",":
+                    return following.value.upper() if following is not None else None
+    return None
+
+
+def parse_sql_query(query: str) -> ParsedStatement:
+    """
+    Validate a SQL query and return it as a parsed statement.
+
+    The query is tokenized once, so keywords inside string literals or quoted
+    identifiers are never mistaken for operations and validation time is
+    linear in the length of the query.
 
     Args:
         query: The SQL query to validate
 
     Returns:
-        bool: True if safe, raises SQLSecurityError if dangerous
+        ParsedStatement: The statement's type and tokens
 
     Raises:
-        SQLSecurityError: If the query contains dangerous operations
+        SQLSecurityError: If the query is not a single read-only statement or
+            contains comments, unterminated strings or injection patterns
     """
-    # Normalize query for checking
-    normalized_query = query.upper().strip()
-
-    # List of dangerous operations
-    dangerous_patterns = [
-        r"\bDROP\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
-        r"\bDELETE\s+FROM\b",
-        r"\bTRUNCATE\s+TABLE\b",
-        r"\bEXEC(?:UTE)?\s*\(",
-        r"\bCREATE\s+(?:TABLE|DATABASE|INDEX|VIEW)\b",
-        r"\bALTER\s+TABLE\b",
-        r"\bGRANT\b",
-        r"\bREVOKE\b",
-        r"\bINSERT\s+INTO\b.*\bSELECT\b",  # Prevent INSERT...SELECT
-        r"\bUPDATE\b.*\bSET\b",
-        r";\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT)",  # Multiple statements
-    ]
-
-    for pattern in dangerous_patterns:
-        if re.search(pattern, normalized_query):
+    tokens = []
+    ended = False
+    for token in tokenize_sql(query, keep_comments=True):
+        kind, value, _ = token
+        if ended:
+            if value == ";":
+                continue
+            raise SQLSecurityError("Query contains multiple statements")
+        if kind == "keyword":
+            if value in DANGEROUS_KEYWORDS:
+                raise SQLSecurityError(f"Query contains potentially dangerous operation: {value}")
+            if value == "INTO" and tokens and tokens[-1].value == "REPLACE":
+                raise SQLSecurityError("Query contains potentially dangerous operation: REPLACE")
+        elif kind == "string" or kind == "number":
+            if kind == "string" and not _is_terminated_string(value):
+                raise SQLSecurityError("Query contains an unterminated string literal")
+            # OR followed by an always-true comparison, e.g. ' OR '1'='1
+            if len(tokens) >= 3 and tokens[-3].value == "OR" and tokens[-3].kind == "keyword":
+                if _is_tautology(tokens[-2], tokens[-1], token):
+                    raise SQLSecurityError("Query contains potential SQL injection pattern")
+        elif kind == "punctuation":
+            if value == ";":
+                ended = True
+                continue
+            # Calls such as load_extension(...)
+            callee = tokens[-1] if value == "(" and tokens else None
+            if callee is not None and callee.kind == "name" and callee.value.upper() in DANGEROUS_FUNCTIONS:
+                raise SQLSecurityError(
+                    f"Query contains potentially dangerous operation: {callee.value.upper()}"
+                )
+        elif kind == "comment":
+            raise SQLSecurityError("Query contains SQL comments which are not allowed")
+        tokens.append(token)
+
+    # A statement may be wrapped in parentheses
+    leading = next((token for token in tokens if token.value != "("), None)
+    if leading is None:
+        raise SQLSecurityError("Query is empty")
+    statement_type = leading.value.upper()
+    if statement_type not in READ_ONLY_STATEMENTS:
+        raise SQLSecurityError(
+            f"Query contains potentially dangerous operation: {statement_type}"
+        )
+    if statement_type == "PRAGMA" and not _is_read_only_pragma(tokens):
+        raise SQLSecurityError("Query contains potentially dangerous operation: PRAGMA")
+    if statement_type in ("WITH", "EXPLAIN"):
+        main_statement = _main_statement(tokens)
+        if main_statement not in READ_ONLY_MAIN_STATEMENTS:
             raise SQLSecurityError(
-                f"Query contains potentially dangerous operation: {pattern}"
+                f"Query contains potentially dangerous operation: {main_statement or statement_type}"
             )
 
-    # Check for comment injection attempts
-    if "--" in query or "/*" in query or "*/" in query:
-        raise SQLSecurityError("Query contains SQL comments which are not allowed")
+    return ParsedStatement(statement_type=statement_type, tokens=tuple(tokens))
+
+
+def validate_sql_query(query: str) -> bool:
+    """
+    Validate a SQL query to ensure it doesn't contain dangerous operations.
 
-    # Check for common injection patterns
-    injection_patterns = [
-        r"'\s*OR\s*'?1'?\s*=\s*'?1",  # 'OR 1=1
-        r'"\s*OR\s*"?1"?\s*=\s*"?1',  # "OR 1=1
-        # r"\bUNION\s+(?:ALL\s+)?SELECT\b",  # UNION SELECT - example injection pattern an llm might unintentionally try
-        r"'[^']*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)",  # SQL injection after quote and semicolon
-        r'"[^"]*\s*;\s*(?:SELECT|DROP|DELETE|UPDATE|INSERT|CREATE|ALTER|EXEC)',  # SQL injection after quote and semicolon
-    ]
+    Only a single SELECT, WITH, VALUES or EXPLAIN statement, or a PRAGMA
+    that reports on the schema, is accepted; see parse_sql_query for the
+    full set of checks.
 
-    for pattern in injection_patterns:
-        if re.search(pattern, normalized_query, re.IGNORECASE):
-            raise SQLSecurityError("Query contains potential SQL injection pattern")
+    Args:
+        query: The SQL query to validate
 
+    Returns:
+        bool: True if safe, raises SQLSecurityError if dangerous
+
+    Raises:
+        SQLSecurityError: If the query contains dangerous operations
+    """
+    parse_sql_query(query)
     return True
 
 
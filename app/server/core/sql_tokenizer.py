@@ -0,0 +1,90 @@
+"""
+Lexical tokenizer for SQLite SQL.
+
+Splits a statement into keywords, names, literals and punctuation so callers
+can reason about its structure without being fooled by string literals,
+quoted identifiers or comments. It is not a parser: it knows nothing about
+grammar beyond the token boundaries SQLite itself uses.
+"""
+
+import re
+from typing import List, NamedTuple
+
+SQL_KEYWORDS = frozenset({
+    'ABORT', 'ALL', 'ALTER', 'ANALYZE', 'AND', 'AS', 'ASC', 'ATTACH', 'BEGIN',
+    'BETWEEN', 'BY', 'CASE', 'CAST', 'COLLATE', 'COMMIT', 'CREATE', 'CROSS',
+    'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP', 'DEFAULT', 'DELETE',
+    'DESC', 'DETACH', 'DISTINCT', 'DROP', 'ELSE', 'END', 'ESCAPE', 'EXCEPT',
+    'EXISTS', 'EXPLAIN', 'FALSE', 'FILTER', 'FIRST', 'FROM', 'FULL', 'GLOB',
+    'GROUP', 'HAVING', 'IN', 'INDEX', 'INDEXED', 'INNER', 'INSERT',
+    'INTERSECT', 'INTO', 'IS', 'ISNULL', 'JOIN', 'LAST', 'LEFT', 'LIKE',
+    'LIMIT', 'MATCH', 'NATURAL', 'NOT', 'NOTNULL', 'NULL', 'NULLS', 'OFFSET',
+    'ON', 'OR', 'ORDER', 'OUTER', 'OVER', 'PARTITION', 'PRAGMA', 'RANGE',
+    'RECURSIVE', 'REGEXP', 'REINDEX', 'RELEASE', 'RENAME', 'REPLACE',
+    'RETURNING', 'RIGHT', 'ROLLBACK', 'ROWS', 'SAVEPOINT', 'SELECT', 'SET',
+    'TABLE', 'THEN', 'TRANSACTION', 'TRIGGER', 'TRUE', 'UNION', 'UPDATE',
+    'USING', 'VACUUM', 'VALUES', 'VIEW', 'WHEN', 'WHERE', 'WINDOW', 'WITH',
+})
+
+# Each match is one token with the whitespace before it
+_TOKEN_PATTERN = re.compile(r"""
+    \s*(?:
+    (?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<string>[xX]?'(?:[^']|'')*'?)
+  | (?P<quoted>"(?:[^"]|"")*"?|`(?:[^`]|``)*`?|\[[^\]]*\]?)
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_\u0080-\uffff][A-Za-z0-9_$\u0080-\uffff]*)
+  | (?P<param>\?\d*|[:@$][A-Za-z0-9_]+)
+  | (?P<operator>\|\||<<|>>|<=|>=|==|!=|<>|->>|->|[-+*/%<>=~&|])
+  | (?P<punctuation>[(),.;])
+  | (?P<other>\S)
+    )
+""", re.DOTALL | re.VERBOSE)
+
+_QUOTE_PAIRS = {'"': '"', '`': '`', '[': ']'}
+
+
+class Token(NamedTuple):
+    """
+    One lexical token.
+
+    kind is one of 'keyword', 'name', 'string', 'number', 'param',
+    'operator', 'punctuation' or 'other'. For keywords `value` is upper-cased;
+    for quoted identifiers it is the unquoted name.
+    """
+    kind: str
+    value: str
+    position: int
+
+
+def _unquote(text: str) -> str:
+    opening = text[0]
+    closing = _QUOTE_PAIRS[opening]
+    inner = text[1:-1] if len(text) > 1 and text.endswith(closing) else text[1:]
+    return inner if opening == '[' else inner.replace(closing * 2, closing)
+
+
+def tokenize_sql(sql: str, keep_comments: bool = False) -> List[Token]:
+    """
+    Split SQL into tokens, dropping whitespace (and comments by default).
+
+    Unterminated strings, quoted identifiers and block comments run to the
+    end of the input, like SQLite reads them before reporting the error.
+    """
+    tokens = []
+    append = tokens.append
+    for match in _TOKEN_PATTERN.finditer(sql):
+        kind = match.lastgroup
+        text = match.group(kind)
+        position = match.start(kind)
+        if kind == 'word':
+            upper = text.upper()
+            if upper in SQL_KEYWORDS:
+                append(Token('keyword', upper, position))
+            else:
+                append(Token('name', text, position))
+        elif kind == 'quoted':
+            append(Token('name', _unquote(text), position))
+        elif kind != 'comment' or keep_comments:
+            append(Token(kind, text, position))
+    return tokens
@@ -0,0 +1,282 @@
+"""
+Streaming table export for the Natural Language SQL Interface.
+
+Rows are pulled from the cursor with fetchmany() and encoded one batch at a
+time, so exporting a table uses memory proportional to EXPORT_BATCH_SIZE
+rather than to the table, and the first bytes are sent as soon as the first
+batch is read.
+
+Supported formats are CSV, JSON Lines and Parquet. Parquet needs the optional
+pyarrow package. Any format can be gzip-compressed on the fly.
+
+Settings are read from the environment:
+- EXPORT_BATCH_SIZE: rows read and encoded per chunk (default 5000)
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .connection_pool import get_connection
+from .sql_security import execute_query_safely
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_FORMATS: Dict[str, Dict[str, str]] = {
+    'csv': {'extension': 'csv', 'media_type': 'text/csv'},
+    'jsonl': {'extension': 'jsonl', 'media_type': 'application/x-ndjson'},
+    'parquet': {'extension': 'parquet', 'media_type': 'application/vnd.apache.parquet'},
+}
+
+Batches = Iterator[Tuple[List[str], List[tuple]]]
+
+
+def iter_table_batches(table_name: str, batch_size: Optional[int] = None) -> Batches:
+    """
+    Read a validated table in batches of row tuples.
+
+    Yields:
+        (columns, rows) tuples; the first batch is yielded even when the
+        table is empty so encoders can still write a header
+    """
+    batch_size = batch_size or EXPORT_BATCH_SIZE
+
+    with get_connection(read_only=True) as conn:
+        # Execute SELECT * FROM table using safe query execution
+        cursor = execute_query_safely(
+            conn,
+            "SELECT * FROM {table}",
+            identifier_params={'table': table_name}
+        )
+
+        # Get column names from cursor description
+        columns = [description[0] for description in cursor.description]
+
+        first = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows and not first:
+                break
+            first = False
+            yield columns, rows
+            if len(rows) < batch_size:
+                break
+
+
+def read_column_types(table_name: str) -> Dict[str, Tuple[str, frozenset]]:
+    """
+    Get each column's declared SQLite type and the storage classes its
+    values actually use, e.g. ('INTEGER', {'integer', 'text'})
+
+    A column can hold any type whatever it was declared as (CSV uploads keep
+    text found in a numeric column), so exporters that need one type per
+    column must look at the values. All columns are checked in one scan.
+    """
+    with get_connection(read_only=True) as conn:
+        cursor = execute_query_safely(
+            conn,
+            "PRAGMA table_info({table})",
+            identifier_params={'table': table_name}
+        )
+        declared = {row[1]: (row[2] or '').upper() for row in cursor.fetchall()}
+        if not declared:
+            return {}
+
+        # Uploaded column names are quoted like the ingestion DDL quotes them
+        select_list = ", ".join(
+            "GROUP_CONCAT(DISTINCT typeof(\"{0}\"))".format(column.replace('"', '""'))
+            for column in declared
+        )
+        cursor = execute_query_safely(
+            conn,
+            f"SELECT {select_list} FROM {{table}}",
+            identifier_params={'table': table_name}
+        )
+        found = cursor.fetchone()
+
+    return {
+        column: (declared_type, frozenset((classes or '').split(',')) - {'', 'null'})
+        for (column, declared_type), classes in zip(declared.items(), found)
+    }
+
+
+def encode_csv(batches: Batches) -> Iterator[bytes]:
+    """
+    Encode batches as CSV, header first
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header_written = False
+    for columns, rows in batches:
+        if not header_written:
+            writer.writerow(columns)
+            header_written = True
+        writer.writerows(rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def encode_jsonl(batches: Batches) -> Iterator[bytes]:
+    """
+    Encode batches as JSON Lines, one object per row
+    """
+    for columns, rows in batches:
+        lines = [json.dumps(dict(zip(columns, row)), default=str) for row in rows]
+        if lines:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _arrow_type(declared_type: str, storage_classes: frozenset) -> Any:
+    import pyarrow as pa
+
+    if storage_classes == {'integer'}:
+        return pa.int64()
+    if storage_classes and storage_classes <= {'integer', 'real'}:
+        return pa.float64()
+    if storage_classes == {'blob'}:
+        return pa.binary()
+    if storage_classes:
+        # Mixed text, numbers or blobs: keep every value as text
+        return pa.string()
+
+    # No values to go by: follow SQLite's type affinity rules
+    if 'INT' in declared_type:
+        return pa.int64()
+    if 'REAL' in declared_type or 'FLOA' in declared_type or 'DOUB' in declared_type:
+        return pa.float64()
+    if 'BLOB' in declared_type:
+        return pa.binary()
+    return pa.string()
+
+
+def read_parquet_schema(table_name: str) -> Any:
+    """
+    Build the Arrow schema for exporting a validated table from the values
+    it holds (blocking; one scan of the table)
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    import pyarrow as pa
+
+    return pa.schema([
+        (column, _arrow_type(declared_type, storage_classes))
+        for column, (declared_type, storage_classes) in read_column_types(table_name).items()
+    ])
+
+
+def _arrow_array(values: List[Any], arrow_type: Any) -> Any:
+    import pyarrow as pa
+
+    if pa.types.is_string(arrow_type):
+        values = [value if value is None or isinstance(value, str) else str(value) for value in values]
+    elif pa.types.is_floating(arrow_type):
+        values = [float(value) if isinstance(value, int) else value for value in values]
+    return pa.array(values, type=arrow_type)
+
+
+def encode_parquet(batches: Batches, schema: Any) -> Iterator[bytes]:
+    """
+    Encode batches as Parquet, one row group per batch.
+
+    SQLite columns are dynamically typed, so the Arrow schema has to be
+    built from the values the table actually holds (read_parquet_schema()) before
+    the first byte is written: a row group cannot change a column's type.
+
+    Raises:
+        ImportError: If pyarrow is not installed
+        ValueError: If a value does not fit the schema, e.g. the table was
+            written to after the schema was read
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = io.BytesIO()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for columns, rows in batches:
+            arrays = []
+            for index, field in enumerate(schema):
+                values = [row[index] for row in rows]
+                try:
+                    arrays.append(_arrow_array(values, field.type))
+                except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+                    raise ValueError(f"Column '{field.name}' no longer matches its {field.type} export type: {e}")
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+
+            yield sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+    finally:
+        writer.close()
+    yield sink.getvalue()
+
+
+def gzip_chunks(chunks: Iterator[bytes], level: int = 6) -> Iterator[bytes]:
+    """
+    Gzip-compress a stream of chunks on the fly
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_table_chunks(
+    table_name: str,
+    export_format: str = 'csv',
+    compress: bool = False,
+    batch_size: Optional[int] = None,
+    parquet_table_schema: Optional[Any] = None
+) -> Iterator[bytes]:
+    """
+    Stream a validated table as encoded (and optionally gzipped) chunks.
+
+    Args:
+        table_name: Name of an existing, validated table
+        export_format: One of EXPORT_FORMATS
+        compress: Gzip the output
+        batch_size: Rows per chunk; defaults to EXPORT_BATCH_SIZE
+        parquet_table_schema: Arrow schema for Parquet; read from the table
+            when not given. Pass one from read_parquet_schema() to find
+            unexportable columns before any bytes are sent
+
+    Returns:
+        Generator of bytes chunks; the pooled connection is held until it is
+        exhausted or closed
+    """
+    batches = iter_table_batches(table_name, batch_size)
+    if export_format == 'csv':
+        chunks = encode_csv(batches)
+    elif export_format == 'jsonl':
+        chunks = encode_jsonl(batches)
+    elif export_format == 'parquet':
+        chunks = encode_parquet(batches, parquet_table_schema or read_parquet_schema(table_name))
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    if compress:
+        chunks = gzip_chunks(chunks)
+    try:
+        for chunk in chunks:
+            if chunk:
+                yield chunk
+    finally:
+        # Release the pooled connection even if the client went away
+        chunks.close()
+        batches.close()
+
+
+def parquet_available() -> bool:
+    """Whether the optional pyarrow dependency for Parquet export is installed"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
@@ -1,9 +1,13 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException, Header, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from datetime import datetime
+from typing import Awaitable, Optional, TypeVar
+import asyncio
 import os
-import sqlite3
+import json
+import time
 import traceback
 from dotenv import load_dotenv
 import logging
@@ -11,10 +15,16 @@ import sys
 import csv
 from io import StringIO
 
-from core.data_models import (
+# Load .env file from server directory before core modules read their settings;
+# the core imports below must therefore follow it (E402)
+load_dotenv()
+
+from core.data_models import (  # noqa: E402
     FileUploadResponse,
     QueryRequest,
     QueryResponse,
+    QueryPageRequest,
+    QueryBatchRequest,
     DatabaseSchemaResponse,
     InsightsRequest,
     InsightsResponse,
@@ -22,22 +32,59 @@ from core.data_models import (
     TableSchema,
     ColumnInfo,
     RandomQueryResponse,
-    ExportResultsRequest
+    ExportResultsRequest,
+    CacheStats,
+    MetricsResponse,
+    IndexAdvisorStats,
+    LatencyStats,
+    HedgingStats,
+    CoalescingStats,
+    AdmissionStats,
+    IndexInfo,
+    IndexListResponse
+)
+from core.file_processor import convert_csv_stream_to_sqlite, convert_json_to_sqlite, convert_jsonl_stream_to_sqlite  # noqa: E402
+from core.llm_processor import generate_sql, generate_random_query, resolve_random_query_provider, resolve_sql_provider  # noqa: E402
+from core.admission import AdmissionRejected, admission_stats, run_llm_admitted  # noqa: E402
+from core.llm_hedging import generate_sql_hedged, hedge_stats, hedging_available  # noqa: E402
+from core.latency_histogram import latency_stats  # noqa: E402
+from core.sql_processor import (  # noqa: E402
+    execute_sql_safely,
+    execute_sql_page,
+    iter_sql_batches,
+    encode_query_cursor,
+    decode_query_cursor,
+    QUERY_PAGE_SIZE,
+    MAX_QUERY_PAGE_SIZE
 )
-from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite, convert_jsonl_to_sqlite
-from core.llm_processor import generate_sql, generate_random_query
-from core.sql_processor import execute_sql_safely, get_database_schema
-from core.insights import generate_insights
-from core.sql_security import (
+from core.insights import generate_insights  # noqa: E402
+from core.column_stats import is_internal_table, delete_column_stats, insights_from_stats  # noqa: E402
+from core.index_advisor import get_index_advisor  # noqa: E402
+from core.query_planner import check_query_cost  # noqa: E402
+from core.query_deadline import (  # noqa: E402
+    QueryCancelled,
+    QueryDeadline,
+    QueryTimeout,
+    QUERY_TIMEOUT_SECONDS,
+    QUERY_PAGE_TIMEOUT_SECONDS,
+    QUERY_STREAM_TIMEOUT_SECONDS
+)
+from core.connection_pool import DATABASE_PATH, get_connection, close_all_pools  # noqa: E402
+from core.executors import run_db, run_db_low_priority, iterate_db, shutdown_executors  # noqa: E402
+from core.schema_catalog import get_schema_catalog, close_all_catalogs  # noqa: E402
+from core.table_export import EXPORT_FORMATS, export_table_chunks, parquet_available, read_parquet_schema  # noqa: E402
+from core.sql_cache import get_sql_cache, schema_fingerprint  # noqa: E402
+from core.llm_clients import close_llm_clients  # noqa: E402
+from core.result_cache import get_result_cache  # noqa: E402
+from core.single_flight import SingleFlight  # noqa: E402
+from core.query_cursors import get_query_cursors  # noqa: E402
+from core.sql_security import (  # noqa: E402
     execute_query_safely,
     validate_identifier,
     check_table_exists,
     SQLSecurityError
 )
 
-# Load .env file from server directory
-load_dotenv()
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -50,10 +97,23 @@ logging.basicConfig(
 # Create logger for this module
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release shared resources when the server shuts down"""
+    yield
+    shutdown_executors()
+    close_llm_clients()
+    get_sql_cache().close()
+    get_result_cache().close()
+    get_query_cursors().close()
+    close_all_catalogs()
+    close_all_pools()
+
 app = FastAPI(
     title="Natural Language SQL Interface",
     description="Convert natural language to SQL queries",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for frontend
@@ -65,11 +125,70 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected) -> JSONResponse:
+    """Refuse quickly with 429/503 and Retry-After when an LLM provider is saturated"""
+    logger.error(f"[ERROR] Request refused by admission control: {str(exc)}")
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={'detail': str(exc), 'error': str(exc)},
+        headers={'Retry-After': exc.retry_after_header}
+    )
+
 # Global app state
 app_start_time = datetime.now()
 
+# Accept header value that opts /api/query into columnar results
+COLUMNAR_MEDIA_TYPE = "application/vnd.nlsql.columnar+json"
+
+# How often a running query checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Size of a /api/query/batch request and how many of its queries run at once
+QUERY_BATCH_MAX_QUERIES = int(os.environ.get("QUERY_BATCH_MAX_QUERIES", "100"))
+QUERY_BATCH_CONCURRENCY = int(os.environ.get("QUERY_BATCH_CONCURRENCY", "8"))
+
+T = TypeVar("T")
+
+# Identical /api/query requests in flight at the same time share one answer
+query_flight = SingleFlight()
+
 # Ensure database directory exists
-os.makedirs("db", exist_ok=True)
+os.makedirs(os.path.dirname(DATABASE_PATH) or ".", exist_ok=True)
+
+def list_tables() -> list:
+    """List user table names, hiding internal tables (blocking; run through run_db)"""
+    with get_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
+        return [row for row in cursor.fetchall() if not is_internal_table(row[0])]
+
+def table_exists(table_name: str) -> bool:
+    """Check whether a user table exists (blocking; run through run_db)"""
+    if is_internal_table(table_name):
+        return False
+    with get_connection(read_only=True) as conn:
+        return check_table_exists(conn, table_name)
+
+def drop_table(table_name: str) -> bool:
+    """Drop a validated table; returns False if it does not exist (blocking; run through run_db)"""
+    if is_internal_table(table_name):
+        return False
+    with get_connection() as conn:
+        # Check if table exists using secure method
+        if not check_table_exists(conn, table_name):
+            return False
+        
+        # Drop the table using safe query execution with DDL permission
+        execute_query_safely(
+            conn,
+            "DROP TABLE IF EXISTS {table}",
+            identifier_params={'table': table_name},
+            allow_ddl=True
+        )
+        delete_column_stats(conn, table_name)
+        conn.commit()
+    return True
 
 @app.post("/api/upload", response_model=FileUploadResponse)
 async def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
@@ -82,22 +201,35 @@ async def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
         # Generate table name from filename
         table_name = file.filename.rsplit('.', 1)[0].lower().replace(' ', '_')
         
-        # Read file content
-        content = await file.read()
-        
         # Convert to SQLite based on file type
         if file.filename.endswith('.csv'):
-            result = convert_csv_to_sqlite(content, table_name)
+            # Stream the upload in fixed-size chunks instead of reading it whole
+            result = await run_db(convert_csv_stream_to_sqlite, file.file, table_name)
         elif file.filename.endswith('.jsonl'):
-            result = convert_jsonl_to_sqlite(content, table_name)
+            result = await run_db(convert_jsonl_stream_to_sqlite, file.file, table_name)
         else:
-            result = convert_json_to_sqlite(content, table_name)
+            content = await file.read()
+            result = await run_db(convert_json_to_sqlite, content, table_name)
+        
+        # Register the new table and its ingestion-time statistics without rescanning it
+        await run_db(
+            get_schema_catalog().register_table,
+            result['table_name'],
+            result['schema'],
+            result['row_count'],
+            result.get('column_stats')
+        )
+        # Usage counted against the replaced table no longer applies
+        get_index_advisor().forget_table(result['table_name'])
+        # Nor do results computed from it
+        await run_db(get_result_cache().bump_table, result['table_name'])
         
         response = FileUploadResponse(
             table_name=result['table_name'],
             table_schema=result['schema'],
             row_count=result['row_count'],
-            sample_data=result['sample_data']
+            sample_data=result['sample_data'],
+            rows_per_second=result.get('rows_per_second')
         )
         logger.info(f"[SUCCESS] File upload: {response}")
         return response
@@ -112,50 +244,404 @@ async def upload_file(file: UploadFile = File(...)) -> FileUploadResponse:
             error=str(e)
         )
 
+async def generate_sql_cached(request: QueryRequest, schema_info: dict) -> tuple:
+    """
+    Generate SQL for a request, reusing SQL generated earlier for the same
+    question against the same schema.
+    
+    Returns:
+        (sql, cache_key, from_cache); cache_key is None when the result must
+        not be cached
+    """
+    sql_cache = get_sql_cache()
+    cache_key = None
+    if 'error' not in schema_info:
+        cache_key = sql_cache.make_key(request.query, resolve_sql_provider(request), schema_fingerprint(schema_info))
+    sql = await run_db(sql_cache.get, cache_key) if cache_key else None
+    if sql is not None:
+        return sql, cache_key, True
+    
+    if hedging_available():
+        sql = await generate_sql_hedged(request, schema_info)
+    else:
+        sql = await run_llm_admitted(resolve_sql_provider(request), generate_sql, request, schema_info)
+    return sql, cache_key, False
+
+def ndjson_line(event: dict) -> str:
+    """Serialize one NDJSON event"""
+    return json.dumps(event, default=str) + "\n"
+
+async def cancel_on_disconnect(http_request: Request, deadline: QueryDeadline, call: Awaitable[T]) -> T:
+    """Await a database call, cancelling its query if the client disconnects first"""
+    async def watch():
+        while not await http_request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        deadline.cancel()
+    
+    watcher = asyncio.create_task(watch())
+    try:
+        return await call
+    finally:
+        watcher.cancel()
+
+async def until_disconnect(http_request: Request, call: Awaitable[T]) -> T:
+    """
+    Await a call, cancelling it if the client disconnects first
+
+    Raises:
+        QueryCancelled: If the client disconnected
+    """
+    task = asyncio.ensure_future(call)
+    disconnected = False
+    
+    async def watch():
+        nonlocal disconnected
+        while not await http_request.is_disconnected():
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+        disconnected = True
+        task.cancel()
+    
+    watcher = asyncio.create_task(watch())
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if disconnected:
+            raise QueryCancelled("Client disconnected")
+        raise
+    finally:
+        watcher.cancel()
+
+def negotiate_result_format(request: QueryRequest, accept: Optional[str]) -> str:
+    """Pick rows or columnar results from the request field, then the Accept header"""
+    if request.result_format:
+        return request.result_format
+    if accept and COLUMNAR_MEDIA_TYPE in accept:
+        return "columnar"
+    return "rows"
+
+async def answer_query(request: QueryRequest, schema_info: dict, result_format: str) -> QueryResponse:
+    """
+    Generate and run SQL for one natural language query against an already
+    fetched schema. Cancelling the call interrupts the running query.
+    
+    Raises:
+        QueryTimeout: If the query ran past its deadline
+        Exception: If generation, the cost guard or execution failed
+    """
+    # Generate SQL using routing logic, reusing earlier SQL when possible
+    sql, cache_key, from_cache = await generate_sql_cached(request, schema_info)
+    
+    # Queueing for a worker counts against the deadline
+    deadline = QueryDeadline(QUERY_TIMEOUT_SECONDS)
+    start_time = datetime.now()
+    
+    # Reuse the outcome of the same SQL run against the same data
+    result_cache = get_result_cache()
+    result_key, result_tables = result_cache.make_key(sql, result_format)
+    run = await run_db(result_cache.get, result_key) if result_key else None
+    result_cached = run is not None
+    
+    if not result_cached:
+        # Check the query plan against the cost budgets before running it
+        decision = await run_db(check_query_cost, sql, schema_info)
+        if decision.action == "reject":
+            raise Exception(decision.reason)
+        run_query = run_db_low_priority if decision.low_priority else run_db
+        
+        # Execute SQL query
+        try:
+            result = await run_query(execute_sql_safely, decision.sql, columnar=result_format == "columnar", deadline=deadline)
+        except asyncio.CancelledError:
+            deadline.cancel()
+            raise
+        
+        if result.get('timed_out'):
+            raise QueryTimeout(result['error'])
+        if result['error']:
+            raise Exception(result['error'])
+        
+        run = {
+            'sql': decision.sql,
+            'result': result,
+            'cost_action': decision.action,
+            'row_limit': decision.row_limit,
+            'estimated_cost': decision.estimate.rows_visited if decision.estimate else None
+        }
+        if result_key:
+            await run_db(result_cache.put, result_key, run, result_tables)
+    execution_time = (datetime.now() - start_time).total_seconds() * 1000
+    result = run['result']
+    
+    # Only cache SQL that actually ran
+    if cache_key and not from_cache:
+        await run_db(get_sql_cache().put, cache_key, sql)
+    
+    if result_format == "columnar":
+        column_data = result['column_data']
+        row_count = len(column_data[0]) if column_data else 0
+    else:
+        column_data = None
+        row_count = len(result['results'])
+    
+    # Rows cut off by the result cap or the cost guard's LIMIT can be
+    # fetched page by page, continuing the query as generated
+    truncated = result.get('truncated', False) or (
+        run['cost_action'] == "limit" and row_count >= run['row_limit']
+    )
+    
+    response = QueryResponse(
+        sql=run['sql'],
+        results=result['results'],
+        columns=result['columns'],
+        row_count=row_count,
+        execution_time_ms=execution_time,
+        result_format=result_format,
+        column_data=column_data,
+        estimated_cost=run['estimated_cost'],
+        row_limit=run['row_limit'],
+        truncated=truncated,
+        next_cursor=encode_query_cursor(sql, row_count) if truncated else None
+    )
+    logger.info(f"[SUCCESS] Query processed: SQL={run['sql']}, rows={row_count}, format={result_format}, time={execution_time}ms, cached={from_cache}, result_cached={result_cached}, cost_action={run['cost_action']}, truncated={truncated}")
+    return response
+
+async def answer_query_coalesced(request: QueryRequest, schema_info: dict, result_format: str) -> QueryResponse:
+    """
+    answer_query(), shared with identical requests already in flight: the
+    same question (after normalization) for the same provider, schema and
+    result format costs one LLM call and one query however many clients ask
+    """
+    if 'error' in schema_info:
+        return await answer_query(request, schema_info, result_format)
+    key = (
+        get_sql_cache().make_key(request.query, resolve_sql_provider(request), schema_fingerprint(schema_info)),
+        result_format
+    )
+    response, shared = await query_flight.do(key, lambda: answer_query(request, schema_info, result_format))
+    if shared:
+        logger.info(f"[SUCCESS] Query coalesced with an identical in-flight request: SQL={response.sql}")
+    return response
+
+def query_error_response(e: Exception) -> QueryResponse:
+    """Build the QueryResponse reported for a failed query"""
+    return QueryResponse(
+        sql="",
+        results=[],
+        columns=[],
+        row_count=0,
+        execution_time_ms=0,
+        timed_out=isinstance(e, QueryTimeout),
+        error=str(e)
+    )
+
 @app.post("/api/query", response_model=QueryResponse)
-async def process_natural_language_query(request: QueryRequest) -> QueryResponse:
+async def process_natural_language_query(
+    request: QueryRequest,
+    http_request: Request,
+    accept: Optional[str] = Header(None)
+) -> QueryResponse:
     """Process natural language query and return SQL results"""
     try:
+        result_format = negotiate_result_format(request, accept)
+        
         # Get database schema
-        schema_info = get_database_schema()
+        schema_info = await run_db(get_schema_catalog().get_schema)
         
-        # Generate SQL using routing logic
-        sql = generate_sql(request, schema_info)
+        # A disconnect stops waiting; the query is interrupted unless other
+        # requests are waiting for it too
+        return await until_disconnect(http_request, answer_query_coalesced(request, schema_info, result_format))
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        logger.error(f"[ERROR] Query processing failed: {str(e)}")
+        logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+        return query_error_response(e)
+
+@app.post("/api/query/stream")
+async def stream_natural_language_query(request: QueryRequest) -> StreamingResponse:
+    """Process natural language query and stream the results as NDJSON"""
+    
+    def error_event(e: Exception) -> str:
+        logger.error(f"[ERROR] Query streaming failed: {str(e)}")
+        logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+        return ndjson_line({'type': 'error', 'error': str(e), 'timed_out': isinstance(e, QueryTimeout)})
+    
+    # SQL is generated before the response starts, so a refused LLM call is
+    # answered with its status and Retry-After instead of an error event
+    try:
+        schema_info = await run_db(get_schema_catalog().get_schema)
+        sql, cache_key, from_cache = await generate_sql_cached(request, schema_info)
         
-        # Execute SQL query
+        # Batches bound the output, so the guard's LIMIT is not applied, but
+        # runaway plans are still refused and expensive ones run at low priority
+        decision = await run_db(check_query_cost, sql, schema_info)
+        if decision.action == "reject":
+            raise Exception(decision.reason)
+    except AdmissionRejected:
+        raise
+    except Exception as e:
+        return StreamingResponse(iter([error_event(e)]), media_type="application/x-ndjson")
+    
+    async def events():
+        try:
+            # Rows are pulled from the cursor batch by batch as the client reads;
+            # a disconnect stops the stream and interrupts the running statement
+            deadline = QueryDeadline(QUERY_STREAM_TIMEOUT_SECONDS)
+            start_time = time.perf_counter()
+            row_count = 0
+            meta_sent = False
+            batches = iter_sql_batches(sql, deadline=deadline)
+            async for columns, rows in iterate_db(batches, cancel=deadline.cancel, low_priority=decision.low_priority):
+                if not meta_sent:
+                    yield ndjson_line({'type': 'meta', 'sql': sql, 'columns': columns})
+                    meta_sent = True
+                if rows:
+                    row_count += len(rows)
+                    yield ndjson_line({'type': 'rows', 'rows': rows})
+            execution_time = (time.perf_counter() - start_time) * 1000
+            
+            if cache_key and not from_cache:
+                await run_db(get_sql_cache().put, cache_key, sql)
+            
+            yield ndjson_line({'type': 'end', 'row_count': row_count, 'execution_time_ms': execution_time})
+            logger.info(f"[SUCCESS] Query streamed: SQL={sql}, rows={row_count}, time={execution_time}ms")
+        except Exception as e:
+            yield error_event(e)
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/query/batch")
+async def batch_natural_language_query(request: QueryBatchRequest) -> StreamingResponse:
+    """
+    Process several natural language queries and stream each result as an
+    NDJSON line as soon as it is ready
+    """
+    if len(request.queries) > QUERY_BATCH_MAX_QUERIES:
+        raise HTTPException(400, f"A batch can hold at most {QUERY_BATCH_MAX_QUERIES} queries")
+    result_format = request.result_format or "rows"
+    
+    async def answer(index: int, schema_info: dict, limit: asyncio.Semaphore) -> tuple:
+        async with limit:
+            query_request = QueryRequest(
+                query=request.queries[index],
+                llm_provider=request.llm_provider,
+                result_format=result_format
+            )
+            try:
+                response = await answer_query_coalesced(query_request, schema_info, result_format)
+            except Exception as e:
+                logger.error(f"[ERROR] Batch query {index} failed: {str(e)}")
+                logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+                response = query_error_response(e)
+            return index, response
+    
+    async def events():
+        try:
+            # One schema fetch serves the whole batch; SQL generation and
+            # execution then run for up to QUERY_BATCH_CONCURRENCY queries at once
+            start_time = time.perf_counter()
+            schema_info = await run_db(get_schema_catalog().get_schema)
+            limit = asyncio.Semaphore(QUERY_BATCH_CONCURRENCY)
+            tasks = [asyncio.create_task(answer(index, schema_info, limit)) for index in range(len(request.queries))]
+            error_count = 0
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    index, response = await next_result
+                    error_count += response.error is not None
+                    yield ndjson_line({
+                        'type': 'result',
+                        'index': index,
+                        'query': request.queries[index],
+                        **response.model_dump()
+                    })
+            finally:
+                # The client went away: stop the queries still running
+                for task in tasks:
+                    task.cancel()
+            execution_time = (time.perf_counter() - start_time) * 1000
+            
+            yield ndjson_line({
+                'type': 'end',
+                'query_count': len(tasks),
+                'error_count': error_count,
+                'execution_time_ms': execution_time
+            })
+            logger.info(f"[SUCCESS] Query batch processed: queries={len(tasks)}, errors={error_count}, time={execution_time}ms")
+        except Exception as e:
+            logger.error(f"[ERROR] Query batch failed: {str(e)}")
+            logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+            yield ndjson_line({'type': 'error', 'error': str(e)})
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/api/query/page", response_model=QueryResponse)
+async def query_page(request: QueryPageRequest, http_request: Request) -> QueryResponse:
+    """Process natural language query one page at a time using continuation tokens"""
+    try:
+        page_size = min(request.page_size or QUERY_PAGE_SIZE, MAX_QUERY_PAGE_SIZE)
+        cache_key = None
+        from_cache = True
+        cursor_id = None
+        
+        if request.cursor:
+            # Continue a query started by an earlier page
+            sql, offset, cursor_id = decode_query_cursor(request.cursor)
+            schema_info = await run_db(get_schema_catalog().get_schema)
+        elif request.query:
+            schema_info = await run_db(get_schema_catalog().get_schema)
+            query_request = QueryRequest(query=request.query, llm_provider=request.llm_provider)
+            sql, cache_key, from_cache = await generate_sql_cached(query_request, schema_info)
+            offset = 0
+        else:
+            raise HTTPException(400, "Either query or cursor is required")
+        
+        # Pages bound the output, so the guard's LIMIT is not applied, but
+        # runaway plans are still refused and expensive ones run at low priority
+        decision = await run_db(check_query_cost, sql, schema_info)
+        if decision.action == "reject":
+            raise Exception(decision.reason)
+        run_query = run_db_low_priority if decision.low_priority else run_db
+        
+        deadline = QueryDeadline(QUERY_PAGE_TIMEOUT_SECONDS)
         start_time = datetime.now()
-        result = execute_sql_safely(sql)
+        result = await cancel_on_disconnect(
+            http_request,
+            deadline,
+            run_query(execute_sql_page, sql, offset, page_size, deadline=deadline, cursor_id=cursor_id)
+        )
         execution_time = (datetime.now() - start_time).total_seconds() * 1000
         
+        if result.get('timed_out'):
+            raise QueryTimeout(result['error'])
         if result['error']:
             raise Exception(result['error'])
         
+        if cache_key and not from_cache:
+            await run_db(get_sql_cache().put, cache_key, sql)
+        
+        row_count = len(result['results'])
         response = QueryResponse(
             sql=sql,
             results=result['results'],
             columns=result['columns'],
-            row_count=len(result['results']),
-            execution_time_ms=execution_time
+            row_count=row_count,
+            execution_time_ms=execution_time,
+            next_cursor=encode_query_cursor(sql, offset + row_count, result['cursor_id']) if result['has_more'] else None
         )
-        logger.info(f"[SUCCESS] Query processed: SQL={sql}, rows={len(result['results'])}, time={execution_time}ms")
+        logger.info(f"[SUCCESS] Query page processed: SQL={sql}, offset={offset}, rows={row_count}, time={execution_time}ms")
         return response
+    except (HTTPException, AdmissionRejected):
+        raise
     except Exception as e:
-        logger.error(f"[ERROR] Query processing failed: {str(e)}")
+        logger.error(f"[ERROR] Query page failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
-        return QueryResponse(
-            sql="",
-            results=[],
-            columns=[],
-            row_count=0,
-            execution_time_ms=0,
-            error=str(e)
-        )
+        return query_error_response(e)
 
 @app.get("/api/schema", response_model=DatabaseSchemaResponse)
 async def get_database_schema_endpoint() -> DatabaseSchemaResponse:
     """Get current database schema and table information"""
     try:
-        schema = get_database_schema()
+        schema = await run_db(get_schema_catalog().get_schema)
         tables = []
         
         for table_name, table_info in schema['tables'].items():
@@ -194,13 +680,26 @@ async def get_database_schema_endpoint() -> DatabaseSchemaResponse:
 async def generate_insights_endpoint(request: InsightsRequest) -> InsightsResponse:
     """Generate statistical insights for table columns"""
     try:
-        insights = generate_insights(request.table_name, request.column_names)
+        # Answer from the statistics persisted at ingestion when they are current
+        schema = await run_db(get_schema_catalog().get_schema)
+        table_info = schema['tables'].get(request.table_name, {})
+        insights = insights_from_stats(
+            table_info.get('column_stats'),
+            table_info.get('row_count'),
+            request.column_names,
+            request.approximate
+        )
+        source = "stored"
+        if insights is None:
+            insights = await run_db(generate_insights, request.table_name, request.column_names, approximate=request.approximate)
+            source = "computed"
+        
         response = InsightsResponse(
             table_name=request.table_name,
             insights=insights,
             generated_at=datetime.now()
         )
-        logger.info(f"[SUCCESS] Insights generated for table: {request.table_name}, insights count: {len(insights)}")
+        logger.info(f"[SUCCESS] Insights generated for table: {request.table_name}, insights count: {len(insights)}, approximate={request.approximate}, source={source}")
         return response
     except Exception as e:
         logger.error(f"[ERROR] Insights generation failed: {str(e)}")
@@ -217,7 +716,7 @@ async def generate_random_query_endpoint() -> RandomQueryResponse:
     """Generate a random natural language query based on database schema"""
     try:
         # Get database schema
-        schema_info = get_database_schema()
+        schema_info = await run_db(get_schema_catalog().get_schema)
         
         # Check if there are any tables
         if not schema_info.get('tables'):
@@ -227,11 +726,15 @@ async def generate_random_query_endpoint() -> RandomQueryResponse:
             )
         
         # Generate random query using LLM
-        random_query = generate_random_query(schema_info)
+        # Without an API key the call fails before reaching any provider
+        provider = resolve_random_query_provider() or "openai"
+        random_query = await run_llm_admitted(provider, generate_random_query, schema_info)
         
         response = RandomQueryResponse(query=random_query)
         logger.info(f"[SUCCESS] Random query generated: {random_query}")
         return response
+    except AdmissionRejected:
+        raise
     except Exception as e:
         logger.error(f"[ERROR] Random query generation failed: {str(e)}")
         logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
@@ -245,11 +748,7 @@ async def health_check() -> HealthCheckResponse:
     """Health check endpoint with database status"""
     try:
         # Check database connection
-        conn = sqlite3.connect("db/database.db")
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")
-        tables = cursor.fetchall()
-        conn.close()
+        tables = await run_db(list_tables)
         
         uptime = (datetime.now() - app_start_time).total_seconds()
         
@@ -271,6 +770,53 @@ async def health_check() -> HealthCheckResponse:
             uptime_seconds=0
         )
 
+@app.get("/api/metrics", response_model=MetricsResponse)
+async def metrics() -> MetricsResponse:
+    """Runtime metrics such as generated SQL cache hit rates"""
+    uptime = (datetime.now() - app_start_time).total_seconds()
+    response = MetricsResponse(
+        sql_cache=CacheStats(**get_sql_cache().stats()),
+        result_cache=CacheStats(**get_result_cache().stats()),
+        index_advisor=IndexAdvisorStats(**get_index_advisor().stats()),
+        latency={name: LatencyStats(**stats) for name, stats in latency_stats().items()},
+        llm_hedging=HedgingStats(**hedge_stats.stats()),
+        query_coalescing=CoalescingStats(**query_flight.stats()),
+        llm_admission={provider: AdmissionStats(**stats) for provider, stats in admission_stats().items()},
+        uptime_seconds=uptime
+    )
+    logger.info(f"[SUCCESS] Metrics retrieved: sql_cache_hit_rate={response.sql_cache.hit_rate:.2f}, result_cache_hit_rate={response.result_cache.hit_rate:.2f}")
+    return response
+
+@app.get("/api/indexes", response_model=IndexListResponse)
+async def list_indexes() -> IndexListResponse:
+    """List the indexes built automatically by the index advisor"""
+    try:
+        indexes = await run_db(get_index_advisor().list_indexes)
+        response = IndexListResponse(indexes=[IndexInfo(**index) for index in indexes])
+        logger.info(f"[SUCCESS] Indexes listed: {len(indexes)} advisor indexes")
+        return response
+    except Exception as e:
+        logger.error(f"[ERROR] Index listing failed: {str(e)}")
+        logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+        return IndexListResponse(indexes=[], error=str(e))
+
+@app.delete("/api/indexes/{index_name}")
+async def drop_index(index_name: str):
+    """Drop an index built by the index advisor"""
+    try:
+        if not await run_db(get_index_advisor().drop_index, index_name):
+            raise HTTPException(404, f"Advisor index '{index_name}' not found")
+        
+        response = {"message": f"Index '{index_name}' dropped successfully"}
+        logger.info(f"[SUCCESS] Index dropped: {index_name}")
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"[ERROR] Index drop failed: {str(e)}")
+        logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+        raise HTTPException(500, f"Error dropping index: {str(e)}")
+
 @app.delete("/api/table/{table_name}")
 async def delete_table(table_name: str):
     """Delete a table from the database"""
@@ -281,22 +827,11 @@ async def delete_table(table_name: str):
         except SQLSecurityError as e:
             raise HTTPException(400, str(e))
         
-        conn = sqlite3.connect("db/database.db")
-        
-        # Check if table exists using secure method
-        if not check_table_exists(conn, table_name):
-            conn.close()
+        if not await run_db(drop_table, table_name):
             raise HTTPException(404, f"Table '{table_name}' not found")
-        
-        # Drop the table using safe query execution with DDL permission
-        execute_query_safely(
-            conn,
-            "DROP TABLE IF EXISTS {table}",
-            identifier_params={'table': table_name},
-            allow_ddl=True
-        )
-        conn.commit()
-        conn.close()
+        await run_db(get_schema_catalog().drop_table, table_name)
+        get_index_advisor().forget_table(table_name)
+        await run_db(get_result_cache().bump_table, table_name)
         
         response = {"message": f"Table '{table_name}' deleted successfully"}
         logger.info(f"[SUCCESS] Table deleted: {table_name}")
@@ -309,49 +844,56 @@ async def delete_table(table_name: str):
         raise HTTPException(500, f"Error deleting table: {str(e)}")
 
 @app.get("/api/table/{table_name}/export")
-async def export_table(table_name: str):
-    """Export a table as CSV file"""
+async def export_table(
+    table_name: str,
+    export_format: str = Query("csv", alias="format"),
+    gzip: bool = False
+):
+    """Export a table as a CSV, JSONL or Parquet file, optionally gzipped"""
     try:
         # Validate table name using security module
         try:
             validate_identifier(table_name, "table")
         except SQLSecurityError as e:
             raise HTTPException(400, str(e))
-
-        conn = sqlite3.connect("db/database.db")
-
+        
+        if export_format not in EXPORT_FORMATS:
+            raise HTTPException(400, f"Unsupported export format '{export_format}'; use one of: {', '.join(EXPORT_FORMATS)}")
+        if export_format == "parquet" and not parquet_available():
+            raise HTTPException(400, "Parquet export requires the pyarrow package")
+        
         # Check if table exists using secure method
-        if not check_table_exists(conn, table_name):
-            conn.close()
+        if not await run_db(table_exists, table_name):
             raise HTTPException(404, f"Table '{table_name}' not found")
-
-        # Execute SELECT * FROM table using safe query execution
-        cursor = execute_query_safely(
-            conn,
-            "SELECT * FROM {table}",
-            identifier_params={'table': table_name}
-        )
-
-        # Get column names from cursor description
-        columns = [description[0] for description in cursor.description]
-        rows = cursor.fetchall()
-        conn.close()
-
-        # Generate CSV using StringIO
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(columns)
-        writer.writerows(rows)
-
-        # Return as streaming response
-        csv_content = output.getvalue()
-        logger.info(f"[SUCCESS] Table exported: {table_name}, rows={len(rows)}")
-
+        
+        # Parquet needs one type per column; settle it from the stored values
+        # before the response starts, so a mixed column cannot cut it off
+        parquet_table_schema = None
+        if export_format == "parquet":
+            parquet_table_schema = await run_db(read_parquet_schema, table_name)
+        
+        # Rows are read, encoded and sent batch by batch as the client downloads
+        chunks = export_table_chunks(table_name, export_format, compress=gzip, parquet_table_schema=parquet_table_schema)
+        
+        async def body():
+            sent = 0
+            try:
+                async for chunk in iterate_db(chunks):
+                    sent += len(chunk)
+                    yield chunk
+                logger.info(f"[SUCCESS] Table exported: {table_name}, format={export_format}, gzip={gzip}, bytes={sent}")
+            except Exception as e:
+                logger.error(f"[ERROR] Table export failed mid-stream: {str(e)}")
+                logger.error(f"[ERROR] Full traceback:\n{traceback.format_exc()}")
+                raise
+        
+        export_type = EXPORT_FORMATS[export_format]
+        filename = f"{table_name}.{export_type['extension']}{'.gz' if gzip else ''}"
         return StreamingResponse(
-            iter([csv_content]),
-            media_type="text/csv",
+            body(),
+            media_type="application/gzip" if gzip else export_type['media_type'],
             headers={
-                "Content-Disposition": f'attachment; filename="{table_name}.csv"'
+                "Content-Disposition": f'attachment; filename="{filename}"'
             }
         )
     except HTTPException:
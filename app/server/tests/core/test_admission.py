@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch
+from core.admission import AdmissionController, AdmissionRejected, TokenBucket, provider_setting, run_llm_admitted
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+
+    def test_unlimited_rate_never_delays(self):
+        bucket = TokenBucket(0, 1)
+        assert [bucket.take() for _ in range(100)] == [0.0] * 100
+
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+        assert bucket.take() == 0.0
+        assert bucket.take() == 0.0
+        assert bucket.take() == pytest.approx(0.5)
+        assert bucket.delay() == pytest.approx(1.0)
+
+        clock.now = 1.0
+        assert bucket.delay() == pytest.approx(0.0)
+
+    def test_refund_returns_token(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1, burst=1, clock=clock)
+        bucket.take()
+        bucket.take()
+        bucket.refund()
+        assert bucket.delay() == pytest.approx(1.0)
+
+
+class TestAdmissionController:
+
+    def test_limits_concurrency_and_hands_slots_to_waiters_in_order(self):
+        controller = AdmissionController("test", max_concurrency=2)
+        running = []
+        peak = []
+        order = []
+
+        async def call(index):
+            async with controller.admit():
+                running.append(index)
+                peak.append(len(running))
+                order.append(index)
+                await asyncio.sleep(0.02)
+                running.remove(index)
+
+        async def main():
+            await asyncio.gather(*(call(index) for index in range(6)))
+
+        asyncio.run(main())
+
+        assert max(peak) == 2
+        assert order == list(range(6))
+        stats = controller.stats()
+        assert stats['admitted'] == 6
+        assert stats['active'] == 0
+        assert stats['queue_depth'] == 0
+        assert stats['shed'] == 0
+
+    def test_full_queue_is_shed_with_503(self):
+        controller = AdmissionController("test", max_concurrency=1, queue_size=1)
+
+        async def hold(release):
+            async with controller.admit():
+                await release.wait()
+
+        async def main():
+            release = asyncio.Event()
+            holder = asyncio.create_task(hold(release))
+            waiter = asyncio.create_task(hold(release))
+            await asyncio.sleep(0.01)
+            assert controller.stats()['queue_depth'] == 1
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit():
+                    pass
+            release.set()
+            await asyncio.gather(holder, waiter)
+            return rejected.value
+
+        rejected = asyncio.run(main())
+
+        assert rejected.status_code == 503
+        assert rejected.retry_after_header == "1"
+        assert controller.stats()['shed'] == 1
+        assert controller.stats()['admitted'] == 2
+
+    def test_queued_call_times_out_with_503(self):
+        controller = AdmissionController("test", max_concurrency=1, max_wait_seconds=0.05)
+
+        async def main():
+            release = asyncio.Event()
+
+            async def hold():
+                async with controller.admit():
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit():
+                    pass
+            assert controller.stats()['queue_depth'] == 0
+            release.set()
+            await holder
+            return rejected.value
+
+        assert asyncio.run(main()).status_code == 503
+        assert controller.stats()['active'] == 0
+
+    def test_expected_wait_over_limit_is_shed_without_queueing(self):
+        controller = AdmissionController("test", max_concurrency=1, max_wait_seconds=1)
+        # Recent calls took 5s each, so one more waiter would wait too long
+        controller._average_duration = 5.0
+
+        async def main():
+            release = asyncio.Event()
+
+            async def hold():
+                async with controller.admit():
+                    await release.wait()
+
+            holder = asyncio.create_task(hold())
+            await asyncio.sleep(0.01)
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit():
+                    pass
+            release.set()
+            await holder
+            return rejected.value
+
+        rejected = asyncio.run(main())
+
+        assert rejected.status_code == 503
+        assert rejected.retry_after == pytest.approx(5.0)
+
+    def test_rate_limited_call_is_refused_with_429(self):
+        clock = FakeClock()
+        controller = AdmissionController("test", max_concurrency=4, rate_per_second=0.1, burst=1, max_wait_seconds=2, clock=clock)
+
+        async def main():
+            async with controller.admit():
+                pass
+            with pytest.raises(AdmissionRejected) as rejected:
+                async with controller.admit():
+                    pass
+            return rejected.value
+
+        rejected = asyncio.run(main())
+
+        assert rejected.status_code == 429
+        assert rejected.retry_after_header == "10"
+        stats = controller.stats()
+        assert stats['rate_limited'] == 1
+        assert stats['admitted'] == 1
+        assert stats['active'] == 0
+
+    def test_short_rate_delay_waits_instead_of_refusing(self):
+        controller = AdmissionController("test", max_concurrency=4, rate_per_second=50, burst=1)
+
+        async def main():
+            for _ in range(3):
+                async with controller.admit():
+                    pass
+
+        asyncio.run(main())
+
+        stats = controller.stats()
+        assert stats['admitted'] == 3
+        assert stats['rate_limited'] == 0
+        assert stats['p95_wait_seconds'] is not None
+
+    def test_slot_released_when_call_fails(self):
+        controller = AdmissionController("test", max_concurrency=1)
+
+        async def main():
+            with pytest.raises(ValueError):
+                async with controller.admit():
+                    raise ValueError("boom")
+            async with controller.admit():
+                pass
+
+        asyncio.run(main())
+
+        assert controller.stats()['active'] == 0
+        assert controller.stats()['admitted'] == 2
+
+    def test_cancelled_call_holds_slot_until_worker_finishes(self):
+        controller = AdmissionController("test", max_concurrency=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def provider_call():
+            started.set()
+            release.wait(5)
+            return "done"
+
+        async def main():
+            call = asyncio.create_task(run_llm_admitted("test", provider_call))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            call.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await call
+            # The provider call is still running on its worker
+            held = controller.stats()['active']
+            release.set()
+            async with controller.admit():
+                pass
+            return held
+
+        with patch.dict('core.admission._controllers', {'test': controller}):
+            held = asyncio.run(main())
+
+        assert held == 1
+        assert controller.stats()['active'] == 0
+        assert controller.stats()['admitted'] == 2
+
+
+class TestProviderSetting:
+
+    def test_provider_value_overrides_shared_value(self, monkeypatch):
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY", "8")
+        monkeypatch.setenv("LLM_MAX_CONCURRENCY_ANTHROPIC", "2")
+
+        assert provider_setting("anthropic", "MAX_CONCURRENCY", "16") == 2
+        assert provider_setting("openai", "MAX_CONCURRENCY", "16") == 8
+
+    def test_default_when_unset(self, monkeypatch):
+        monkeypatch.delenv("LLM_RATE_BURST", raising=False)
+        monkeypatch.delenv("LLM_RATE_BURST_OPENAI", raising=False)
+
+        assert provider_setting("openai", "RATE_BURST", "10") == 10
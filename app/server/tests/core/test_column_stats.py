@@ -0,0 +1,172 @@
+import io
+import sqlite3
+import pytest
+from unittest.mock import patch
+from core import column_stats
+from core.column_stats import (
+    STATS_TABLE,
+    delete_column_stats,
+    insights_from_stats,
+    is_internal_table,
+    read_column_stats,
+    store_column_stats
+)
+from core.file_processor import convert_csv_stream_to_sqlite, sanitize_table_name
+from core.llm_processor import format_schema_for_prompt
+from core.schema_catalog import SchemaCatalog
+from core.sql_processor import read_database_schema
+
+
+@pytest.fixture
+def conn():
+    """In-memory database with one loaded table"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE orders (id INTEGER, status TEXT, amount REAL)")
+    conn.executemany(
+        "INSERT INTO orders VALUES (?, ?, ?)",
+        [(1, 'open', 10.0), (2, 'open', 20.0), (3, 'closed', None), (4, 'open', 40.0)]
+    )
+    yield conn
+    conn.close()
+
+
+class TestColumnStats:
+
+    def test_store_and_read(self, conn):
+        stored = store_column_stats(conn, 'orders', 4)
+
+        assert read_column_stats(conn) == {'orders': stored}
+        assert stored['row_count'] == 4
+        assert list(stored['columns']) == ['id', 'status', 'amount']
+        assert stored['columns']['status']['most_common'][0] == {'value': 'open', 'count': 3}
+        assert stored['columns']['amount']['null_count'] == 1
+        assert stored['columns']['amount']['max_value'] == 40.0
+
+    def test_store_replaces_previous_stats(self, conn):
+        store_column_stats(conn, 'orders', 4)
+        conn.execute("DELETE FROM orders WHERE id = 4")
+        store_column_stats(conn, 'orders', 3)
+
+        stats = read_column_stats(conn, 'orders')['orders']
+        assert stats['row_count'] == 3
+        assert stats['columns']['id']['unique_values'] == 3
+
+    def test_large_tables_get_approximate_stats(self, conn):
+        with patch.object(column_stats, 'COLUMN_STATS_EXACT_MAX_ROWS', 2):
+            stored = store_column_stats(conn, 'orders', 4)
+
+        assert stored['columns']['id']['approximate'] is True
+
+    def test_delete(self, conn):
+        # Deleting before any statistics exist is a no-op
+        delete_column_stats(conn, 'orders')
+
+        store_column_stats(conn, 'orders', 4)
+        delete_column_stats(conn, 'orders')
+
+        assert read_column_stats(conn) == {}
+
+    def test_read_without_stats_table(self, conn):
+        assert read_column_stats(conn) == {}
+
+    def test_insights_from_stats(self, conn):
+        stored = store_column_stats(conn, 'orders', 4)
+
+        insights = insights_from_stats(stored, 4)
+        assert [insight.column_name for insight in insights] == ['id', 'status', 'amount']
+
+        # Requested columns come back in table order
+        insights = insights_from_stats(stored, 4, ['amount', 'id'])
+        assert [insight.column_name for insight in insights] == ['id', 'amount']
+
+    def test_insights_from_stats_misses(self, conn):
+        stored = store_column_stats(conn, 'orders', 4)
+
+        assert insights_from_stats(None, 4) is None
+        # The table changed since the statistics were computed
+        assert insights_from_stats(stored, 5) is None
+        # Unknown columns are left to the computed path to report
+        assert insights_from_stats(stored, 4, ['missing']) is None
+
+    def test_approximate_stats_only_answer_approximate_requests(self, conn):
+        with patch.object(column_stats, 'COLUMN_STATS_EXACT_MAX_ROWS', 2):
+            stored = store_column_stats(conn, 'orders', 4)
+
+        assert insights_from_stats(stored, 4) is None
+        assert insights_from_stats(stored, 4, approximate=True)[0].approximate
+
+    def test_internal_tables_are_hidden(self, conn):
+        store_column_stats(conn, 'orders', 4)
+
+        assert is_internal_table(STATS_TABLE)
+        assert list(read_database_schema(conn)['tables']) == ['orders']
+        assert not is_internal_table(sanitize_table_name(STATS_TABLE))
+
+
+class TestIngestedStats:
+
+    def test_upload_persists_stats_for_catalog_and_prompt(self, tmp_path):
+        db_path = str(tmp_path / "database.db")
+        csv_data = b"id,status\n1,open\n2,open\n3,closed\n"
+
+        result = convert_csv_stream_to_sqlite(io.BytesIO(csv_data), "orders", db_path)
+
+        assert result['column_stats']['columns']['status']['unique_values'] == 2
+
+        # A fresh catalog picks the statistics up from the side table
+        catalog = SchemaCatalog(db_path)
+        try:
+            schema = catalog.get_schema()
+        finally:
+            catalog.close()
+        assert list(schema['tables']) == ['orders']
+        assert schema['tables']['orders']['column_stats'] == result['column_stats']
+
+        prompt = format_schema_for_prompt(schema)
+        assert "- id (INTEGER): 3 distinct, range 1 to 3" in prompt
+        assert "- status (TEXT): 2 distinct, values like 'open', 'closed'" in prompt
+
+    def test_failed_upload_keeps_previous_stats(self, tmp_path):
+        db_path = str(tmp_path / "database.db")
+        convert_csv_stream_to_sqlite(io.BytesIO(b"id\n1\n2\n"), "orders", db_path)
+
+        with pytest.raises(Exception):
+            convert_csv_stream_to_sqlite(io.BytesIO(b"id\n1\n2,3,4\n"), "orders", db_path)
+
+        conn = sqlite3.connect(db_path)
+        try:
+            assert read_column_stats(conn)['orders']['row_count'] == 2
+        finally:
+            conn.close()
+
+    def test_stats_are_computed_after_the_upload_commits(self, tmp_path):
+        db_path = str(tmp_path / "database.db")
+        compute = column_stats.compute_column_insights
+        in_transaction = []
+
+        def check_transaction(conn, *args, **kwargs):
+            in_transaction.append(conn.in_transaction)
+            return compute(conn, *args, **kwargs)
+
+        with patch.object(column_stats, 'compute_column_insights', check_transaction):
+            result = convert_csv_stream_to_sqlite(io.BytesIO(b"id\n1\n2\n"), "orders", db_path)
+
+        assert in_transaction == [False]
+        assert result['column_stats']['row_count'] == 2
+
+    def test_failed_stats_keep_the_upload(self, tmp_path):
+        db_path = str(tmp_path / "database.db")
+        convert_csv_stream_to_sqlite(io.BytesIO(b"id\n1\n2\n"), "orders", db_path)
+
+        with patch.object(column_stats, 'compute_column_insights', side_effect=sqlite3.OperationalError("boom")):
+            result = convert_csv_stream_to_sqlite(io.BytesIO(b"id\n1\n2\n3\n"), "orders", db_path)
+
+        assert result['row_count'] == 3
+        assert result['column_stats'] is None
+        conn = sqlite3.connect(db_path)
+        try:
+            # The replaced table's statistics went with it
+            assert read_column_stats(conn) == {}
+            assert conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 3
+        finally:
+            conn.close()
@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import pytest
+from core.connection_pool import ConnectionPool, get_connection, get_pool, close_all_pools
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a file database with one table"""
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO users (name) VALUES ('Alice')")
+    conn.commit()
+    conn.close()
+    yield path
+    close_all_pools()
+
+
+class TestConnectionPool:
+    
+    def test_connections_are_reused(self, db_path):
+        pool = ConnectionPool(db_path, size=2)
+        
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        
+        assert first is second
+        pool.close()
+    
+    def test_connections_are_tuned(self, db_path):
+        pool = ConnectionPool(db_path, size=1)
+        
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] < 0
+        pool.close()
+    
+    def test_read_only_connections_reject_writes(self, db_path):
+        with get_connection(db_path, read_only=True) as conn:
+            assert conn.execute("SELECT name FROM users").fetchone()[0] == "Alice"
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO users (name) VALUES ('Mallory')")
+    
+    def test_pool_is_bounded(self, db_path):
+        pool = ConnectionPool(db_path, size=1)
+        conn = pool.acquire()
+        
+        with pytest.raises(sqlite3.OperationalError) as exc_info:
+            pool.acquire(timeout=0.01)
+        assert "Timed out waiting for a database connection" in str(exc_info.value)
+        
+        pool.release(conn)
+        assert pool.acquire(timeout=0.01) is conn
+        pool.close()
+    
+    def test_release_resets_connection_state(self, db_path):
+        pool = ConnectionPool(db_path, size=1)
+        
+        with pool.connection() as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("INSERT INTO users (name) VALUES ('Bob')")
+            assert conn.in_transaction
+        
+        with pool.connection() as conn:
+            assert conn.row_factory is None
+            assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 1
+        pool.close()
+    
+    def test_get_pool_keys_on_absolute_path(self, db_path, monkeypatch):
+        pool = get_pool(db_path)
+        
+        monkeypatch.chdir(os.path.dirname(db_path))
+        assert get_pool("database.db") is pool
+        assert get_pool("database.db", read_only=True) is not pool
+    
+    def test_memory_database_is_not_pooled(self):
+        with get_connection(":memory:") as conn:
+            conn.execute("CREATE TABLE t (x INTEGER)")
+        
+        with get_connection(":memory:") as conn:
+            tables = conn.execute("SELECT name FROM sqlite_master").fetchall()
+        
+        assert tables == []
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from core.executors import get_executor, iterate_db, run_db, run_in_executor, run_llm, shutdown_executors
+
+
+class TestExecutors:
+    
+    def teardown_method(self):
+        shutdown_executors()
+    
+    def test_run_db_and_run_llm_use_worker_threads(self):
+        async def main():
+            loop_thread = threading.current_thread().name
+            db_thread = await run_db(lambda: threading.current_thread().name)
+            llm_thread = await run_llm(lambda: threading.current_thread().name)
+            return loop_thread, db_thread, llm_thread
+        
+        loop_thread, db_thread, llm_thread = asyncio.run(main())
+        
+        assert db_thread.startswith("db") and db_thread != loop_thread
+        assert llm_thread.startswith("llm")
+    
+    def test_blocking_call_does_not_block_event_loop(self):
+        async def main():
+            ticks = 0
+            
+            async def ticker():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.01)
+            
+            task = asyncio.create_task(ticker())
+            await run_llm(time.sleep, 0.2)
+            task.cancel()
+            return ticks
+        
+        assert asyncio.run(main()) >= 5
+    
+    def test_concurrency_is_bounded(self):
+        executor = get_executor("bounded-test", 2)
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        
+        def work():
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+        
+        async def main():
+            await asyncio.gather(*(run_in_executor(executor, work) for _ in range(6)))
+        
+        asyncio.run(main())
+        
+        assert peak == 2
+    
+    def test_exceptions_propagate(self):
+        def fail():
+            raise ValueError("boom")
+        
+        async def main():
+            try:
+                await run_db(fail)
+            except ValueError as e:
+                return str(e)
+        
+        assert asyncio.run(main()) == "boom"
+    
+    def test_iterate_db_cancels_and_closes_abandoned_iterator(self):
+        release = threading.Event()
+        closed = threading.Event()
+        cancelled = []
+        
+        def slow_rows():
+            try:
+                yield 1
+                release.wait(5)
+                yield 2
+            finally:
+                closed.set()
+        
+        def cancel():
+            cancelled.append(True)
+            release.set()
+        
+        async def main():
+            items = []
+            
+            async def consume():
+                async for item in iterate_db(slow_rows(), cancel=cancel):
+                    items.append(item)
+            
+            task = asyncio.create_task(consume())
+            await asyncio.sleep(0.1)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            return items
+        
+        assert asyncio.run(main()) == [1]
+        assert cancelled == [True]
+        assert closed.wait(5)
+    
+    def test_iterate_db_low_priority_uses_low_priority_pool(self):
+        def thread_names():
+            yield threading.current_thread().name
+            yield threading.current_thread().name
+        
+        async def main():
+            return [name async for name in iterate_db(thread_names(), low_priority=True)]
+        
+        assert all(name.startswith("db_low") for name in asyncio.run(main()))
@@ -1,6 +1,14 @@
+import io
 import pytest
 from pathlib import Path
-from core.file_processor import convert_csv_to_sqlite, convert_json_to_sqlite, convert_jsonl_to_sqlite, flatten_json_object, discover_jsonl_fields
+from core.file_processor import (
+    convert_csv_stream_to_sqlite,
+    convert_json_to_sqlite,
+    convert_jsonl_to_sqlite,
+    convert_jsonl_stream_to_sqlite,
+    flatten_json_object,
+    infer_column_type
+)
 
 
 @pytest.fixture
@@ -17,74 +25,77 @@ def test_assets_dir():
 
 class TestFileProcessor:
     
-    def test_convert_csv_to_sqlite_success(self, test_db, test_assets_dir):
-        # Load real CSV file
-        csv_file = test_assets_dir / "test_users.csv"
+    def test_convert_csv_to_sqlite_with_inconsistent_data(self, test_db, test_assets_dir):
+        # Test with CSV that has inconsistent row lengths - should raise error
+        csv_file = test_assets_dir / "invalid.csv"
         with open(csv_file, 'rb') as f:
             csv_data = f.read()
         
-        table_name = "users"
-        result = convert_csv_to_sqlite(csv_data, table_name, test_db)
+        table_name = "inconsistent_table"
         
-        # Verify return structure
-        assert result['table_name'] == table_name
-        assert 'schema' in result
-        assert 'row_count' in result
-        assert 'sample_data' in result
+        with pytest.raises(Exception) as exc_info:
+            convert_csv_stream_to_sqlite(io.BytesIO(csv_data), table_name, test_db)
         
-        # Test the returned data
-        assert result['row_count'] == 4  # 4 users in test file
-        assert len(result['sample_data']) <= 5  # Should return up to 5 samples
+        assert "Error converting CSV to SQLite" in str(exc_info.value)
+    
+    def test_convert_csv_stream_to_sqlite_success(self, test_db, test_assets_dir):
+        # Stream the real CSV file with a tiny chunk size to cross chunk boundaries
+        csv_file = test_assets_dir / "test_users.csv"
+        with open(csv_file, 'rb') as f:
+            result = convert_csv_stream_to_sqlite(f, "users", test_db, chunk_size=7, batch_size=2)
         
-        # Verify schema has expected columns (cleaned names)
-        assert 'name' in result['schema']
-        assert 'age' in result['schema'] 
-        assert 'city' in result['schema']
-        assert 'email' in result['schema']
+        assert result['table_name'] == "users"
+        assert result['row_count'] == 4
+        assert result['rows_per_second'] > 0
+        assert result['schema'] == {'name': 'TEXT', 'age': 'INTEGER', 'city': 'TEXT', 'email': 'TEXT'}
         
-        # Verify sample data structure and content
         john_data = next((item for item in result['sample_data'] if item['name'] == 'John Doe'), None)
         assert john_data is not None
         assert john_data['age'] == 25
         assert john_data['city'] == 'New York'
-        assert john_data['email'] == 'john@example.com'
     
-    def test_convert_csv_to_sqlite_column_cleaning(self, test_db, test_assets_dir):
-        # Test column name cleaning with real file
+    def test_convert_csv_stream_to_sqlite_column_cleaning(self, test_db, test_assets_dir):
         csv_file = test_assets_dir / "column_names.csv"
         with open(csv_file, 'rb') as f:
-            csv_data = f.read()
+            result = convert_csv_stream_to_sqlite(f, "people", test_db)
         
-        table_name = "test_users"
-        result = convert_csv_to_sqlite(csv_data, table_name, test_db)
-        
-        # Verify columns were cleaned in the schema
-        assert 'full_name' in result['schema']
-        assert 'birth_date' in result['schema']
-        assert 'email_address' in result['schema']
-        assert 'phone_number' in result['schema']
-        
-        # Verify sample data has cleaned column names and actual content
-        sample = result['sample_data'][0]
-        assert 'full_name' in sample
-        assert 'birth_date' in sample
-        assert 'email_address' in sample
-        assert sample['full_name'] == 'John Doe'
-        assert sample['birth_date'] == '1990-01-15'
+        assert list(result['schema']) == ['full_name', 'birth_date', 'email_address', 'phone_number']
+        assert result['sample_data'][0]['birth_date'] == '1990-01-15'
     
-    def test_convert_csv_to_sqlite_with_inconsistent_data(self, test_db, test_assets_dir):
-        # Test with CSV that has inconsistent row lengths - should raise error
+    def test_convert_csv_stream_to_sqlite_types_and_nulls(self, test_db):
+        csv_data = b'id,price,active,note\n1,9.5,true,"multi\nline"\n2,,False,NA\n3,4,TRUE,plain\n'
+        
+        # Infer types from the first row only; later rows must still load
+        result = convert_csv_stream_to_sqlite(io.BytesIO(csv_data), "items", test_db, chunk_size=5, inference_rows=1)
+        
+        assert result['row_count'] == 3
+        assert result['schema'] == {'id': 'INTEGER', 'price': 'REAL', 'active': 'INTEGER', 'note': 'TEXT'}
+        rows = result['sample_data']
+        assert rows[0] == {'id': 1, 'price': 9.5, 'active': 1, 'note': 'multi\nline'}
+        assert rows[1] == {'id': 2, 'price': None, 'active': 0, 'note': None}
+        assert rows[2]['price'] == 4.0
+    
+    def test_convert_csv_stream_to_sqlite_inconsistent_data(self, test_db, test_assets_dir):
         csv_file = test_assets_dir / "invalid.csv"
         with open(csv_file, 'rb') as f:
-            csv_data = f.read()
+            with pytest.raises(Exception) as exc_info:
+                convert_csv_stream_to_sqlite(f, "inconsistent_table", test_db)
         
-        table_name = "inconsistent_table"
-        
-        # Pandas will fail on inconsistent CSV data
+        assert "Error converting CSV to SQLite" in str(exc_info.value)
+        assert "Expected 3 fields in line 3" in str(exc_info.value)
+    
+    def test_convert_csv_stream_to_sqlite_empty(self, test_db):
         with pytest.raises(Exception) as exc_info:
-            convert_csv_to_sqlite(csv_data, table_name, test_db)
+            convert_csv_stream_to_sqlite(io.BytesIO(b''), "empty", test_db)
         
-        assert "Error converting CSV to SQLite" in str(exc_info.value)
+        assert "CSV file is empty" in str(exc_info.value)
+    
+    def test_infer_column_type(self):
+        assert infer_column_type(['1', '2', None]) == 'INTEGER'
+        assert infer_column_type(['1', '2.5']) == 'REAL'
+        assert infer_column_type(['1', 'abc']) == 'TEXT'
+        assert infer_column_type(['true', 'False']) == 'INTEGER'
+        assert infer_column_type([None, None]) == 'TEXT'
     
     def test_convert_json_to_sqlite_success(self, test_db, test_assets_dir):
         # Load real JSON file
@@ -119,6 +130,36 @@ class TestFileProcessor:
         assert laptop_data['category'] == 'Electronics'
         assert laptop_data['in_stock']
     
+    def test_convert_json_to_sqlite_nested_objects(self, test_db):
+        # Nested objects and arrays are flattened like JSONL uploads
+        json_data = b'[{"id": 1, "user": {"name": "Ann", "tags": ["x"]}}, {"id": 2, "user": {"name": "Ben"}}]'
+        
+        result = convert_json_to_sqlite(json_data, "accounts", test_db)
+        
+        assert result['row_count'] == 2
+        assert result['schema'] == {'id': 'INTEGER', 'user__name': 'TEXT', 'user__tags_0': 'TEXT'}
+        assert result['sample_data'][0] == {'id': 1, 'user__name': 'Ann', 'user__tags_0': 'x'}
+        assert result['sample_data'][1]['user__tags_0'] is None
+    
+    def test_convert_json_to_sqlite_widens_column_types(self, test_db):
+        # A key that is an integer first and a float or text later widens
+        json_data = b'[{"price": 1, "code": 7}, {"price": 2.5, "code": "A7"}, {"price": 3, "code": 8}]'
+        
+        result = convert_json_to_sqlite(json_data, "prices", test_db)
+        
+        assert result['schema'] == {'price': 'REAL', 'code': 'TEXT'}
+        assert [row['price'] for row in result['sample_data']] == [1.0, 2.5, 3.0]
+        assert [row['code'] for row in result['sample_data']] == ['7', 'A7', '8']
+    
+    def test_convert_jsonl_stream_widens_column_types(self, test_db):
+        jsonl_data = b'{"price": 1}\n{"price": 2.5, "qty": 1}\n{"price": 2}\n'
+        
+        result = convert_jsonl_stream_to_sqlite(io.BytesIO(jsonl_data), "prices", test_db, batch_size=1)
+        
+        assert result['schema'] == {'price': 'REAL', 'qty': 'INTEGER'}
+        assert [row['price'] for row in result['sample_data']] == [1.0, 2.5, 2.0]
+        assert result['column_stats']['columns']['price']['max_value'] == 2.5
+    
     def test_convert_json_to_sqlite_invalid_json(self, test_db):
         # Test with invalid JSON
         json_data = b'invalid json'
@@ -207,47 +248,6 @@ class TestFileProcessor:
         assert flatten_json_object(True) == {"": True}
         assert flatten_json_object(None) == {"": None}
     
-    def test_discover_jsonl_fields_basic(self):
-        """Test field discovery with basic JSONL content"""
-        jsonl_content = b'{"name": "John", "age": 30}\n{"name": "Jane", "age": 25, "city": "NYC"}'
-        
-        fields = discover_jsonl_fields(jsonl_content)
-        
-        assert fields == {"name", "age", "city"}
-    
-    def test_discover_jsonl_fields_nested(self):
-        """Test field discovery with nested structures"""
-        jsonl_content = b'{"user": {"name": "John", "profile": {"age": 30}}}\n{"user": {"name": "Jane", "profile": {"city": "NYC"}}}'
-        
-        fields = discover_jsonl_fields(jsonl_content)
-        
-        assert fields == {"user__name", "user__profile__age", "user__profile__city"}
-    
-    def test_discover_jsonl_fields_arrays(self):
-        """Test field discovery with arrays"""
-        jsonl_content = b'{"items": ["a", "b"]}\n{"items": ["c", "d", "e"]}'
-        
-        fields = discover_jsonl_fields(jsonl_content)
-        
-        assert fields == {"items_0", "items_1", "items_2"}
-    
-    def test_discover_jsonl_fields_invalid_json(self):
-        """Test field discovery with invalid JSON"""
-        jsonl_content = b'{"valid": "json"}\n{invalid json}'
-        
-        with pytest.raises(ValueError) as exc_info:
-            discover_jsonl_fields(jsonl_content)
-        
-        assert "Invalid JSON on line 2" in str(exc_info.value)
-    
-    def test_discover_jsonl_fields_empty_lines(self):
-        """Test field discovery with empty lines"""
-        jsonl_content = b'{"name": "John"}\n\n{"name": "Jane"}\n'
-        
-        fields = discover_jsonl_fields(jsonl_content)
-        
-        assert fields == {"name"}
-    
     def test_convert_jsonl_to_sqlite_success(self, test_db, test_assets_dir):
         """Test successful JSONL to SQLite conversion with real file"""
         jsonl_file = test_assets_dir / "sample_data.jsonl"
@@ -392,4 +392,34 @@ class TestFileProcessor:
         assert jane_data is not None
         assert jane_data['age'] is None
         assert jane_data['city'] == 'NYC'
-        assert jane_data['profile__bio'] == 'Engineer'
\ No newline at end of file
+        assert jane_data['profile__bio'] == 'Engineer'
+    def test_convert_jsonl_stream_to_sqlite_schema_evolution(self, test_db):
+        """Test columns are added as new keys appear across batches"""
+        jsonl_data = (
+            b'{}\n'
+            b'{"name": "John", "age": null}\n'
+            b'{"name": "Jane", "age": 25, "tags": ["a"]}\n'
+            b'{"name": "Bob", "score": 9.5, "extra": null}\n'
+        )
+        
+        result = convert_jsonl_stream_to_sqlite(io.BytesIO(jsonl_data), "people", test_db, chunk_size=8, batch_size=1)
+        
+        assert result['row_count'] == 4
+        assert result['rows_per_second'] > 0
+        # Types come from the first non-null value; null-only keys become TEXT
+        assert result['schema'] == {
+            'name': 'TEXT',
+            'age': 'INTEGER',
+            'tags_0': 'TEXT',
+            'score': 'REAL',
+            'extra': 'TEXT'
+        }
+        
+        rows = result['sample_data']
+        assert rows[0] == {'name': None, 'age': None, 'tags_0': None, 'score': None, 'extra': None}
+        assert rows[1]['name'] == 'John'
+        assert rows[1]['age'] is None
+        assert rows[2]['age'] == 25
+        assert rows[2]['tags_0'] == 'a'
+        assert rows[3]['score'] == 9.5
+        assert rows[3]['age'] is None
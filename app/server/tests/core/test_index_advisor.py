@@ -0,0 +1,164 @@
+import sqlite3
+import pytest
+from core.index_advisor import IndexAdvisor, extract_column_references, index_name
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a file database with two joinable tables"""
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER, name TEXT, city TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER, user_id INTEGER, total REAL)")
+    conn.executemany("INSERT INTO users VALUES (?, ?, ?)", [(i, f"user{i}", f"city{i % 10}") for i in range(50)])
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?)", [(i, i % 50, i * 1.5) for i in range(200)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def advisor(db_path):
+    return IndexAdvisor(db_path, min_uses=3, min_rows=10, background=False)
+
+
+def index_names(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'"))
+    finally:
+        conn.close()
+
+
+class TestExtractColumnReferences:
+    
+    def test_where_join_and_order_columns(self):
+        tables, references = extract_column_references(
+            "SELECT u.name, SUM(o.total) FROM users AS u JOIN orders o ON o.user_id = u.id "
+            "WHERE u.city = 'x' AND lower(name) = 'y' GROUP BY u.name ORDER BY 2 DESC"
+        )
+        
+        assert tables == {'users': 'users', 'u': 'users', 'orders': 'orders', 'o': 'orders'}
+        assert references == [('o', 'user_id'), ('u', 'id'), ('u', 'city'), (None, 'name'), ('u', 'name')]
+    
+    def test_select_list_and_strings_are_ignored(self):
+        _, references = extract_column_references("SELECT city FROM users WHERE name = 'city'")
+        
+        assert references == [(None, 'name')]
+    
+    def test_subqueries(self):
+        tables, references = extract_column_references(
+            "SELECT * FROM (SELECT user_id FROM orders WHERE total > 5) t WHERE t.user_id IN (SELECT id FROM users WHERE city = 'a')"
+        )
+        
+        assert tables['orders'] == 'orders' and tables['users'] == 'users'
+        assert ('t', 'user_id') in references
+        assert (None, 'total') in references and (None, 'city') in references
+
+
+class TestIndexAdvisor:
+    
+    def test_index_built_after_threshold(self, advisor, db_path):
+        for _ in range(2):
+            advisor.record("SELECT * FROM users WHERE city = 'city1'")
+        assert index_names(db_path) == []
+        
+        advisor.record("SELECT * FROM users WHERE city = 'city2'")
+        
+        assert index_names(db_path) == [index_name('users', 'city')]
+        conn = sqlite3.connect(db_path)
+        try:
+            plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM users WHERE city = 'x'").fetchall()
+            assert 'USING INDEX' in plan[0][3]
+            assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1 WHERE tbl = 'users'").fetchone()[0] > 0
+        finally:
+            conn.close()
+        assert advisor.stats()['indexes_built'] == 1
+    
+    def test_join_columns_resolved_through_aliases(self, advisor, db_path):
+        for _ in range(3):
+            advisor.record("SELECT u.name FROM users u JOIN orders o ON o.user_id = u.id")
+        
+        assert index_names(db_path) == [index_name('orders', 'user_id'), index_name('users', 'id')]
+        assert advisor.column_uses() == {('orders', 'user_id'): 3, ('users', 'id'): 3}
+    
+    def test_keys_use_catalog_names(self, advisor, db_path):
+        advisor.record("SELECT * FROM Users WHERE City = 'x'")
+        advisor.record("SELECT * FROM USERS U WHERE u.CITY = 'x'")
+        
+        assert advisor.column_uses() == {('users', 'city'): 2}
+        
+        advisor.forget_table('Users')
+        assert advisor.column_uses() == {}
+        assert advisor._columns == {}
+    
+    def test_schema_is_read_outside_the_lock(self, advisor, monkeypatch):
+        import core.index_advisor as index_advisor_module
+        real_get_connection = index_advisor_module.get_connection
+        
+        def checked_get_connection(*args, **kwargs):
+            assert not advisor._lock.locked()
+            return real_get_connection(*args, **kwargs)
+        
+        monkeypatch.setattr(index_advisor_module, 'get_connection', checked_get_connection)
+        advisor.record("SELECT * FROM users u JOIN orders o ON o.user_id = u.id")
+        
+        assert advisor.last_error is None
+        assert advisor.column_uses() == {('orders', 'user_id'): 1, ('users', 'id'): 1}
+    
+    def test_ambiguous_and_unknown_columns_are_skipped(self, advisor, db_path):
+        for _ in range(3):
+            advisor.record("SELECT * FROM users JOIN orders ON 1 = 1 WHERE id = 3 AND missing = 1")
+        
+        assert index_names(db_path) == []
+        assert advisor.stats()['tracked_columns'] == 0
+    
+    def test_small_tables_are_not_indexed(self, db_path):
+        advisor = IndexAdvisor(db_path, min_uses=1, min_rows=100, background=False)
+        
+        advisor.record("SELECT * FROM users WHERE city = 'x'")
+        
+        assert index_names(db_path) == []
+    
+    def test_existing_index_is_respected(self, advisor, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE INDEX users_city ON users (city, name)")
+        conn.commit()
+        conn.close()
+        
+        for _ in range(3):
+            advisor.record("SELECT * FROM users WHERE city = 'x'")
+        
+        assert index_names(db_path) == ['users_city']
+    
+    def test_list_and_drop(self, advisor, db_path):
+        for _ in range(4):
+            advisor.record("SELECT * FROM orders ORDER BY total")
+        
+        assert advisor.list_indexes() == [{
+            'name': index_name('orders', 'total'),
+            'table_name': 'orders',
+            'columns': ['total'],
+            'uses': 4
+        }]
+        
+        assert advisor.drop_index(index_name('orders', 'total'))
+        assert not advisor.drop_index(index_name('orders', 'total'))
+        assert index_names(db_path) == []
+        
+        # A dropped index is not rebuilt
+        advisor.record("SELECT * FROM orders ORDER BY total")
+        assert index_names(db_path) == []
+    
+    def test_only_advisor_indexes_can_be_dropped(self, advisor, db_path):
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE INDEX users_city ON users (city)")
+        conn.commit()
+        conn.close()
+        
+        assert not advisor.drop_index('users_city')
+        assert index_names(db_path) == ['users_city']
+    
+    def test_record_never_raises(self, advisor):
+        advisor.record("SELECT * FROM (((")
+        advisor.record("")
@@ -0,0 +1,126 @@
+import sqlite3
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch
+from core.insights import generate_insights
+
+
+@pytest.fixture
+def test_db():
+    """Create an in-memory database with numeric, text and sparse columns"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE orders (id INTEGER, amount REAL, status TEXT, note TEXT)")
+    rows = [
+        (1, 10.0, 'shipped', None),
+        (2, 20.0, 'shipped', 'gift'),
+        (3, None, 'pending', None),
+        (4, 20.0, 'shipped', None),
+        (5, 40.0, 'cancelled', 'late'),
+        (6, 20.0, 'pending', None),
+        (7, 5.5, None, None),
+    ]
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    
+    @contextmanager
+    def get_connection(*args, **kwargs):
+        yield conn
+    
+    with patch('core.insights.get_connection', get_connection):
+        yield conn
+    
+    conn.close()
+
+
+def exact_statistics(conn, column):
+    """The per-column queries generate_insights used to run"""
+    return {
+        'unique': conn.execute(f"SELECT COUNT(DISTINCT {column}) FROM orders").fetchone()[0],
+        'nulls': conn.execute(f"SELECT COUNT(*) FROM orders WHERE {column} IS NULL").fetchone()[0],
+        'min_max_avg': conn.execute(f"SELECT MIN({column}), MAX({column}), AVG({column}) FROM orders WHERE {column} IS NOT NULL").fetchone(),
+        'top': conn.execute(
+            f"SELECT {column}, COUNT(*) AS count FROM orders WHERE {column} IS NOT NULL "
+            f"GROUP BY {column} ORDER BY count DESC LIMIT 5"
+        ).fetchall()
+    }
+
+
+class TestInsights:
+    
+    def test_matches_per_column_queries(self, test_db):
+        insights = {insight.column_name: insight for insight in generate_insights("orders")}
+        
+        assert list(insights) == ['id', 'amount', 'status', 'note']
+        for column, insight in insights.items():
+            expected = exact_statistics(test_db, column)
+            assert insight.unique_values == expected['unique']
+            assert insight.null_count == expected['nulls']
+            if insight.data_type in ('INTEGER', 'REAL'):
+                assert (insight.min_value, insight.max_value) == expected['min_max_avg'][:2]
+                assert insight.avg_value == pytest.approx(expected['min_max_avg'][2])
+            # Counts of the top values match; tie order may differ
+            assert sorted(item['count'] for item in insight.most_common) == sorted(count for _, count in expected['top'])
+        
+        amount = insights['amount']
+        assert (amount.min_value, amount.max_value) == (5.5, 40.0)
+        assert amount.most_common[0] == {'value': 20.0, 'count': 3}
+    
+    def test_text_columns_have_no_numeric_stats(self, test_db):
+        [status] = generate_insights("orders", ["status"])
+        
+        assert status.min_value is None
+        assert status.avg_value is None
+        assert status.most_common[0] == {'value': 'shipped', 'count': 3}
+    
+    def test_all_null_column(self, test_db):
+        test_db.execute("UPDATE orders SET note = NULL")
+        [note] = generate_insights("orders", ["note"])
+        
+        assert note.unique_values == 0
+        assert note.null_count == 7
+        assert note.most_common is None
+    
+    def test_one_aggregate_scan(self, test_db):
+        statements = []
+        test_db.set_trace_callback(statements.append)
+        generate_insights("orders")
+        test_db.set_trace_callback(None)
+        
+        selects = [statement for statement in statements if statement.strip().upper().startswith("SELECT")]
+        # Counts for every column in one statement, then one bounded
+        # top-values query per column
+        assert len(selects) == 5
+        assert selects[0].count("COUNT(DISTINCT") == 4
+        assert all("LIMIT" in statement for statement in selects[1:])
+    
+    def test_unique_column_top_values(self, test_db):
+        [id_insight] = generate_insights("orders", ["id"])
+        
+        assert id_insight.unique_values == 7
+        assert id_insight.most_common == [{'value': i, 'count': 1} for i in range(1, 6)]
+    
+    def test_wide_table_is_aggregated_in_chunks(self, test_db):
+        with patch('core.insights.AGGREGATE_COLUMNS_PER_QUERY', 3):
+            insights = generate_insights("orders")
+        
+        assert [insight.null_count for insight in insights] == [0, 1, 1, 5]
+    
+    def test_approximate_mode(self, test_db):
+        exact = {insight.column_name: insight for insight in generate_insights("orders")}
+        approximate = {insight.column_name: insight for insight in generate_insights("orders", approximate=True)}
+        
+        for column, insight in approximate.items():
+            assert insight.approximate is True
+            assert insight.unique_values_error > 0
+            # Small columns are counted exactly by HyperLogLog's linear counting
+            assert insight.unique_values == exact[column].unique_values
+            assert insight.null_count == exact[column].null_count
+        
+        amount = approximate['amount']
+        assert (amount.min_value, amount.max_value) == (5.5, 40.0)
+        assert amount.avg_value == pytest.approx(exact['amount'].avg_value)
+        assert amount.quantiles == {'p25': 12.5, 'p50': 20.0, 'p75': 20.0}
+        assert amount.quantiles_rank_error == 0.0
+        assert amount.most_common[0] == {'value': 20.0, 'count': 3}
+        assert approximate['status'].quantiles is None
+        assert approximate['status'].most_common_error is not None
@@ -0,0 +1,55 @@
+import sys
+from core.json_flattener import JsonFlattener, flatten_json_object
+
+
+class TestJsonFlattener:
+    
+    def test_preserves_document_order(self):
+        obj = {"a": {"x": 1, "y": [2, {"z": 3}]}, "b": 4}
+        
+        assert list(flatten_json_object(obj).items()) == [
+            ("a__x", 1),
+            ("a__y_0", 2),
+            ("a__y_1__z", 3),
+            ("b", 4)
+        ]
+    
+    def test_empty_containers_produce_no_fields(self):
+        assert flatten_json_object({"a": {}, "b": [], "c": 1}) == {"c": 1}
+    
+    def test_top_level_array_and_prefix(self):
+        assert flatten_json_object([1, 2]) == {"_0": 1, "_1": 2}
+        assert flatten_json_object({"a": 1}, "root") == {"root__a": 1}
+    
+    def test_deep_document_beyond_recursion_limit(self):
+        depth = sys.getrecursionlimit() * 2
+        obj = {"value": 1}
+        for _ in range(depth):
+            obj = {"n": obj}
+        
+        flattened = flatten_json_object(obj)
+        
+        assert flattened == {"__".join(["n"] * depth + ["value"]): 1}
+    
+    def test_writes_into_output_buffer(self):
+        flattener = JsonFlattener()
+        out = {"existing": True}
+        
+        result = flattener.flatten({"a": {"b": 1}}, out=out)
+        
+        assert result is out
+        assert out == {"existing": True, "a__b": 1}
+    
+    def test_key_path_cache_is_reused_and_bounded(self):
+        flattener = JsonFlattener(max_cached_paths=4)
+        
+        first = flattener.flatten({"user": {"name": "a"}})
+        second = flattener.flatten({"user": {"name": "b"}})
+        
+        # The same key path object is served from the cache
+        assert next(iter(first)) is next(iter(second))
+        
+        # Exceeding the bound resets the cache without affecting results
+        wide = {f"k{i}": i for i in range(10)}
+        assert flattener.flatten({"w": wide}) == {f"w__k{i}": i for i in range(10)}
+        assert flattener.flatten({"user": {"name": "c"}}) == {"user__name": "c"}
@@ -0,0 +1,36 @@
+import pytest
+from core.latency_histogram import LatencyHistogram, get_latency_histogram, latency_stats
+
+
+class TestLatencyHistogram:
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+
+        assert histogram.percentile(99) is None
+        assert histogram.stats()['count'] == 0
+
+    def test_percentiles_within_one_bucket(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.record(i / 10)
+
+        assert histogram.percentile(50) == pytest.approx(5.0, rel=0.2)
+        assert histogram.percentile(50) >= 5.0
+        assert histogram.percentile(99) == pytest.approx(9.9, rel=0.2)
+        assert histogram.stats()['mean_seconds'] == pytest.approx(5.05)
+
+    def test_out_of_range_latencies(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0001)
+        histogram.record(10000)
+
+        assert histogram.percentile(1) == histogram.bounds[0]
+        assert histogram.percentile(100) == histogram.bounds[-1]
+
+    def test_shared_histograms(self):
+        histogram = get_latency_histogram("test.shared")
+        histogram.record(0.5)
+
+        assert get_latency_histogram("test.shared") is histogram
+        assert latency_stats()["test.shared"]['count'] == histogram.count
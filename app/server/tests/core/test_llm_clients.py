@@ -0,0 +1,52 @@
+import httpx
+import pytest
+from anthropic import Anthropic
+from openai import OpenAI
+from unittest.mock import MagicMock, patch
+from core import llm_clients
+from core.llm_clients import close_llm_clients, get_llm_client
+
+
+class TestLLMClients:
+
+    def teardown_method(self):
+        close_llm_clients()
+
+    def test_client_is_shared_per_class_and_key(self):
+        client_class = MagicMock(side_effect=lambda **kwargs: MagicMock())
+
+        first = get_llm_client(client_class, "key-a")
+
+        assert get_llm_client(client_class, "key-a") is first
+        assert get_llm_client(client_class, "key-b") is not first
+        assert client_class.call_count == 2
+
+    def test_client_settings(self):
+        client_class = MagicMock()
+        with patch.object(llm_clients, 'LLM_MAX_RETRIES', 4), \
+                patch.object(llm_clients, 'LLM_TIMEOUT_SECONDS', 12.0), \
+                patch.object(llm_clients, 'LLM_HTTP_MAX_CONNECTIONS', 7):
+            get_llm_client(client_class, "key")
+
+        kwargs = client_class.call_args.kwargs
+        assert kwargs['api_key'] == "key"
+        assert kwargs['max_retries'] == 4
+        assert kwargs['timeout'].read == 12.0
+        assert isinstance(kwargs['http_client'], httpx.Client)
+        kwargs['http_client'].close()
+
+    @pytest.mark.parametrize("client_class", [OpenAI, Anthropic])
+    def test_real_sdk_clients_keep_the_pool(self, client_class):
+        client = get_llm_client(client_class, "test-key")
+
+        assert get_llm_client(client_class, "test-key") is client
+        assert client.max_retries == llm_clients.LLM_MAX_RETRIES
+
+    def test_close_recreates_clients(self):
+        client_class = MagicMock(side_effect=lambda **kwargs: MagicMock())
+        first = get_llm_client(client_class, "key")
+
+        close_llm_clients()
+
+        first.close.assert_called_once()
+        assert get_llm_client(client_class, "key") is not first
@@ -0,0 +1,121 @@
+import asyncio
+import os
+import time
+import pytest
+from unittest.mock import patch
+from core import llm_hedging
+from core.data_models import QueryRequest
+from core.latency_histogram import get_latency_histogram
+from core.llm_hedging import HedgeStats, generate_sql_hedged, hedge_delay
+
+BOTH_KEYS = {'OPENAI_API_KEY': 'openai-key', 'ANTHROPIC_API_KEY': 'anthropic-key'}
+
+
+def fake_providers(responses):
+    """Build a generate_sql_with_provider() replacement from provider -> (seconds, sql or exception)"""
+    calls = []
+
+    def generate(provider, query_text, schema_info):
+        calls.append(provider)
+        seconds, outcome = responses[provider]
+        time.sleep(seconds)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return generate, calls
+
+
+@pytest.fixture
+def stats():
+    stats = HedgeStats()
+    with patch.dict(os.environ, BOTH_KEYS), \
+            patch.object(llm_hedging, 'LLM_HEDGE_ENABLED', True), \
+            patch.object(llm_hedging, 'hedge_stats', stats):
+        yield stats
+
+
+def run_hedged(responses, delay):
+    generate, calls = fake_providers(responses)
+    with patch.object(llm_hedging, 'generate_sql_with_provider', generate), \
+            patch.object(llm_hedging, 'LLM_HEDGE_DELAY_SECONDS', delay):
+        start = time.perf_counter()
+        sql = asyncio.run(generate_sql_hedged(QueryRequest(query="users"), {'tables': {}}))
+        return sql, calls, time.perf_counter() - start
+
+
+class TestGenerateSqlHedged:
+
+    def test_hedge_answers_when_primary_is_slow(self, stats):
+        sql, calls, elapsed = run_hedged(
+            {'openai': (1.0, "SELECT 1"), 'anthropic': (0.01, "SELECT 2")},
+            delay=0.05
+        )
+
+        assert sql == "SELECT 2"
+        assert calls == ['openai', 'anthropic']
+        assert elapsed < 0.5
+        assert (stats.hedges_sent, stats.hedge_wins) == (1, 1)
+
+    def test_no_hedge_when_primary_is_fast(self, stats):
+        sql, calls, _ = run_hedged(
+            {'openai': (0.01, "SELECT 1"), 'anthropic': (0.01, "SELECT 2")},
+            delay=0.5
+        )
+
+        assert sql == "SELECT 1"
+        assert calls == ['openai']
+        assert (stats.requests, stats.hedges_sent) == (1, 0)
+
+    def test_invalid_sql_hedges_immediately(self, stats):
+        sql, calls, elapsed = run_hedged(
+            {'openai': (0.01, "DROP TABLE users"), 'anthropic': (0.01, "SELECT 2")},
+            delay=10
+        )
+
+        assert sql == "SELECT 2"
+        assert elapsed < 1
+
+    def test_zero_delay_asks_both(self, stats):
+        sql, calls, _ = run_hedged(
+            {'openai': (0.05, "SELECT 1"), 'anthropic': (0.3, "SELECT 2")},
+            delay=0
+        )
+
+        assert sql == "SELECT 1"
+        assert sorted(calls) == ['anthropic', 'openai']
+        assert (stats.hedges_sent, stats.hedge_wins) == (1, 0)
+
+    def test_raises_primary_error_when_both_fail(self, stats):
+        with pytest.raises(ValueError, match="openai down"):
+            run_hedged(
+                {'openai': (0.01, ValueError("openai down")), 'anthropic': (0.01, ValueError("anthropic down"))},
+                delay=10
+            )
+
+    def test_single_key_is_not_hedged(self):
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'openai-key'}, clear=True), \
+                patch.object(llm_hedging, 'LLM_HEDGE_ENABLED', True), \
+                patch.object(llm_hedging, 'generate_sql', return_value="SELECT 1") as generate_sql:
+            sql = asyncio.run(generate_sql_hedged(QueryRequest(query="users"), {'tables': {}}))
+
+        assert sql == "SELECT 1"
+        generate_sql.assert_called_once()
+
+
+class TestHedgeDelay:
+
+    def test_fixed_delay(self):
+        with patch.object(llm_hedging, 'LLM_HEDGE_DELAY_SECONDS', 0.25):
+            assert hedge_delay("openai") == 0.25
+
+    def test_delay_follows_latency_percentile(self):
+        histogram = get_latency_histogram("llm.test_delay")
+        with patch.object(llm_hedging, 'LLM_HEDGE_DELAY_SECONDS', None), \
+                patch.object(llm_hedging, 'LLM_HEDGE_MIN_SAMPLES', 10), \
+                patch.object(llm_hedging, 'LLM_HEDGE_INITIAL_DELAY_SECONDS', 2.0):
+            assert hedge_delay("test_delay") == 2.0
+
+            for _ in range(10):
+                histogram.record(1.0)
+
+            assert hedge_delay("test_delay") == pytest.approx(1.0, rel=0.2)
@@ -5,6 +5,7 @@ from core.llm_processor import (
     generate_sql_with_openai, 
     generate_sql_with_anthropic, 
     format_schema_for_prompt,
+    format_schema_for_question,
     generate_sql
 )
 from core.data_models import QueryRequest
@@ -202,6 +203,20 @@ class TestLLMProcessor:
         
         assert result == ""
     
+    def test_format_schema_for_question_prunes_large_schemas(self):
+        schema_info = {
+            'tables': {
+                f'table_{i}': {'columns': {'id': 'INTEGER', f'value_{i}': 'TEXT'}, 'row_count': 1}
+                for i in range(30)
+            }
+        }
+        schema_info['tables']['invoices'] = {'columns': {'id': 'INTEGER', 'amount': 'REAL'}, 'row_count': 5}
+        
+        with patch('core.schema_retrieval.SCHEMA_PROMPT_MAX_TABLES', 10):
+            result = format_schema_for_question("Total invoice amount", schema_info)
+        
+        assert result == "Table: invoices\nColumns:\n  - id (INTEGER)\n  - amount (REAL)\nRow count: 5\n"
+    
     @patch('core.llm_processor.generate_sql_with_openai')
     def test_generate_sql_openai_key_priority(self, mock_openai_func):
         # Test that OpenAI is used when OpenAI key exists (regardless of request preference)
@@ -0,0 +1,78 @@
+import sqlite3
+from contextlib import ExitStack
+from core.query_cursors import OpenCursor, QueryCursorRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def open_cursor(conn, sql="SELECT value FROM numbers ORDER BY value"):
+    entry = OpenCursor(sql, conn, ExitStack())
+    entry.execute()
+    return entry
+
+
+def numbers_db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE numbers (value INTEGER)")
+    conn.executemany("INSERT INTO numbers VALUES (?)", [(i,) for i in range(10)])
+    return conn
+
+
+class TestOpenCursor:
+
+    def test_fetch_keeps_lookahead_row(self):
+        entry = open_cursor(numbers_db())
+
+        assert entry.fetch(4) == [(0,), (1,), (2,), (3,)]
+        assert entry.pending == [(4,)]
+        entry.skip(2, batch_size=1)
+        assert entry.fetch(10) == [(4,), (7,), (8,), (9,)]
+        assert entry.pending == []
+        assert entry.offset == 10
+
+
+class TestQueryCursorRegistry:
+
+    def test_take_matches_sql_and_offset(self):
+        registry = QueryCursorRegistry(max_open=2)
+        entry = open_cursor(numbers_db())
+        entry.fetch(3)
+        cursor_id = registry.put(entry)
+
+        assert registry.take(cursor_id, entry.sql_query, 0) is None
+        assert registry.take(cursor_id, "SELECT 1", 3) is None
+        assert registry.take(cursor_id, entry.sql_query, 3) is entry
+        # Taken cursors are out of the registry until put back
+        assert registry.take(cursor_id, entry.sql_query, 3) is None
+
+    def test_least_recently_used_is_evicted(self):
+        registry = QueryCursorRegistry(max_open=2)
+        conn = numbers_db()
+        entries = [open_cursor(conn) for _ in range(3)]
+        ids = [registry.put(entry) for entry in entries]
+
+        assert registry.take(ids[0], entries[0].sql_query, 0) is None
+        assert registry.take(ids[2], entries[2].sql_query, 0) is entries[2]
+        assert registry.stats()['evicted'] == 1
+
+    def test_idle_cursors_expire(self):
+        clock = FakeClock()
+        registry = QueryCursorRegistry(max_open=4, idle_seconds=60, clock=clock)
+        entry = open_cursor(numbers_db())
+        cursor_id = registry.put(entry)
+
+        clock.now = 61
+        assert registry.take(cursor_id, entry.sql_query, 0) is None
+        assert registry.stats()['open'] == 0
+
+    def test_disabled_registry_closes_cursor(self):
+        registry = QueryCursorRegistry(max_open=0)
+
+        assert registry.put(open_cursor(numbers_db())) is None
+        assert registry.stats()['open'] == 0
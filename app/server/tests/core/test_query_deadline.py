@@ -0,0 +1,82 @@
+import sqlite3
+import threading
+import time
+import pytest
+from core.query_deadline import QueryCancelled, QueryDeadline, QueryTimeout, deadline_guard
+
+# Never finishes on its own
+RUNAWAY_SQL = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    yield conn
+    conn.close()
+
+
+class TestQueryDeadline:
+
+    def test_no_timeout_never_expires(self):
+        deadline = QueryDeadline(None)
+
+        assert not deadline.should_stop()
+        deadline.check()
+
+    def test_expires_by_clock(self):
+        now = [100.0]
+        deadline = QueryDeadline(5, clock=lambda: now[0])
+
+        assert not deadline.expired()
+        now[0] = 105.0
+        assert deadline.expired()
+        with pytest.raises(QueryTimeout, match="5s"):
+            deadline.check()
+
+    def test_runaway_statement_times_out(self, conn):
+        deadline = QueryDeadline(0.1)
+
+        start = time.monotonic()
+        with pytest.raises(QueryTimeout):
+            with deadline.guard(conn):
+                conn.execute(RUNAWAY_SQL).fetchall()
+
+        assert time.monotonic() - start < 5
+
+    def test_cancel_interrupts_running_statement(self, conn):
+        deadline = QueryDeadline(None)
+        threading.Timer(0.1, deadline.cancel).start()
+
+        with pytest.raises(QueryCancelled) as excinfo:
+            with deadline.guard(conn):
+                conn.execute(RUNAWAY_SQL).fetchall()
+
+        assert not isinstance(excinfo.value, QueryTimeout)
+
+    def test_cancelled_before_start_does_not_run(self, conn):
+        deadline = QueryDeadline(None)
+        deadline.cancel()
+
+        with pytest.raises(QueryCancelled):
+            with deadline.guard(conn):
+                pytest.fail("statement should not run")
+
+    def test_handler_removed_after_guard(self, conn):
+        deadline = QueryDeadline(0.1)
+        with deadline.guard(conn):
+            conn.execute("SELECT 1").fetchall()
+
+        # Once the guard is gone an expired deadline no longer affects the connection
+        time.sleep(0.15)
+        assert conn.execute("WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100000) SELECT count(*) FROM c").fetchone() == (100000,)
+        deadline.cancel()
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+
+    def test_deadline_guard_without_deadline(self, conn):
+        with deadline_guard(conn, None) as guarded:
+            assert guarded is conn
+
+    def test_unrelated_errors_pass_through(self, conn):
+        with pytest.raises(sqlite3.OperationalError, match="no such table"):
+            with deadline_guard(conn, QueryDeadline(30)):
+                conn.execute("SELECT * FROM missing")
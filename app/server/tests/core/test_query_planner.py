@@ -0,0 +1,147 @@
+import sqlite3
+import pytest
+from unittest.mock import patch
+from core import query_planner
+from core.query_planner import (
+    add_top_level_limit,
+    estimate_query_cost,
+    guard_query_cost,
+    has_top_level_limit,
+    is_single_row_aggregate
+)
+
+
+@pytest.fixture
+def conn():
+    """Empty tables; the row counts come from the schema passed in"""
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, city TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER, user_id INTEGER, total REAL)")
+    conn.execute("CREATE INDEX orders_user_id ON orders (user_id)")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def schema():
+    return {
+        'tables': {
+            'users': {'columns': {}, 'row_count': 10000},
+            'orders': {
+                'columns': {},
+                'row_count': 100000,
+                'column_stats': {'row_count': 100000, 'columns': {'user_id': {'unique_values': 10000}}}
+            }
+        }
+    }
+
+
+class TestEstimateQueryCost:
+    
+    def test_full_scan(self, conn, schema):
+        estimate = estimate_query_cost(conn, "SELECT * FROM users", schema)
+        
+        assert estimate.rows_visited == 10000
+        assert estimate.rows_returned == 10000
+        assert estimate.full_scans == ['users']
+    
+    def test_primary_key_lookup(self, conn, schema):
+        estimate = estimate_query_cost(conn, "SELECT * FROM users WHERE id = 5", schema)
+        
+        assert estimate.rows_visited == 1
+        assert estimate.full_scans == []
+    
+    def test_index_lookup_uses_column_stats(self, conn, schema):
+        estimate = estimate_query_cost(conn, "SELECT * FROM orders WHERE user_id = 5", schema)
+        
+        # 100000 rows / 10000 distinct user ids
+        assert estimate.rows_returned == 10
+        assert estimate.rows_visited < 50
+    
+    def test_cartesian_join_multiplies(self, conn, schema):
+        estimate = estimate_query_cost(conn, "SELECT * FROM users u, orders o", schema)
+        
+        assert estimate.rows_returned == 10000 * 100000
+        assert estimate.rows_visited > 10000 * 100000
+        assert estimate.full_scans == ['users', 'orders']
+    
+    def test_indexed_join_stays_linear(self, conn, schema):
+        estimate = estimate_query_cost(
+            conn, "SELECT * FROM users u JOIN orders o ON o.user_id = u.id", schema
+        )
+        
+        assert estimate.rows_visited < 10 * (10000 + 100000)
+    
+    def test_single_row_aggregate(self, conn, schema):
+        estimate = estimate_query_cost(conn, "SELECT COUNT(*) FROM orders", schema)
+        
+        assert estimate.rows_visited == 100000
+        assert estimate.rows_returned == 1
+
+
+class TestGuardQueryCost:
+    
+    def test_cheap_query_runs(self, conn, schema):
+        decision = guard_query_cost(conn, "SELECT * FROM users WHERE id = 1", schema)
+        
+        assert decision.action == "run"
+        assert decision.sql == "SELECT * FROM users WHERE id = 1"
+        assert not decision.low_priority
+    
+    def test_runaway_query_is_rejected(self, conn, schema):
+        with patch.object(query_planner, 'QUERY_COST_MAX_ROWS', 1000000):
+            decision = guard_query_cost(conn, "SELECT * FROM users u, orders o", schema)
+        
+        assert decision.action == "reject"
+        assert "full scans of: users, orders" in decision.reason
+    
+    def test_unbounded_query_gets_limit(self, conn, schema):
+        with patch.object(query_planner, 'QUERY_AUTO_LIMIT', 500):
+            decision = guard_query_cost(conn, "SELECT * FROM orders;", schema)
+        
+        assert decision.action == "limit"
+        assert decision.row_limit == 500
+        assert decision.sql == "SELECT * FROM orders LIMIT 500"
+    
+    def test_with_statement_gets_limit(self, conn, schema):
+        with patch.object(query_planner, 'QUERY_AUTO_LIMIT', 500):
+            decision = guard_query_cost(conn, "WITH o AS (SELECT * FROM orders) SELECT * FROM o", schema)
+        
+        assert decision.action == "limit"
+        assert decision.sql == "WITH o AS (SELECT * FROM orders) SELECT * FROM o LIMIT 500"
+    
+    def test_existing_limit_is_kept(self, conn, schema):
+        with patch.object(query_planner, 'QUERY_AUTO_LIMIT', 500):
+            decision = guard_query_cost(conn, "SELECT * FROM orders LIMIT 20", schema)
+        
+        assert decision.action == "run"
+    
+    def test_expensive_query_is_low_priority(self, conn, schema):
+        with patch.object(query_planner, 'QUERY_COST_LOW_PRIORITY_ROWS', 50000):
+            assert guard_query_cost(conn, "SELECT COUNT(*) FROM orders", schema).low_priority
+            assert not guard_query_cost(conn, "SELECT COUNT(*) FROM users", schema).low_priority
+    
+    def test_unplannable_query_is_passed_through(self, conn, schema):
+        decision = guard_query_cost(conn, "SELECT * FROM missing", schema)
+        
+        assert decision.action == "run"
+        assert decision.estimate is None
+
+
+class TestQueryShape:
+    
+    def test_has_top_level_limit(self):
+        assert has_top_level_limit("SELECT * FROM t LIMIT 5")
+        assert not has_top_level_limit("SELECT * FROM (SELECT * FROM t LIMIT 5)")
+        assert not has_top_level_limit("SELECT 'LIMIT 5' FROM t")
+    
+    def test_add_top_level_limit(self):
+        assert add_top_level_limit("SELECT a, b AS a FROM t ORDER BY b DESC;", 5) == "SELECT a, b AS a FROM t ORDER BY b DESC LIMIT 5"
+        assert add_top_level_limit("SELECT a FROM t UNION SELECT a FROM u ORDER BY 1", 5) == "SELECT a FROM t UNION SELECT a FROM u ORDER BY 1 LIMIT 5"
+        assert add_top_level_limit("SELECT a FROM t WHERE a IN (VALUES (1))", 5) == "SELECT a FROM t WHERE a IN (VALUES (1)) LIMIT 5"
+        assert add_top_level_limit("SELECT 1 UNION VALUES (2)", 5) == "SELECT * FROM (SELECT 1 UNION VALUES (2)) LIMIT 5"
+    
+    def test_is_single_row_aggregate(self):
+        assert is_single_row_aggregate("SELECT COUNT(*), max(total) FROM orders")
+        assert not is_single_row_aggregate("SELECT city, COUNT(*) FROM users GROUP BY city")
+        assert not is_single_row_aggregate("SELECT * FROM users WHERE id IN (SELECT MAX(id) FROM users)")
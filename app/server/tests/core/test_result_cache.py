@@ -0,0 +1,138 @@
+import json
+import pytest
+from core.result_cache import ALL_TABLES, ResultCache, normalize_sql
+from core.sql_security import SQLSecurityError
+
+
+def make_result(rows):
+    return {'results': [{'id': i} for i in range(rows)], 'columns': ['id'], 'truncated': False, 'error': None}
+
+
+def result_size(result):
+    return len(json.dumps(result))
+
+
+class TestNormalizeSql:
+
+    def test_whitespace_and_keyword_case_are_folded(self):
+        assert normalize_sql("select id\n  FROM users where id = 1;")[0] == normalize_sql("SELECT id FROM users WHERE id = 1")[0]
+
+    def test_names_and_literals_are_kept(self):
+        assert normalize_sql("SELECT Name FROM users")[0] != normalize_sql("SELECT name FROM users")[0]
+        assert normalize_sql("SELECT 'a b' FROM users")[0] != normalize_sql("SELECT 'a  b' FROM users")[0]
+        assert normalize_sql('SELECT "a b" FROM t')[0] != normalize_sql("SELECT a b FROM t")[0]
+
+    def test_tables_read(self):
+        _, tables = normalize_sql("SELECT u.name FROM Users u JOIN orders o ON o.user_id = u.id")
+
+        assert {'users', 'orders'} <= tables
+        assert ALL_TABLES not in tables
+        assert ALL_TABLES in normalize_sql("SELECT name FROM sqlite_master")[1]
+        assert ALL_TABLES in normalize_sql("PRAGMA table_info(users)")[1]
+
+    def test_rejects_invalid_sql(self):
+        with pytest.raises(SQLSecurityError):
+            normalize_sql("DROP TABLE users")
+
+
+class TestResultCache:
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache(max_bytes=10000)
+        key, tables = cache.make_key("SELECT id FROM users")
+
+        assert cache.get(key) is None
+        cache.put(key, make_result(3), tables)
+        assert cache.get(key) == make_result(3)
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+        assert stats['size_bytes'] == result_size(make_result(3))
+
+    def test_variant_is_part_of_key(self):
+        cache = ResultCache(max_bytes=10000)
+
+        assert cache.make_key("SELECT id FROM users", "rows")[0] != cache.make_key("SELECT id FROM users", "columnar")[0]
+
+    def test_lru_eviction_by_bytes(self):
+        size = result_size(make_result(10))
+        cache = ResultCache(max_bytes=size * 2)
+        keys = [cache.make_key(f"SELECT id FROM t{i}") for i in range(3)]
+        cache.put(keys[0][0], make_result(10), keys[0][1])
+        cache.put(keys[1][0], make_result(10), keys[1][1])
+        cache.get(keys[0][0])
+        cache.put(keys[2][0], make_result(10), keys[2][1])
+
+        assert cache.get(keys[0][0]) is not None
+        assert cache.get(keys[1][0]) is None
+        assert cache.get(keys[2][0]) is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['size_bytes'] == size * 2
+
+    def test_large_results_are_not_cached(self):
+        cache = ResultCache(max_bytes=100000, max_entry_bytes=100)
+        key, tables = cache.make_key("SELECT id FROM users")
+        cache.put(key, make_result(50), tables)
+
+        assert cache.get(key) is None
+
+    def test_bump_invalidates_only_readers_of_the_table(self):
+        cache = ResultCache(max_bytes=100000)
+        users_key, users_tables = cache.make_key("SELECT id FROM users")
+        orders_key, orders_tables = cache.make_key("SELECT id FROM orders")
+        schema_key, schema_tables = cache.make_key("SELECT name FROM sqlite_master")
+        for key, tables in ((users_key, users_tables), (orders_key, orders_tables), (schema_key, schema_tables)):
+            cache.put(key, make_result(1), tables)
+
+        cache.bump_table("Users")
+
+        assert cache.get(users_key) is None
+        assert cache.get(schema_key) is None
+        assert cache.get(orders_key) is not None
+        assert cache.make_key("SELECT id FROM users")[0] != users_key
+        assert cache.make_key("SELECT id FROM orders")[0] == orders_key
+        assert cache.stats()['invalidations'] == 2
+
+    def test_disabled(self):
+        cache = ResultCache(max_bytes=0)
+
+        assert cache.make_key("SELECT id FROM users") == (None, frozenset())
+
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "results.db")
+        cache = ResultCache(max_bytes=10000, persist_path=path)
+        cache.bump_table("users")
+        key, tables = cache.make_key("SELECT id FROM users")
+        cache.put(key, make_result(2), tables)
+        cache.close()
+
+        restarted = ResultCache(max_bytes=10000, persist_path=path)
+
+        # Data versions are restored, so the key still matches
+        assert restarted.make_key("SELECT id FROM users")[0] == key
+        assert restarted.get(key) == make_result(2)
+        assert restarted.stats()['persistent_hits'] == 1
+
+        restarted.bump_table("users")
+        restarted.close()
+        assert ResultCache(max_bytes=10000, persist_path=path).get(key) is None
+
+    def test_persistent_tier_budget(self, tmp_path):
+        size = result_size(make_result(10))
+        ticks = iter(range(100))
+        cache = ResultCache(
+            max_bytes=size,
+            persist_path=str(tmp_path / "results.db"),
+            disk_max_bytes=size * 2,
+            clock=lambda: next(ticks)
+        )
+        keys = [cache.make_key(f"SELECT id FROM t{i}") for i in range(3)]
+        for key, tables in keys:
+            cache.put(key, make_result(10), tables)
+
+        # Only the newest entry fits in memory; the oldest has left the disk tier too
+        assert cache.get(keys[0][0]) is None
+        assert cache.get(keys[1][0]) is not None
+        assert cache.stats()['persistent_hits'] == 1
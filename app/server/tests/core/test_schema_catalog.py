@@ -0,0 +1,91 @@
+import sqlite3
+import pytest
+from core.schema_catalog import SchemaCatalog
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Create a file database with one table"""
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.executemany("INSERT INTO users (name) VALUES (?)", [('Alice',), ('Bob',)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+@pytest.fixture
+def catalog(db_path):
+    catalog = SchemaCatalog(db_path)
+    yield catalog
+    catalog.close()
+
+
+def write(db_path, *statements):
+    """Commit statements from a separate connection, like another process would"""
+    conn = sqlite3.connect(db_path)
+    for statement in statements:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+
+
+class TestSchemaCatalog:
+    
+    def test_schema_is_built_once(self, catalog):
+        first = catalog.get_schema()
+        second = catalog.get_schema()
+        
+        assert first == second == {
+            'tables': {
+                'users': {'columns': {'id': 'INTEGER', 'name': 'TEXT'}, 'row_count': 2}
+            }
+        }
+        assert catalog.rebuild_count == 1
+    
+    def test_returned_schema_is_a_copy(self, catalog):
+        catalog.get_schema()['tables']['users']['columns']['hacked'] = 'TEXT'
+        
+        assert 'hacked' not in catalog.get_schema()['tables']['users']['columns']
+    
+    def test_external_change_triggers_rebuild(self, catalog, db_path):
+        catalog.get_schema()
+        
+        write(db_path, "INSERT INTO users (name) VALUES ('Carol')")
+        
+        assert catalog.get_schema()['tables']['users']['row_count'] == 3
+        assert catalog.rebuild_count == 2
+    
+    def test_register_and_drop_table_without_rescan(self, catalog, db_path):
+        catalog.get_schema()
+        
+        write(db_path, "CREATE TABLE orders (id INTEGER, total REAL)", "INSERT INTO orders VALUES (1, 9.5)")
+        catalog.register_table('orders', {'id': 'INTEGER', 'total': 'REAL'}, 1)
+        
+        schema = catalog.get_schema()
+        assert schema['tables']['orders'] == {'columns': {'id': 'INTEGER', 'total': 'REAL'}, 'row_count': 1}
+        
+        write(db_path, "DROP TABLE orders")
+        catalog.drop_table('orders')
+        
+        assert 'orders' not in catalog.get_schema()['tables']
+        assert catalog.rebuild_count == 1
+    
+    def test_invalidate_single_table_keeps_row_count(self, catalog, db_path):
+        catalog.get_schema()
+        
+        write(db_path, "ALTER TABLE users ADD COLUMN email TEXT")
+        catalog.invalidate('users')
+        
+        users = catalog.get_schema()['tables']['users']
+        assert users['columns'] == {'id': 'INTEGER', 'name': 'TEXT', 'email': 'TEXT'}
+        assert users['row_count'] == 2
+        assert catalog.rebuild_count == 1
+    
+    def test_invalidate_all(self, catalog):
+        catalog.get_schema()
+        catalog.invalidate()
+        catalog.get_schema()
+        
+        assert catalog.rebuild_count == 2
@@ -0,0 +1,110 @@
+from core.schema_retrieval import extract_terms, rank_tables, select_schema_context
+
+
+def make_table(columns, row_count=10, values=None):
+    table = {'columns': {name: 'TEXT' for name in columns}, 'row_count': row_count}
+    if values:
+        table['column_stats'] = {
+            'row_count': row_count,
+            'columns': {
+                name: {'most_common': [{'value': value, 'count': 1} for value in column_values]}
+                for name, column_values in values.items()
+            }
+        }
+    return table
+
+
+def make_schema():
+    tables = {
+        'customers': make_table(['id', 'name', 'email', 'city']),
+        'orders': make_table(['id', 'customer_id', 'total', 'created_at']),
+        'products': make_table(['id', 'name', 'category'], values={'category': ['Electronics', 'Garden']}),
+        'shipments': make_table(['id', 'order_id', 'carrier', 'shippedAt']),
+    }
+    for i in range(20):
+        tables[f'sensor_log_{i}'] = make_table(['id', 'reading', 'recorded_at'])
+    return {'tables': tables}
+
+
+class TestExtractTerms:
+
+    def test_identifiers_are_split_and_stemmed(self):
+        assert extract_terms("customer_id") == ['customer', 'id']
+        assert extract_terms("shippedAt") == ['shipped']
+        assert extract_terms("HTTPStatus") == ['http', 'status']
+        assert extract_terms("Show me all categories of the orders") == ['category', 'order']
+
+
+class TestRankTables:
+
+    def test_names_and_values_match(self):
+        ranked = [name for name, _ in rank_tables("total of orders per customer", make_schema())]
+
+        assert ranked[:2] == ['orders', 'customers']
+        assert [name for name, _ in rank_tables("electronics sold", make_schema())] == ['products']
+
+    def test_past_usage_breaks_ties(self):
+        schema = make_schema()
+        uses = {('sensor_log_7', 'reading'): 40}
+
+        ranked = [name for name, _ in rank_tables("sensor readings", schema, uses)]
+
+        assert ranked[0] == 'sensor_log_7'
+        assert len(ranked) == 20
+
+    def test_no_match(self):
+        assert rank_tables("how many", make_schema()) == []
+
+
+class TestSelectSchemaContext:
+
+    def test_small_schema_is_unchanged(self):
+        schema = {'tables': {'users': make_table(['id', 'name'])}}
+
+        assert select_schema_context("users", schema, max_tables=10) is schema
+
+    def test_keeps_matches_and_joined_tables(self):
+        schema = make_schema()
+
+        pruned = select_schema_context("which carrier shipped each order", schema, max_tables=2)
+
+        assert list(pruned['tables']) == ['orders', 'shipments']
+        assert pruned['tables']['orders'] == schema['tables']['orders']
+
+    def test_foreign_keys_pull_in_referenced_tables(self):
+        pruned = select_schema_context("order totals", make_schema(), max_tables=4)
+
+        assert list(pruned['tables']) == ['customers', 'orders', 'shipments']
+
+    def test_references_prefer_the_same_name_suffix(self):
+        schema = {'tables': {
+            f'{entity}_{region}': make_table(columns)
+            for region in ('emea', 'apac', 'latam')
+            for entity, columns in (('customers', ['id', 'name']), ('orders', ['id', 'customer_id', 'total']))
+        }}
+
+        pruned = select_schema_context("apac order totals", schema, max_tables=2)
+
+        assert list(pruned['tables']) == ['customers_apac', 'orders_apac']
+
+    def test_table_limit(self):
+        pruned = select_schema_context("sensor readings", make_schema(), max_tables=3)
+
+        assert len(pruned['tables']) == 3
+        assert all(name.startswith('sensor_log_') for name in pruned['tables'])
+
+    def test_falls_back_to_most_used_tables(self):
+        uses = {('products', 'category'): 5}
+
+        pruned = select_schema_context("how many", make_schema(), uses, max_tables=2)
+
+        assert list(pruned['tables']) == ['customers', 'products']
+
+    def test_wide_tables_keep_matching_and_key_columns(self):
+        columns = ['id'] + [f'metric_{i}' for i in range(30)] + ['region', 'account_id']
+        schema = {'tables': {'facts': make_table(columns)}}
+
+        pruned = select_schema_context("revenue by region", schema, max_columns=5)
+
+        assert list(pruned['tables']['facts']['columns']) == ['id', 'metric_0', 'metric_1', 'region', 'account_id']
+        assert len(schema['tables']['facts']['columns']) == 33
@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from core.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+
+    def test_concurrent_calls_share_one_result(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "result"
+
+        async def main():
+            return await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+        results = asyncio.run(main())
+
+        assert [result for result, _ in results] == ["result"] * 5
+        assert [shared for _, shared in results] == [False, True, True, True, True]
+        assert len(calls) == 1
+        assert flight.stats() == {'calls': 5, 'shared': 4, 'in_flight': 0}
+
+    def test_sequential_and_different_keys_are_not_shared(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        async def main():
+            first = await flight.do("key", work)
+            second = await flight.do("key", work)
+            other = await flight.do("other", work)
+            return first, second, other
+
+        assert asyncio.run(main()) == ((1, False), (2, False), (3, False))
+
+    def test_exception_is_shared(self):
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def main():
+            return await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+
+        errors = asyncio.run(main())
+
+        assert all(isinstance(error, ValueError) for error in errors)
+
+    def test_call_survives_until_last_waiter_leaves(self):
+        flight = SingleFlight()
+        finished = []
+
+        async def work():
+            try:
+                await asyncio.sleep(0.1)
+                finished.append(True)
+                return "result"
+            except asyncio.CancelledError:
+                finished.append(False)
+                raise
+
+        async def main():
+            first = asyncio.create_task(flight.do("key", work))
+            second = asyncio.create_task(flight.do("key", work))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            result = await second
+
+            third = asyncio.create_task(flight.do("key", work))
+            await asyncio.sleep(0.01)
+            third.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await third
+            await asyncio.sleep(0.01)
+            return result
+
+        assert asyncio.run(main()) == ("result", True)
+        # The first call finished for the remaining waiter; the abandoned one was stopped
+        assert finished == [True, False]
+        assert flight.stats()['in_flight'] == 0
@@ -0,0 +1,79 @@
+import random
+import numpy as np
+import pytest
+from core.sketches import CountMinTopK, HyperLogLog, ReservoirSample, hash_values
+
+
+def feed(sketch, values, batch_size=10000):
+    for start in range(0, len(values), batch_size):
+        batch = values[start:start + batch_size]
+        if isinstance(sketch, CountMinTopK):
+            sketch.update(hash_values(batch), batch)
+        else:
+            sketch.update(hash_values(batch))
+
+
+class TestHyperLogLog:
+    
+    def test_small_cardinalities_are_exact(self):
+        hll = HyperLogLog()
+        feed(hll, list(range(10)) * 3)
+        
+        assert hll.estimate() == 10
+    
+    @pytest.mark.parametrize("cardinality", [1_000, 50_000, 300_000])
+    def test_estimate_within_error_bound(self, cardinality):
+        hll = HyperLogLog()
+        feed(hll, [f"value-{i}" for i in range(cardinality)] * 2)
+        
+        # Four standard errors
+        assert abs(hll.estimate() / cardinality - 1) < 4 * hll.relative_error
+    
+    def test_empty(self):
+        assert HyperLogLog().estimate() == 0
+
+
+class TestCountMinTopK:
+    
+    def test_finds_heavy_hitters(self):
+        rng = random.Random(7)
+        values = [int(rng.paretovariate(1.2)) for _ in range(200_000)]
+        expected = {}
+        for value in values:
+            expected[value] = expected.get(value, 0) + 1
+        
+        top_k = CountMinTopK(k=5)
+        feed(top_k, values)
+        
+        top = top_k.top()
+        exact_top = sorted(expected.items(), key=lambda item: -item[1])[:5]
+        assert [value for value, _ in top] == [value for value, _ in exact_top]
+        for value, count in top:
+            # Count-Min never underestimates
+            assert expected[value] <= count <= expected[value] + top_k.error_bound()
+    
+    def test_candidate_set_stays_bounded(self):
+        top_k = CountMinTopK(k=5, candidates=32)
+        feed(top_k, list(range(100_000)), batch_size=1000)
+        
+        assert len(top_k.candidates) <= 64
+
+
+class TestReservoirSample:
+    
+    def test_exact_while_everything_fits(self):
+        sample = ReservoirSample(size=1000, seed=1)
+        sample.update(np.arange(101, dtype=np.float64))
+        
+        assert sample.quantiles([0.25, 0.5, 0.75]) == [25.0, 50.0, 75.0]
+        assert sample.rank_error() == 0.0
+    
+    def test_quantiles_within_rank_error(self):
+        sample = ReservoirSample(size=5000, seed=1)
+        n = 500_000
+        for start in range(0, n, 10000):
+            sample.update(np.arange(start, start + 10000, dtype=np.float64))
+        
+        assert len(sample.values) == 5000
+        for probability, estimate in zip([0.25, 0.5, 0.75], sample.quantiles([0.25, 0.5, 0.75])):
+            assert abs(estimate / n - probability) <= sample.rank_error()
@@ -0,0 +1,112 @@
+from core.sql_cache import GeneratedSQLCache, normalize_query_text, schema_fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+SCHEMA = {
+    'tables': {
+        'users': {'columns': {'id': 'INTEGER', 'name': 'TEXT'}, 'row_count': 2}
+    }
+}
+
+
+class TestSqlCache:
+    
+    def test_normalize_query_text(self):
+        assert normalize_query_text("  How many   USERS are there? ") == "how many users are there"
+        assert normalize_query_text("how many users are there") == "how many users are there"
+    
+    def test_schema_fingerprint_ignores_row_counts(self):
+        grown = {'tables': {'users': {'columns': {'id': 'INTEGER', 'name': 'TEXT'}, 'row_count': 500}}}
+        altered = {'tables': {'users': {'columns': {'id': 'INTEGER', 'email': 'TEXT'}, 'row_count': 2}}}
+        
+        assert schema_fingerprint(SCHEMA) == schema_fingerprint(grown)
+        assert schema_fingerprint(SCHEMA) != schema_fingerprint(altered)
+    
+    def test_key_includes_provider_and_schema(self):
+        fingerprint = schema_fingerprint(SCHEMA)
+        key = GeneratedSQLCache.make_key("How many users?", "openai", fingerprint)
+        
+        assert key == GeneratedSQLCache.make_key("how many users", "openai", fingerprint)
+        assert key != GeneratedSQLCache.make_key("how many users", "anthropic", fingerprint)
+        assert key != GeneratedSQLCache.make_key("how many users", "openai", schema_fingerprint({'tables': {}}))
+    
+    def test_hit_and_miss_counters(self):
+        cache = GeneratedSQLCache(max_entries=10, ttl_seconds=60)
+        
+        assert cache.get("k") is None
+        cache.put("k", "SELECT 1")
+        assert cache.get("k") == "SELECT 1"
+        
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['entries'] == 1
+    
+    def test_lru_eviction(self):
+        cache = GeneratedSQLCache(max_entries=2, ttl_seconds=60)
+        cache.put("a", "SELECT 'a'")
+        cache.put("b", "SELECT 'b'")
+        cache.get("a")
+        cache.put("c", "SELECT 'c'")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "SELECT 'a'"
+        assert cache.get("c") == "SELECT 'c'"
+        assert cache.stats()['evictions'] == 1
+    
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = GeneratedSQLCache(max_entries=10, ttl_seconds=60, clock=clock)
+        cache.put("k", "SELECT 1")
+        
+        clock.now += 59
+        assert cache.get("k") == "SELECT 1"
+        clock.now += 2
+        assert cache.get("k") is None
+        assert cache.stats()['expirations'] == 1
+    
+    def test_disabled_cache(self):
+        cache = GeneratedSQLCache(max_entries=0)
+        cache.put("k", "SELECT 1")
+        
+        assert cache.get("k") is None
+        assert cache.stats()['misses'] == 0
+    
+    def test_persistent_tier_survives_restart(self, tmp_path):
+        path = str(tmp_path / "sql_cache.db")
+        cache = GeneratedSQLCache(max_entries=10, ttl_seconds=60, persist_path=path)
+        cache.put("k", "SELECT 1")
+        cache.close()
+        
+        restarted = GeneratedSQLCache(max_entries=10, ttl_seconds=60, persist_path=path)
+        try:
+            assert restarted.get("k") == "SELECT 1"
+            assert restarted.stats()['persistent_hits'] == 1
+            
+            restarted.clear()
+            assert restarted.get("k") is None
+        finally:
+            restarted.close()
+    
+    def test_persistent_tier_expires_entries(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "sql_cache.db")
+        cache = GeneratedSQLCache(max_entries=10, ttl_seconds=60, persist_path=path, clock=clock)
+        cache.put("k", "SELECT 1")
+        cache.close()
+        
+        clock.now += 120
+        restarted = GeneratedSQLCache(max_entries=10, ttl_seconds=60, persist_path=path, clock=clock)
+        try:
+            assert restarted.get("k") is None
+            assert restarted.stats()['expirations'] == 1
+        finally:
+            restarted.close()
@@ -1,7 +1,24 @@
 import pytest
 import sqlite3
+from contextlib import contextmanager
 from unittest.mock import patch
-from core.sql_processor import execute_sql_safely, get_database_schema
+from core.sql_processor import (
+    execute_sql_safely,
+    get_database_schema,
+    iter_sql_batches,
+    execute_sql_page,
+    encode_query_cursor,
+    decode_query_cursor,
+    SQLSecurityError
+)
+
+
+def use_connection(conn):
+    """Build a get_connection() replacement that always yields `conn`"""
+    @contextmanager
+    def get_connection(*args, **kwargs):
+        yield conn
+    return get_connection
 
 
 @pytest.fixture
@@ -40,9 +57,8 @@ def test_db():
     
     conn.commit()
     
-    # Patch the database connection to use our in-memory database
-    with patch('core.sql_processor.sqlite3.connect') as mock_connect:
-        mock_connect.return_value = conn
+    # Patch the pooled connection to use our in-memory database
+    with patch('core.sql_processor.get_connection', use_connection(conn)):
         yield conn
     
     conn.close()
@@ -81,6 +97,45 @@ class TestSQLProcessor:
         assert result['results'] == []
         assert result['columns'] == []
     
+    def test_execute_sql_safely_columnar(self, test_db):
+        result = execute_sql_safely("SELECT name, age FROM users ORDER BY id", columnar=True)
+        
+        assert result['error'] is None
+        assert result['columns'] == ['name', 'age']
+        assert result['column_data'] == [['John', 'Jane', 'Bob'], [25, 30, 35]]
+        assert result['results'] == []
+    
+    def test_execute_sql_safely_columnar_no_results(self, test_db):
+        result = execute_sql_safely("SELECT name, age FROM users WHERE age > 100", columnar=True)
+        
+        assert result['columns'] == ['name', 'age']
+        assert result['column_data'] == [[], []]
+    
+    def test_execute_sql_safely_caps_rows(self, test_db):
+        result = execute_sql_safely("SELECT name FROM users ORDER BY id", max_rows=2)
+        
+        assert result['error'] is None
+        assert [row['name'] for row in result['results']] == ['John', 'Jane']
+        assert result['truncated'] is True
+    
+    def test_execute_sql_safely_cap_not_reached(self, test_db):
+        result = execute_sql_safely("SELECT name FROM users ORDER BY id", max_rows=3)
+        columnar = execute_sql_safely("SELECT name FROM users ORDER BY id", columnar=True, max_rows=2)
+        
+        assert len(result['results']) == 3
+        assert result['truncated'] is False
+        assert columnar['column_data'] == [['John', 'Jane']]
+        assert columnar['truncated'] is True
+    
+    def test_execute_sql_safely_default_cap(self, test_db):
+        with patch('core.sql_processor.MAX_RESULT_ROWS', 1):
+            capped = execute_sql_safely("SELECT * FROM users")
+        with patch('core.sql_processor.MAX_RESULT_ROWS', 0):
+            uncapped = execute_sql_safely("SELECT * FROM users")
+        
+        assert len(capped['results']) == 1 and capped['truncated'] is True
+        assert len(uncapped['results']) == 3 and uncapped['truncated'] is False
+    
     def test_execute_sql_safely_dangerous_keywords(self):
         # Test dangerous SQL operations
         dangerous_queries = [
@@ -148,16 +203,14 @@ class TestSQLProcessor:
     
     def test_get_database_schema_empty_database(self):
         # Test with empty in-memory database
-        with patch('core.sql_processor.sqlite3.connect') as mock_connect:
-            conn = sqlite3.connect(':memory:')
-            mock_connect.return_value = conn
-            
+        conn = sqlite3.connect(':memory:')
+        with patch('core.sql_processor.get_connection', use_connection(conn)):
             result = get_database_schema()
             assert result == {'tables': {}}
     
     def test_get_database_schema_error(self):
         # Test database connection error
-        with patch('core.sql_processor.sqlite3.connect', side_effect=sqlite3.Error("Connection failed")):
+        with patch('core.sql_processor.get_connection', side_effect=sqlite3.Error("Connection failed")):
             result = get_database_schema()
             
             assert result == {'tables': {}, 'error': 'Connection failed'}
@@ -178,4 +231,76 @@ class TestSQLProcessor:
         for keyword, query in dangerous_operations:
             result = execute_sql_safely(query)
             assert result['error'] is not None
-            # Query should be blocked
\ No newline at end of file
+            # Query should be blocked
+    
+    def test_iter_sql_batches(self, test_db):
+        batches = list(iter_sql_batches("SELECT name FROM users ORDER BY id", batch_size=2))
+        
+        assert [rows for _, rows in batches] == [
+            [{'name': 'John'}, {'name': 'Jane'}],
+            [{'name': 'Bob'}]
+        ]
+        assert all(columns == ['name'] for columns, _ in batches)
+    
+    def test_iter_sql_batches_empty_result_keeps_columns(self, test_db):
+        batches = list(iter_sql_batches("SELECT name, age FROM users WHERE age > 100"))
+        
+        assert batches == [(['name', 'age'], [])]
+    
+    def test_iter_sql_batches_rejects_dangerous_sql(self, test_db):
+        with pytest.raises(SQLSecurityError):
+            next(iter_sql_batches("DROP TABLE users"))
+    
+    def test_execute_sql_page(self, test_db):
+        first = execute_sql_page("SELECT name FROM users ORDER BY id;", offset=0, page_size=2)
+        second = execute_sql_page("SELECT name FROM users ORDER BY id;", offset=2, page_size=2)
+        
+        assert first['error'] is None
+        assert first['results'] == [{'name': 'John'}, {'name': 'Jane'}]
+        assert first['has_more'] is True
+        assert second['results'] == [{'name': 'Bob'}]
+        assert second['has_more'] is False
+    
+    def test_execute_sql_page_continues_open_cursor(self, test_db):
+        sql = "SELECT name FROM users ORDER BY id"
+        first = execute_sql_page(sql, offset=0, page_size=1)
+        assert first['cursor_id']
+        
+        statements = []
+        test_db.set_trace_callback(statements.append)
+        second = execute_sql_page(sql, offset=1, page_size=1, cursor_id=first['cursor_id'])
+        third = execute_sql_page(sql, offset=2, page_size=1, cursor_id=second['cursor_id'])
+        test_db.set_trace_callback(None)
+        
+        # Later pages continue the statement instead of re-running it
+        assert statements == []
+        assert [page['results'] for page in (first, second, third)] == [[{'name': 'John'}], [{'name': 'Jane'}], [{'name': 'Bob'}]]
+        assert third['has_more'] is False
+        assert third['cursor_id'] is None
+    
+    def test_execute_sql_page_keeps_duplicate_column_names(self, test_db):
+        sql = "SELECT u.id, p.id FROM users u JOIN products p ON p.id = u.id ORDER BY u.id"
+        
+        assert execute_sql_page(sql, page_size=1)['columns'] == ['id', 'id']
+    
+    def test_execute_sql_page_non_select(self, test_db):
+        result = execute_sql_page("PRAGMA table_info(users)", offset=1, page_size=2)
+        
+        assert result['error'] is None
+        assert [row['name'] for row in result['results']] == ['name', 'age']
+        assert result['has_more'] is True
+    
+    def test_query_cursor_round_trip(self):
+        cursor = encode_query_cursor("SELECT * FROM users", 200)
+        
+        assert decode_query_cursor(cursor) == ("SELECT * FROM users", 200, None)
+        assert decode_query_cursor(encode_query_cursor("SELECT 1", 5, "abc")) == ("SELECT 1", 5, "abc")
+    
+    def test_query_cursor_rejects_tampering(self):
+        cursor = encode_query_cursor("SELECT * FROM users", 200)
+        forged = encode_query_cursor("SELECT * FROM products", 0).split('.')[0] + '.' + cursor.split('.')[1]
+        
+        with pytest.raises(ValueError):
+            decode_query_cursor(forged)
+        with pytest.raises(ValueError):
+            decode_query_cursor("not-a-cursor")
@@ -0,0 +1,36 @@
+from core.sql_tokenizer import tokenize_sql
+
+
+def kinds_and_values(sql):
+    return [(token.kind, token.value) for token in tokenize_sql(sql)]
+
+
+class TestSQLTokenizer:
+    
+    def test_keywords_names_and_literals(self):
+        assert kinds_and_values("select name, 1.5e3 FROM users WHERE id = ?") == [
+            ('keyword', 'SELECT'), ('name', 'name'), ('punctuation', ','),
+            ('number', '1.5e3'), ('keyword', 'FROM'), ('name', 'users'),
+            ('keyword', 'WHERE'), ('name', 'id'), ('operator', '='), ('param', '?')
+        ]
+    
+    def test_quoted_identifiers_are_unquoted(self):
+        tokens = tokenize_sql('SELECT "first ""name""", [order], `group` FROM t')
+        
+        assert [token.value for token in tokens if token.kind == 'name'] == [
+            'first "name"', 'order', 'group', 't'
+        ]
+    
+    def test_keywords_inside_strings_and_comments_are_not_tokens(self):
+        tokens = tokenize_sql("SELECT 'DROP TABLE x; it''s' -- DELETE FROM y\n/* UPDATE */ FROM t")
+        
+        assert [token.value for token in tokens if token.kind == 'keyword'] == ['SELECT', 'FROM']
+        assert tokens[1] == ('string', "'DROP TABLE x; it''s'", 7)
+    
+    def test_keep_comments(self):
+        tokens = tokenize_sql("SELECT 1 -- note", keep_comments=True)
+        
+        assert tokens[-1].kind == 'comment'
+    
+    def test_unterminated_string_runs_to_end(self):
+        assert kinds_and_values("SELECT 'abc; DROP") == [('keyword', 'SELECT'), ('string', "'abc; DROP")]
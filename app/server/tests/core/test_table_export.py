@@ -0,0 +1,107 @@
+import csv
+import gzip
+import io
+import json
+import sqlite3
+import pytest
+from contextlib import contextmanager
+from unittest.mock import patch
+from core.table_export import export_table_chunks
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    """Create a file database with a 25-row table and count borrowed connections"""
+    path = str(tmp_path / "database.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, label TEXT, price REAL)")
+    conn.executemany(
+        "INSERT INTO items (label, price) VALUES (?, ?)",
+        [(f"item, {i}", i * 1.5) for i in range(25)]
+    )
+    conn.commit()
+    conn.close()
+    
+    borrowed = {'count': 0}
+    
+    @contextmanager
+    def get_connection(*args, **kwargs):
+        conn = sqlite3.connect(path)
+        borrowed['count'] += 1
+        try:
+            yield conn
+        finally:
+            borrowed['count'] -= 1
+            conn.close()
+    
+    with patch('core.table_export.get_connection', get_connection):
+        yield borrowed
+
+
+class TestTableExport:
+    
+    def test_csv_is_streamed_in_batches(self, test_db):
+        chunks = list(export_table_chunks("items", "csv", batch_size=10))
+        
+        # One chunk per batch of 10, 10 and 5 rows
+        assert len(chunks) == 3
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode('utf-8'))))
+        assert rows[0] == ['id', 'label', 'price']
+        assert rows[1] == ['1', 'item, 0', '0.0']
+        assert len(rows) == 26
+    
+    def test_jsonl(self, test_db):
+        content = b"".join(export_table_chunks("items", "jsonl", batch_size=10)).decode('utf-8')
+        rows = [json.loads(line) for line in content.splitlines()]
+        
+        assert len(rows) == 25
+        assert rows[-1] == {'id': 25, 'label': 'item, 24', 'price': 36.0}
+    
+    def test_gzip_matches_plain_output(self, test_db):
+        plain = b"".join(export_table_chunks("items", "csv", batch_size=10))
+        compressed = b"".join(export_table_chunks("items", "csv", compress=True, batch_size=10))
+        
+        assert gzip.decompress(compressed) == plain
+    
+    def test_parquet_row_groups(self, test_db):
+        pq = pytest.importorskip("pyarrow.parquet")
+        content = b"".join(export_table_chunks("items", "parquet", batch_size=10))
+        
+        parquet_file = pq.ParquetFile(io.BytesIO(content))
+        assert parquet_file.metadata.num_row_groups == 3
+        table = parquet_file.read()
+        assert table.num_rows == 25
+        assert str(table.schema.field('id').type) == 'int64'
+        assert str(table.schema.field('price').type) == 'double'
+    
+    def test_parquet_types_follow_stored_values(self, test_db, tmp_path):
+        pq = pytest.importorskip("pyarrow.parquet")
+        from core.table_export import read_parquet_schema
+        conn = sqlite3.connect(str(tmp_path / "database.db"))
+        conn.execute('CREATE TABLE mixed (code INTEGER, price INTEGER, "unit price" REAL, empty INTEGER)')
+        conn.executemany(
+            "INSERT INTO mixed VALUES (?, ?, ?, NULL)",
+            [(1, 1, 2.0), (2, 2.5, 3.5), ('abc', 3, None)]
+        )
+        conn.commit()
+        conn.close()
+        
+        schema = read_parquet_schema("mixed")
+        content = b"".join(export_table_chunks("mixed", "parquet", batch_size=1, parquet_table_schema=schema))
+        table = pq.read_table(io.BytesIO(content))
+        
+        assert [str(field.type) for field in table.schema] == ['string', 'double', 'double', 'int64']
+        assert table.column('code').to_pylist() == ['1', '2', 'abc']
+        assert table.column('price').to_pylist() == [1.0, 2.5, 3.0]
+    
+    def test_closing_early_releases_the_cursor(self, test_db):
+        chunks = export_table_chunks("items", "csv", batch_size=10)
+        next(chunks)
+        assert test_db['count'] == 1
+        
+        chunks.close()
+        assert test_db['count'] == 0
+    
+    def test_unsupported_format(self, test_db):
+        with pytest.raises(ValueError):
+            list(export_table_chunks("items", "xml"))
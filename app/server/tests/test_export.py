@@ -159,6 +159,57 @@ class TestTableExportEndpoint:
             assert 'id' in lines[0]
             assert 'name' in lines[0]
 
+    def test_export_table_jsonl(self, test_db_with_data):
+        """Test JSON Lines export returns one object per row"""
+        import json
+        from server import app
+        with TestClient(app) as client:
+            response = client.get("/api/table/users/export?format=jsonl")
+
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            assert 'attachment; filename="users.jsonl"' in response.headers["content-disposition"]
+
+            rows = [json.loads(line) for line in response.text.splitlines()]
+            assert [row['name'] for row in rows] == ['Alice', 'Bob', 'Charlie']
+            assert rows[0] == {'id': 1, 'name': 'Alice', 'email': 'alice@example.com', 'age': 30}
+
+    def test_export_table_gzip(self, test_db_with_data):
+        """Test gzip export decompresses to the same CSV"""
+        import gzip
+        from server import app
+        with TestClient(app) as client:
+            plain = client.get("/api/table/users/export").content
+            response = client.get("/api/table/users/export?gzip=true")
+
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/gzip"
+            assert 'attachment; filename="users.csv.gz"' in response.headers["content-disposition"]
+            assert gzip.decompress(response.content) == plain
+
+    def test_export_table_parquet(self, test_db_with_data):
+        """Test Parquet export keeps declared column types"""
+        import io
+        pq = pytest.importorskip("pyarrow.parquet")
+        from server import app
+        with TestClient(app) as client:
+            response = client.get("/api/table/users/export?format=parquet")
+
+            assert response.status_code == 200
+            assert 'attachment; filename="users.parquet"' in response.headers["content-disposition"]
+
+            table = pq.read_table(io.BytesIO(response.content))
+            assert table.column_names == ['id', 'name', 'email', 'age']
+            assert table.column('age').to_pylist() == [30, 25, 35]
+
+    def test_export_table_unsupported_format(self, test_db_with_data):
+        """Test unknown export formats are rejected"""
+        from server import app
+        with TestClient(app) as client:
+            response = client.get("/api/table/users/export?format=xml")
+
+            assert response.status_code == 400
+
 
 class TestResultsExportEndpoint:
     """Tests for POST /api/export-results endpoint"""
@@ -0,0 +1,480 @@
+"""
+Unit tests for query result formats (columnar, streaming, paginated and
+batched), the result cap and cache, the query cost guard and query deadlines
+"""
+
+import json
+import pytest
+import sqlite3
+import tempfile
+import threading
+import time
+import os
+import sys
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+
+# Add parent directory to path to import server module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def test_db_with_data():
+    """Create a test database with 25 users in a temporary working directory"""
+    db_dir = tempfile.mkdtemp()
+    original_cwd = os.getcwd()
+    os.chdir(db_dir)
+    os.makedirs("db", exist_ok=True)
+
+    conn = sqlite3.connect(os.path.join("db", "database.db"))
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    conn.executemany("INSERT INTO users (name) VALUES (?)", [(f"user{i}",) for i in range(25)])
+    conn.commit()
+    conn.close()
+
+    from core.sql_cache import get_sql_cache
+    get_sql_cache().clear()
+    from core.result_cache import get_result_cache
+    get_result_cache().clear()
+
+    yield os.path.join("db", "database.db")
+
+    os.chdir(original_cwd)
+    import shutil
+    shutil.rmtree(db_dir)
+
+
+class TestColumnarQuery:
+    """Tests for columnar results from POST /api/query"""
+
+    def test_columnar_by_request_field(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT id, name FROM users WHERE id <= 3 ORDER BY id"):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "first users", "result_format": "columnar"}).json()
+
+        assert data['error'] is None
+        assert data['result_format'] == 'columnar'
+        assert data['columns'] == ['id', 'name']
+        assert data['column_data'] == [[1, 2, 3], ['user0', 'user1', 'user2']]
+        assert data['results'] == []
+        assert data['row_count'] == 3
+
+    def test_columnar_by_accept_header(self, test_db_with_data):
+        from server import app, COLUMNAR_MEDIA_TYPE
+        with patch('server.generate_sql', return_value="SELECT name FROM users WHERE id = 1"):
+            with TestClient(app) as client:
+                data = client.post(
+                    "/api/query",
+                    json={"query": "first user"},
+                    headers={"Accept": f"{COLUMNAR_MEDIA_TYPE}, application/json"}
+                ).json()
+
+        assert data['result_format'] == 'columnar'
+        assert data['column_data'] == [['user0']]
+
+    def test_rows_by_default(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT name FROM users WHERE id = 1"):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "first user"}).json()
+
+        assert data['result_format'] == 'rows'
+        assert data['results'] == [{'name': 'user0'}]
+        assert data['column_data'] is None
+
+
+class TestQueryStreamEndpoint:
+    """Tests for POST /api/query/stream"""
+
+    def test_stream_returns_ndjson_batches(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT id, name FROM users ORDER BY id"), \
+                patch('core.sql_processor.QUERY_FETCH_SIZE', 10):
+            with TestClient(app) as client:
+                response = client.post("/api/query/stream", json={"query": "all users"})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[0] == {'type': 'meta', 'sql': "SELECT id, name FROM users ORDER BY id", 'columns': ['id', 'name']}
+        assert events[-1]['type'] == 'end'
+        assert events[-1]['row_count'] == 25
+
+        batches = [event['rows'] for event in events if event['type'] == 'rows']
+        assert [len(batch) for batch in batches] == [10, 10, 5]
+        rows = [row for batch in batches for row in batch]
+        assert len(rows) == 25
+        assert rows[0] == {'id': 1, 'name': 'user0'}
+
+    def test_stream_reports_errors_as_events(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="DROP TABLE users"):
+            with TestClient(app) as client:
+                response = client.post("/api/query/stream", json={"query": "drop users"})
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert events[-1]['type'] == 'error'
+        assert 'dangerous operation' in events[-1]['error']
+
+
+class TestQueryBatchEndpoint:
+    """Tests for POST /api/query/batch"""
+
+    SQL = {
+        "count users": "SELECT COUNT(*) AS total FROM users",
+        "first user": "SELECT name FROM users WHERE id = 1",
+        "drop users": "DROP TABLE users",
+    }
+
+    def generate(self, request, schema_info):
+        return self.SQL[request.query]
+
+    def test_batch_streams_one_result_per_query(self, test_db_with_data):
+        from server import app, get_schema_catalog
+        queries = ["count users", "drop users", "first user"]
+        with patch('server.generate_sql', side_effect=self.generate), \
+                patch('server.get_schema_catalog', wraps=get_schema_catalog) as catalog:
+            with TestClient(app) as client:
+                response = client.post("/api/query/batch", json={"queries": queries})
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        events = [json.loads(line) for line in response.text.splitlines()]
+        results = {event['index']: event for event in events if event['type'] == 'result'}
+        assert sorted(results) == [0, 1, 2]
+        assert results[0]['query'] == "count users"
+        assert results[0]['results'] == [{'total': 25}]
+        assert 'dangerous operation' in results[1]['error']
+        assert results[2]['results'] == [{'name': 'user0'}]
+        assert events[-1]['type'] == 'end'
+        assert (events[-1]['query_count'], events[-1]['error_count']) == (3, 1)
+        # The schema is fetched once for the whole batch
+        assert catalog.call_count == 1
+
+    def test_concurrency_limit(self, test_db_with_data):
+        from server import app
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def slow_generate(request, schema_info):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+            return "SELECT 1"
+
+        with patch('server.generate_sql', side_effect=slow_generate), \
+                patch('server.QUERY_BATCH_CONCURRENCY', 2):
+            with TestClient(app) as client:
+                response = client.post("/api/query/batch", json={"queries": [f"query {i}" for i in range(6)]})
+
+        events = [json.loads(line) for line in response.text.splitlines()]
+        assert len([event for event in events if event['type'] == 'result']) == 6
+        assert max(peak) == 2
+
+    def test_batch_size_is_limited(self, test_db_with_data):
+        from server import app
+        with patch('server.QUERY_BATCH_MAX_QUERIES', 2):
+            with TestClient(app) as client:
+                too_many = client.post("/api/query/batch", json={"queries": ["a", "b", "c"]})
+                empty = client.post("/api/query/batch", json={"queries": []})
+
+        assert too_many.status_code == 400
+        assert empty.status_code == 422
+
+
+class TestQueryCoalescing:
+    """Tests for sharing one answer among identical concurrent requests"""
+
+    def slow_generate(self, request, schema_info):
+        time.sleep(0.2)
+        return "SELECT COUNT(*) AS total FROM users"
+
+    @pytest.fixture(autouse=True)
+    def no_caches(self, test_db_with_data):
+        """Disable the SQL and result caches, which would hide repeated work"""
+        from core.sql_cache import get_sql_cache
+        from core.result_cache import get_result_cache
+        with patch.object(get_sql_cache(), 'max_entries', 0), patch.object(get_result_cache(), 'max_bytes', 0):
+            yield
+
+    def test_concurrent_identical_queries_share_one_answer(self, test_db_with_data):
+        from server import app, execute_sql_safely
+        responses = []
+        with patch('server.generate_sql', side_effect=self.slow_generate) as generate_sql, \
+                patch('server.execute_sql_safely', wraps=execute_sql_safely) as execute:
+            with TestClient(app) as client:
+                def ask(query):
+                    responses.append(client.post("/api/query", json={"query": query}).json())
+                threads = [threading.Thread(target=ask, args=(query,)) for query in ("count users", "Count  users?", "count users")]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        assert [response['results'] for response in responses] == [[{'total': 25}]] * 3
+        assert generate_sql.call_count == 1
+        assert execute.call_count == 1
+
+    def test_duplicate_batch_queries_share_one_answer(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', side_effect=self.slow_generate) as generate_sql:
+            with TestClient(app) as client:
+                response = client.post("/api/query/batch", json={"queries": ["count users", "COUNT USERS", "count users?"]})
+
+        results = [json.loads(line) for line in response.text.splitlines() if '"result"' in line]
+        assert [result['results'] for result in results] == [[{'total': 25}]] * 3
+        assert generate_sql.call_count == 1
+
+
+class TestAdmissionControl:
+    """Tests for refusing LLM-bound requests when a provider is saturated"""
+
+    @pytest.fixture
+    def rate_limited(self):
+        """Providers whose only token is spent and refill once every 10 seconds"""
+        from core.admission import AdmissionController
+        controllers = {}
+        for provider in ("openai", "anthropic"):
+            controller = AdmissionController(provider, max_concurrency=4, rate_per_second=0.1, burst=1, max_wait_seconds=1)
+            controller._bucket.take()
+            controllers[provider] = controller
+        with patch.dict('core.admission._controllers', controllers, clear=True):
+            yield controllers
+
+    def test_query_refused_with_retry_after(self, test_db_with_data, rate_limited):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT 1") as generate_sql:
+            with TestClient(app) as client:
+                response = client.post("/api/query", json={"query": "count users"})
+                metrics = client.get("/api/metrics").json()
+
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 9
+        assert "rate limited" in response.json()['error']
+        generate_sql.assert_not_called()
+        assert sum(stats['rate_limited'] for stats in metrics['llm_admission'].values()) == 1
+
+    def test_stream_refused_with_retry_after(self, test_db_with_data, rate_limited):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT 1") as generate_sql:
+            with TestClient(app) as client:
+                response = client.post("/api/query/stream", json={"query": "count users"})
+
+        assert response.status_code == 429
+        assert int(response.headers['Retry-After']) >= 9
+        assert "rate limited" in response.json()['error']
+        generate_sql.assert_not_called()
+
+    def test_batch_reports_refusal_per_query(self, test_db_with_data, rate_limited):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT 1"):
+            with TestClient(app) as client:
+                response = client.post("/api/query/batch", json={"queries": ["count users"]})
+
+        assert response.status_code == 200
+        result = json.loads(response.text.splitlines()[0])
+        assert "rate limited" in result['error']
+
+
+class TestQueryPageEndpoint:
+    """Tests for POST /api/query/page"""
+
+    def test_pages_follow_continuation_tokens(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT name FROM users ORDER BY id") as mock_generate:
+            with TestClient(app) as client:
+                first = client.post("/api/query/page", json={"query": "all users", "page_size": 10}).json()
+                assert first['error'] is None
+                assert first['row_count'] == 10
+                assert first['next_cursor']
+
+                names = [row['name'] for row in first['results']]
+                cursor = first['next_cursor']
+                while cursor:
+                    page = client.post("/api/query/page", json={"cursor": cursor, "page_size": 10}).json()
+                    names.extend(row['name'] for row in page['results'])
+                    cursor = page['next_cursor']
+
+        assert names == [f"user{i}" for i in range(25)]
+        mock_generate.assert_called_once()
+
+    def test_invalid_cursor(self, test_db_with_data):
+        from server import app
+        with TestClient(app) as client:
+            response = client.post("/api/query/page", json={"cursor": "bogus"})
+
+        assert response.json()['error'] == "Invalid query cursor"
+
+    def test_query_or_cursor_required(self, test_db_with_data):
+        from server import app
+        with TestClient(app) as client:
+            response = client.post("/api/query/page", json={})
+
+        assert response.status_code == 400
+
+
+class TestResultCap:
+    """Tests for the server-side cap on rows returned by POST /api/query"""
+
+    def test_capped_result_continues_with_cursor(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT id FROM users ORDER BY id"), \
+                patch('core.sql_processor.MAX_RESULT_ROWS', 10):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "all users"}).json()
+                rest = client.post("/api/query/page", json={"cursor": data['next_cursor'], "page_size": 100}).json()
+
+        assert data['error'] is None
+        assert data['row_count'] == 10
+        assert data['truncated'] is True
+        assert [row['id'] for row in rest['results']] == list(range(11, 26))
+        assert rest['next_cursor'] is None
+
+    def test_small_result_is_not_truncated(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT id FROM users"):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "all users"}).json()
+
+        assert data['row_count'] == 25
+        assert data['truncated'] is False
+        assert data['next_cursor'] is None
+
+
+class TestResultCache:
+    """Tests for the result cache on POST /api/query"""
+
+    def test_repeated_query_is_served_from_cache(self, test_db_with_data):
+        import server
+        with patch('server.generate_sql', return_value="SELECT count(*) AS n FROM users"), \
+                patch('server.execute_sql_safely', wraps=server.execute_sql_safely) as execute:
+            with TestClient(server.app) as client:
+                first = client.post("/api/query", json={"query": "how many users"}).json()
+                second = client.post("/api/query", json={"query": "how many users"}).json()
+                client.delete("/api/table/users")
+                third = client.post("/api/query", json={"query": "how many users"}).json()
+
+        assert first['results'] == second['results'] == [{'n': 25}]
+        assert second['sql'] == first['sql']
+        # The delete bumped the table's data version, so the query ran again
+        assert execute.call_count == 2
+        assert "no such table" in third['error']
+
+
+class TestCostGuard:
+    """Tests for the EXPLAIN QUERY PLAN cost guard on the query endpoints"""
+
+    def test_runaway_query_is_rejected(self, test_db_with_data):
+        from server import app
+        from core import query_planner
+        with patch('server.generate_sql', return_value="SELECT * FROM users a, users b, users c"), \
+                patch.object(query_planner, 'QUERY_COST_MAX_ROWS', 1000):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "everything"}).json()
+                events = [json.loads(line) for line in client.post("/api/query/stream", json={"query": "everything"}).text.splitlines()]
+
+        assert data['results'] == []
+        assert data['error'].startswith("Query rejected by cost guard")
+        assert events[-1]['type'] == 'error'
+
+    def test_unbounded_query_is_limited(self, test_db_with_data):
+        from server import app
+        from core import query_planner
+        with patch('server.generate_sql', return_value="SELECT id FROM users ORDER BY id"), \
+                patch.object(query_planner, 'QUERY_AUTO_LIMIT', 10):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "all users"}).json()
+                rest = client.post("/api/query/page", json={"cursor": data['next_cursor'], "page_size": 100}).json()
+
+        assert data['error'] is None
+        assert data['row_count'] == 10
+        assert data['row_limit'] == 10
+        assert data['sql'] == "SELECT id FROM users ORDER BY id LIMIT 10"
+        assert data['estimated_cost'] >= 25
+        # The rest of the unlimited query is still reachable
+        assert data['truncated'] is True
+        assert data['next_cursor'] is not None
+        assert [row['id'] for row in rest['results']] == list(range(11, 26))
+        assert rest['next_cursor'] is None
+    
+    def test_stream_is_not_limited(self, test_db_with_data):
+        from server import app
+        conn = sqlite3.connect(test_db_with_data)
+        conn.execute("CREATE TABLE events (id INTEGER PRIMARY KEY, kind TEXT)")
+        conn.executemany("INSERT INTO events (kind) VALUES (?)", [(f"kind{i % 7}",) for i in range(20000)])
+        conn.commit()
+        conn.close()
+        
+        sql = "SELECT id, kind FROM events ORDER BY id"
+        with patch('server.generate_sql', return_value=sql):
+            with TestClient(app) as client:
+                events = [json.loads(line) for line in client.post("/api/query/stream", json={"query": "all events"}).text.splitlines()]
+        
+        assert events[0]['sql'] == sql
+        assert events[-1] == {'type': 'end', 'row_count': 20000, 'execution_time_ms': events[-1]['execution_time_ms']}
+        ids = [row['id'] for event in events if event['type'] == 'rows' for row in event['rows']]
+        assert ids == list(range(1, 20001))
+    
+    def test_cursor_pages_are_guarded(self, test_db_with_data):
+        from server import app
+        from core import query_planner
+        from core.sql_processor import encode_query_cursor
+        cursor = encode_query_cursor("SELECT * FROM users a, users b, users c", 10)
+        with patch.object(query_planner, 'QUERY_COST_MAX_ROWS', 1000):
+            with TestClient(app) as client:
+                data = client.post("/api/query/page", json={"cursor": cursor}).json()
+        
+        assert data['results'] == []
+        assert data['error'].startswith("Query rejected by cost guard")
+    
+    def test_expensive_queries_run_at_low_priority(self, test_db_with_data):
+        import server
+        from core.query_planner import CostDecision
+        sql = "SELECT id FROM users ORDER BY id"
+        with patch('server.generate_sql', return_value=sql), \
+                patch('server.check_query_cost', return_value=CostDecision(action="run", sql=sql, low_priority=True)), \
+                patch('server.run_db_low_priority', wraps=server.run_db_low_priority) as low_priority:
+            with TestClient(server.app) as client:
+                client.post("/api/query", json={"query": "all users"})
+                client.post("/api/query/page", json={"query": "all users"})
+        
+        called = [call.args[0] for call in low_priority.call_args_list]
+        assert called == [server.execute_sql_safely, server.execute_sql_page]
+
+
+class TestQueryTimeout:
+    """Tests for the query deadlines on the query endpoints"""
+
+    RUNAWAY_SQL = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+    def test_runaway_query_times_out(self, test_db_with_data):
+        from server import app
+        from core.query_planner import CostDecision
+        with patch('server.generate_sql', return_value=self.RUNAWAY_SQL), \
+                patch('server.check_query_cost', return_value=CostDecision(action="run", sql=self.RUNAWAY_SQL)), \
+                patch('server.QUERY_TIMEOUT_SECONDS', 0.2), \
+                patch('server.QUERY_STREAM_TIMEOUT_SECONDS', 0.2):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "count forever"}).json()
+                events = [json.loads(line) for line in client.post("/api/query/stream", json={"query": "count forever"}).text.splitlines()]
+
+        assert data['timed_out'] is True
+        assert "time limit" in data['error']
+        assert events[-1]['type'] == 'error'
+        assert events[-1]['timed_out'] is True
+
+    def test_fast_query_is_not_timed_out(self, test_db_with_data):
+        from server import app
+        with patch('server.generate_sql', return_value="SELECT count(*) AS n FROM users"):
+            with TestClient(app) as client:
+                data = client.post("/api/query", json={"query": "how many users"}).json()
+
+        assert data['error'] is None
+        assert data['timed_out'] is False
+        assert data['results'] == [{'n': 25}]
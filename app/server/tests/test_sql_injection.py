@@ -2,6 +2,7 @@
 Comprehensive tests for SQL injection protection
 """
 
+import io
 import pytest
 import sqlite3
 import tempfile
@@ -12,6 +13,7 @@ from core.sql_security import (
     escape_identifier,
     execute_query_safely,
     validate_sql_query,
+    parse_sql_query,
     sanitize_value_for_like,
     build_safe_in_clause,
     check_table_exists,
@@ -196,11 +198,83 @@ class TestSQLSecurityModule:
         conn.close()
 
 
+class TestSQLQueryValidator:
+    """Test the tokenizer-based validation of complete queries"""
+    
+    def test_keywords_inside_literals_are_allowed(self):
+        """Keywords, comment markers and semicolons in literals are data"""
+        assert validate_sql_query("SELECT * FROM products WHERE name = 'Update set'")
+        assert validate_sql_query("SELECT * FROM notes WHERE body LIKE '%-- drop table x; delete from y%'")
+        assert validate_sql_query('SELECT "update", "drop" FROM events')
+        assert validate_sql_query("SELECT 'it''s' AS quote;")
+    
+    def test_write_statements_are_rejected(self):
+        """Statements that write or reconfigure the database are blocked anywhere"""
+        for query in [
+            "INSERT INTO users (name) VALUES ('x')",
+            "WITH doomed AS (SELECT id FROM users) DELETE FROM users",
+            "UPDATE users SET name = 'x'",
+            "REPLACE INTO users VALUES (1, 'x')",
+            "WITH a AS (SELECT 1) REPLACE INTO t VALUES(1)",
+            "EXPLAIN REPLACE INTO t VALUES(1)",
+            "EXPLAIN QUERY PLAN REPLACE INTO t VALUES(1)",
+            "WITH a(x) AS MATERIALIZED (SELECT 1), b AS (SELECT 2) REPLACE INTO t VALUES(1)",
+            "ATTACH DATABASE 'other.db' AS other",
+            "PRAGMA query_only = OFF",
+            "PRAGMA query_only(0)",
+            "SELECT load_extension('evil')",
+        ]:
+            with pytest.raises(SQLSecurityError):
+                validate_sql_query(query)
+    
+    def test_statement_after_with_and_explain(self):
+        """The statement after EXPLAIN or the table expressions must read"""
+        assert validate_sql_query("WITH a(x) AS (SELECT 1), b AS MATERIALIZED (SELECT x FROM a) SELECT * FROM b")
+        assert validate_sql_query("WITH a AS (SELECT 1) VALUES (1)")
+        assert validate_sql_query("EXPLAIN QUERY PLAN WITH a AS (SELECT 1) SELECT * FROM a")
+        assert validate_sql_query("SELECT replace(name, 'a', 'b') FROM users")
+        with pytest.raises(SQLSecurityError, match="PRAGMA"):
+            validate_sql_query("EXPLAIN PRAGMA query_only = OFF")
+    
+    def test_schema_pragmas_are_allowed(self):
+        """Pragmas that only report on the schema are read-only"""
+        assert validate_sql_query("PRAGMA table_info(users)")
+        assert validate_sql_query("PRAGMA main.index_list(users)")
+    
+    def test_statement_boundaries(self):
+        """Trailing semicolons end the statement; anything after them is rejected"""
+        assert validate_sql_query("SELECT 1;;")
+        with pytest.raises(SQLSecurityError, match="multiple statements"):
+            validate_sql_query("SELECT 1; SELECT 2")
+        with pytest.raises(SQLSecurityError, match="empty"):
+            validate_sql_query(" ; ")
+    
+    def test_injection_patterns(self):
+        """Unterminated literals and always-true OR conditions are rejected"""
+        with pytest.raises(SQLSecurityError, match="unterminated"):
+            validate_sql_query("SELECT * FROM users WHERE name = 'x''")
+        with pytest.raises(SQLSecurityError, match="injection"):
+            validate_sql_query("SELECT * FROM users WHERE id = 5 OR 1 = 1")
+        with pytest.raises(SQLSecurityError, match="injection"):
+            validate_sql_query("SELECT * FROM users WHERE name = 'a' OR 'x'='x'")
+        # A comparison between different literals is not a tautology
+        assert validate_sql_query("SELECT * FROM users WHERE id = 5 OR 1 = 2")
+    
+    def test_parse_sql_query_exposes_statement(self):
+        """The parsed statement carries its type and tokens"""
+        statement = parse_sql_query("with recent as (select * from users) select count(*) from recent;")
+        
+        assert statement.statement_type == "WITH"
+        assert statement.is_select
+        assert statement.tokens[-1].value == "recent"
+        assert not parse_sql_query("PRAGMA table_info(users)").is_select
+
+
 class TestSQLProcessorSecurity:
     """Test SQL processor with security enhancements"""
     
-    @patch('core.sql_processor.sqlite3.connect')
-    def test_execute_sql_safely_blocks_dangerous_queries(self, mock_connect):
+    @patch('core.sql_processor.get_connection')
+    def test_execute_sql_safely_blocks_dangerous_queries(self, mock_get_connection):
         """Test that dangerous SQL queries are blocked"""
         # Test DROP statement
         result = execute_sql_safely("DROP TABLE users")
@@ -217,12 +291,12 @@ class TestSQLProcessorSecurity:
         assert result['error'] is not None
         assert "Security error" in result['error']
     
-    @patch('core.sql_processor.sqlite3.connect')
-    def test_execute_sql_safely_allows_select(self, mock_connect):
+    @patch('core.sql_processor.get_connection')
+    def test_execute_sql_safely_allows_select(self, mock_get_connection):
         """Test that safe SELECT queries are allowed"""
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
-        mock_connect.return_value = mock_conn
+        mock_get_connection.return_value.__enter__.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         mock_cursor.fetchall.return_value = []
         
@@ -257,19 +331,19 @@ class TestFileProcessorSecurity:
 class TestInsightsSecurity:
     """Test insights module with security enhancements"""
     
-    @patch('core.insights.sqlite3.connect')
-    def test_generate_insights_validates_table_name(self, mock_connect):
+    @patch('core.insights.get_connection')
+    def test_generate_insights_validates_table_name(self, mock_get_connection):
         """Test that table names are validated"""
         with pytest.raises(Exception) as exc_info:
             generate_insights("users'; DROP TABLE users; --")
         assert "Invalid" in str(exc_info.value)
     
-    @patch('core.insights.sqlite3.connect')
-    def test_generate_insights_validates_column_names(self, mock_connect):
+    @patch('core.insights.get_connection')
+    def test_generate_insights_validates_column_names(self, mock_get_connection):
         """Test that column names are validated"""
         mock_conn = MagicMock()
         mock_cursor = MagicMock()
-        mock_connect.return_value = mock_conn
+        mock_get_connection.return_value.__enter__.return_value = mock_conn
         mock_conn.cursor.return_value = mock_cursor
         
         with pytest.raises(Exception) as exc_info:
@@ -327,14 +401,14 @@ class TestEndToEndSQLInjection:
 
 def test_integration_upload_malicious_filename(test_db):
     """Test that malicious filenames are handled safely during upload"""
-    from core.file_processor import convert_csv_to_sqlite
+    from core.file_processor import convert_csv_stream_to_sqlite
     
     # Create a simple CSV content
     csv_content = b"name,age\nAlice,30\nBob,25"
     
     # Try with malicious filename
     malicious_name = "data'; DROP TABLE users; --.csv"
-    result = convert_csv_to_sqlite(csv_content, malicious_name, db_path=test_db)
+    result = convert_csv_stream_to_sqlite(io.BytesIO(csv_content), malicious_name, db_path=test_db)
     
     # The table should be created with a sanitized name
     assert result['table_name'] != malicious_name